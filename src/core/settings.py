@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 
 from environs import Env
@@ -17,50 +18,77 @@ DEBUG = env.bool("DEBUG", False)
 
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=[])
 
-SECURE_REDIRECT_EXEMPT = [r"^healthcheck/$"]
-DJANGO_EASY_HEALTH_CHECK = {
-    "PATH": "/healthcheck/",
-    "RETURN_STATUS_CODE": 200,
-    "RETURN_BYTE_DATA": "OK",
-    "RETURN_HEADERS": None,
-}
+# Liveness and readiness probes, answered by nexxus.health.HealthCheckMiddleware
+# ahead of every other middleware. Readiness checks the database and cache and
+# reuses its result for READINESS_CACHE_SECONDS so probes never amplify DB load.
+HEALTH_CHECK_PATH: str = env.str("HEALTH_CHECK_PATH", default="/healthcheck/")
+READINESS_CHECK_PATH: str = env.str("READINESS_CHECK_PATH", default="/readiness/")
+READINESS_CACHE_SECONDS: float = env.float("READINESS_CACHE_SECONDS", default=5.0)
+SECURE_REDIRECT_EXEMPT = [r"^healthcheck/$", r"^readiness/$"]
 
 # Application definition
 
+# Optional subsystems, left out of workers that don't need them to cut cold-start
+# time: API-only workers can run without the admin, and django_extensions is a
+# development aid.
+ENABLE_ADMIN: bool = env.bool("ENABLE_ADMIN", default=True)
+ENABLE_DJANGO_EXTENSIONS: bool = env.bool("ENABLE_DJANGO_EXTENSIONS", default=DEBUG)
+
 INSTALLED_APPS = [
     "whitenoise.runserver_nostatic",
-    "django.contrib.admin",
+    *(["django.contrib.admin"] if ENABLE_ADMIN else []),
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
-    "django_extensions",
+    *(["django_extensions"] if ENABLE_DJANGO_EXTENSIONS else []),
     "corsheaders",
     "nexxus",
     "ninja_extra",
 ]
 
 MIDDLEWARE = [
+    "nexxus.health.HealthCheckMiddleware",
+    "nexxus.clientip.ClientIPMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "easy_health_check.middleware.HealthCheckMiddleware",
+    "nexxus.middleware.SlimSessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "nexxus.middleware.SlimCsrfViewMiddleware",
+    "nexxus.middleware.SlimAuthenticationMiddleware",
+    "nexxus.middleware.SlimMessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Metaserver protocol and API paths used by game servers and clients, which never
+# use sessions, auth, messages or CSRF tokens. With SLIM_MIDDLEWARE on, the
+# nexxus.middleware.Slim* middleware skip them. Patterns match the path without
+# its leading slash, like SECURE_REDIRECT_EXEMPT.
+SLIM_MIDDLEWARE: bool = env.bool("SLIM_MIDDLEWARE", default=True)
+SLIM_MIDDLEWARE_PATHS: list[str] = [r"^$", r"^meta_\w+\.php$", r"^v3/api/"]
+
 ROOT_URLCONF = "core.urls"
 
+# Production template profile: compile every template once per process with the
+# cached loader and precompile them all at startup (NexxusConfig.ready), so no
+# request reads or parses a template from disk. On whenever DEBUG is off; with it
+# on, template edits need a worker restart. `manage.py check --deploy` fails if
+# it is disabled or any template does not compile into the cache.
+TEMPLATE_CACHE: bool = env.bool("TEMPLATE_CACHE", default=not DEBUG)
+TEMPLATE_PRECOMPILE: bool = env.bool("TEMPLATE_PRECOMPILE", default=TEMPLATE_CACHE)
+
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
-        "APP_DIRS": True,
+        "APP_DIRS": not TEMPLATE_CACHE,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -68,6 +96,8 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            # Without TEMPLATE_CACHE Django's defaults apply, which reload templates on change under DEBUG.
+            "loaders": [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)] if TEMPLATE_CACHE else None,
         },
     },
 ]
@@ -88,6 +118,19 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Use a shared backend (memcached, redis) when running more than one worker,
+# otherwise every worker keeps its own copy of the cached server lists.
+
+CACHES = {
+    "default": {
+        "BACKEND": env.str("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env.str("CACHE_LOCATION", default="nexxus"),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -137,13 +180,15 @@ CORS_ALLOWED_ORIGINS = [
 
 NINJA_EXTRA = {
     "THROTTLE_CLASSES": [
-        "ninja_extra.throttling.AnonRateThrottle",
-        "ninja_extra.throttling.UserRateThrottle",
+        "nexxus.throttling.ClientIPAnonRateThrottle",
+        "nexxus.throttling.ClientIPUserRateThrottle",
     ],
     "THROTTLE_RATES": {
         "anon": "100/day",
         "user": "1000/day",
     },
+    # Ignored by the nexxus throttles, which key on request.client_ip as resolved
+    # with TRUSTED_PROXIES instead of counting X-Forwarded-For hops.
     "NUM_PROXIES": None,
 }
 
@@ -159,6 +204,162 @@ LAST_UPDATE_TIMEOUT: int = env.int("LAST_UPDATE_TIMEOUT", default=3600)
 # The maximum number of requests per minute for the legacy client.
 LEGACY_REQUESTS_PER_MINUTE: int = env.int("LEGACY_REQUESTS_PER_MINUTE", default=5)
 
+# How long, in seconds, a rendered and pre-compressed server list may be served
+# from cache. Writes that change a listed column, reachability or the set of
+# servers invalidate it immediately; heartbeats that only refresh last_update do
+# not, so this bounds how stale last_update and the LAST_UPDATE_TIMEOUT cut-off get.
+LIST_CACHE_TIMEOUT: int = env.int("LIST_CACHE_TIMEOUT", default=60)
+
+# Servers shown per page on the HTML server lists (meta_html.php and /v3/).
+SERVER_LIST_PAGE_SIZE: int = env.int("SERVER_LIST_PAGE_SIZE", default=100)
+
+# Admission control for heartbeat and server writes (per worker process).
+# Writes beyond INGEST_MAX_IN_FLIGHT wait up to INGEST_QUEUE_TIMEOUT seconds
+# in a queue of INGEST_MAX_QUEUE; the rest get 503 with Retry-After. Keep
+# INGEST_MAX_IN_FLIGHT below the worker thread count (GUNICORN_THREADS in
+# scripts/nexxus.sh) so reads always have threads left when the database is
+# slow; with single-threaded workers these limits never apply.
+# INGEST_MAX_PER_CLIENT caps the running and queued writes of one client
+# address in front of those limits; one host may run several servers, each
+# sending its own heartbeats, so it is more than one.
+INGEST_MAX_IN_FLIGHT: int = env.int("INGEST_MAX_IN_FLIGHT", default=2)
+INGEST_MAX_QUEUE: int = env.int("INGEST_MAX_QUEUE", default=4)
+INGEST_QUEUE_TIMEOUT: float = env.float("INGEST_QUEUE_TIMEOUT", default=0.5)
+INGEST_RETRY_AFTER: int = env.int("INGEST_RETRY_AFTER", default=30)
+INGEST_MAX_PER_CLIENT: int = env.int("INGEST_MAX_PER_CLIENT", default=4)
+
+# Fleet-wide aggregates behind /v3/api/stats are kept per worker and updated
+# by delta; each worker re-reads the live servers this often (seconds) to pick
+# up heartbeats handled by the other workers. Until then workers may answer
+# differently, so this bounds how far apart they can be.
+FLEET_STATS_RESYNC_INTERVAL: float = env.float("FLEET_STATS_RESYNC_INTERVAL", default=300.0)
+
+# Where heartbeats are stored and the live server lists read from (see
+# nexxus/storage.py). nexxus.storage.MemoryStorage keeps the live servers in a
+# sharded registry in each worker, writes changed servers to the database
+# every SERVER_STORAGE_PERSIST_INTERVAL seconds and re-reads the live rows
+# every SERVER_STORAGE_RESYNC_INTERVAL seconds; a crash loses at most one
+# persist interval of heartbeats. The v3 /servers endpoint reads it only with
+# ?live=true; without it the endpoint lists every row of the servers table.
+SERVER_STORAGE: str = env.str("SERVER_STORAGE", default="nexxus.storage.DatabaseStorage")
+SERVER_STORAGE_SHARDS: int = env.int("SERVER_STORAGE_SHARDS", default=16)
+SERVER_STORAGE_PERSIST_INTERVAL: float = env.float("SERVER_STORAGE_PERSIST_INTERVAL", default=5.0)
+SERVER_STORAGE_RESYNC_INTERVAL: float = env.float("SERVER_STORAGE_RESYNC_INTERVAL", default=30.0)
+SERVER_STORAGE_BACKGROUND_PERSIST: bool = env.bool("SERVER_STORAGE_BACKGROUND_PERSIST", default=True)
+
+# Server statistics history. Samples are buffered in each worker and written
+# by a background thread every HISTORY_FLUSH_INTERVAL seconds, or sooner once
+# HISTORY_BATCH_SIZE samples are waiting. `manage.py rollup_history` builds
+# the 1m/1h/1d rollups and prunes data older than its retention (None = keep).
+HISTORY_ENABLED: bool = env.bool("HISTORY_ENABLED", default=True)
+HISTORY_BACKGROUND_FLUSH: bool = env.bool("HISTORY_BACKGROUND_FLUSH", default=True)
+HISTORY_BATCH_SIZE: int = env.int("HISTORY_BATCH_SIZE", default=500)
+HISTORY_FLUSH_INTERVAL: float = env.float("HISTORY_FLUSH_INTERVAL", default=5.0)
+HISTORY_MAX_BUFFER: int = env.int("HISTORY_MAX_BUFFER", default=50_000)
+HISTORY_RETENTION_DAYS: dict[str, int | None] = {
+    "raw": 2,
+    "1m": 7,
+    "1h": 90,
+    "1d": None,
+}
+
+# Announce verification: whether a heartbeat's hostname must resolve to the
+# address it was sent from. "off", "log" (report mismatches) or "enforce"
+# (reject them with 403). Lookups run on a background asyncio loop and are
+# cached for RESOLVER_TTL seconds (RESOLVER_NEGATIVE_TTL for failures), so DNS
+# is never on the heartbeat path; unresolved hostnames are let through. A
+# timed-out lookup leaves the hostname unresolved and is retried after
+# RESOLVER_TIMEOUT_TTL seconds; at most RESOLVER_MAX_PENDING lookups are queued.
+ANNOUNCE_VERIFICATION: str = env.str("ANNOUNCE_VERIFICATION", default="log")
+RESOLVER_TTL: float = env.float("RESOLVER_TTL", default=300.0)
+RESOLVER_NEGATIVE_TTL: float = env.float("RESOLVER_NEGATIVE_TTL", default=60.0)
+RESOLVER_TIMEOUT: float = env.float("RESOLVER_TIMEOUT", default=2.0)
+RESOLVER_MAX_CONCURRENCY: int = env.int("RESOLVER_MAX_CONCURRENCY", default=16)
+RESOLVER_MAX_ENTRIES: int = env.int("RESOLVER_MAX_ENTRIES", default=10_000)
+RESOLVER_TIMEOUT_TTL: float = env.float("RESOLVER_TIMEOUT_TTL", default=5.0)
+RESOLVER_MAX_PENDING: int = env.int("RESOLVER_MAX_PENDING", default=1000)
+
+# Security checks run on incoming writes, per pipeline: "heartbeat" guards the
+# legacy meta_update.php endpoint and "api" the v3 API write routes. Each
+# pipeline runs its checks cheapest first (in-memory, then CPU-bound, then cache
+# and database backed ones) and stops at the first rejection; per-check call
+# counts, time and rejections appear in the shared stats. The v3 API takes
+# its data as JSON, so hostname checks have nothing to inspect there.
+SECURITY_PIPELINES: dict[str, list[str]] = {
+    "heartbeat": [
+        "nexxus.security.IPBlacklistCheck",
+        "nexxus.security.HostnameBlacklistCheck",
+        "nexxus.security.AnnounceVerificationCheck",
+    ],
+    "api": [
+        "nexxus.security.IPBlacklistCheck",
+    ],
+}
+
+# Signed announces (nexxus.security.HMACSignatureCheck, add it to a
+# SECURITY_PIPELINES entry to require them). Timestamps may be HMAC_MAX_SKEW
+# seconds off and nonces are remembered that long either way, in buckets of
+# HMAC_REPLAY_BUCKET_SECONDS, up to HMAC_REPLAY_MAX_NONCES per worker. With
+# HMAC_SHARED_REPLAY_CACHE they are also recorded in the Django cache so other
+# workers refuse replays too. Per-server keys are cached for HMAC_KEY_CACHE_TTL
+# seconds.
+HMAC_MAX_SKEW: int = env.int("HMAC_MAX_SKEW", default=300)
+HMAC_REPLAY_BUCKET_SECONDS: int = env.int("HMAC_REPLAY_BUCKET_SECONDS", default=30)
+HMAC_REPLAY_MAX_NONCES: int = env.int("HMAC_REPLAY_MAX_NONCES", default=100_000)
+HMAC_SHARED_REPLAY_CACHE: bool = env.bool("HMAC_SHARED_REPLAY_CACHE", default=True)
+HMAC_KEY_CACHE_TTL: float = env.float("HMAC_KEY_CACHE_TTL", default=60.0)
+HMAC_KEY_CACHE_MAX_ENTRIES: int = env.int("HMAC_KEY_CACHE_MAX_ENTRIES", default=10_000)
+
+# Reachability prober (manage.py probe_servers): TCP connects to every live
+# server, PROBE_CONCURRENCY at a time, each allowed PROBE_TIMEOUT seconds. With
+# PROBE_HANDSHAKE it also waits for the Crossfire "version" greeting. When
+# HIDE_UNREACHABLE_SERVERS is on, servers whose last probe failed are left out of
+# the server lists. Announced hostnames that resolve only to loopback, private,
+# link-local, reserved or multicast addresses are never connected to and count
+# as unreachable; PROBE_ALLOW_PRIVATE lifts that for development only.
+PROBE_CONCURRENCY: int = env.int("PROBE_CONCURRENCY", default=64)
+PROBE_TIMEOUT: float = env.float("PROBE_TIMEOUT", default=3.0)
+PROBE_HANDSHAKE: bool = env.bool("PROBE_HANDSHAKE", default=False)
+HIDE_UNREACHABLE_SERVERS: bool = env.bool("HIDE_UNREACHABLE_SERVERS", default=False)
+PROBE_ALLOW_PRIVATE: bool = env.bool("PROBE_ALLOW_PRIVATE", default=False)
+
+# Periodic jobs (nexxus/scheduler.py): name -> (function, interval in seconds).
+# Run them with "manage.py worker", or with SCHEDULER_IN_PROCESS on a thread in
+# every web worker; either way each job runs on one process at a time, which
+# holds it for up to SCHEDULER_LEASE_SECONDS. Due jobs are looked for every
+# SCHEDULER_TICK seconds. Servers silent for SERVER_RETENTION_DAYS are deleted
+# by expire_servers (None = keep them).
+SCHEDULER_JOBS: dict[str, tuple[str, float]] = {
+    "rollup_history": ("nexxus.tasks.rollup_history", env.float("ROLLUP_INTERVAL", default=60.0)),
+    "probe_servers": ("nexxus.tasks.probe_servers", env.float("PROBE_INTERVAL", default=300.0)),
+    "expire_servers": ("nexxus.tasks.expire_servers", 3600.0),
+}
+SCHEDULER_IN_PROCESS: bool = env.bool("SCHEDULER_IN_PROCESS", default=False)
+SCHEDULER_LEASE_SECONDS: float = env.float("SCHEDULER_LEASE_SECONDS", default=600.0)
+SCHEDULER_TICK: float = env.float("SCHEDULER_TICK", default=5.0)
+SERVER_RETENTION_DAYS: int | None = env.int("SERVER_RETENTION_DAYS", default=None)
+
+# Key for the v3 API routes that change the blacklist, sent as the X-API-Key
+# header. Those routes refuse every request while it is empty.
+ADMIN_API_KEY: str = env.str("ADMIN_API_KEY", default="")
+
+# Shared stats registry: request counters every gunicorn worker increments in
+# one memory-mapped file (put it on tmpfs), summed for the metrics endpoint and
+# the admin stats page. "manage.py init_stats" resets it before workers start.
+# Each worker takes one of STATS_MAX_WORKERS slots; the file holds up to
+# STATS_MAX_COUNTERS distinct counter names.
+STATS_REGISTRY_PATH: str = env.str("STATS_REGISTRY_PATH", default=str(Path(tempfile.gettempdir()) / "nexxus-stats"))
+STATS_MAX_WORKERS: int = env.int("STATS_MAX_WORKERS", default=64)
+STATS_MAX_COUNTERS: int = env.int("STATS_MAX_COUNTERS", default=256)
+
+# Proxies allowed to add X-Forwarded-For hops (CIDR networks). The client
+# address is the first hop, reading the header right to left from REMOTE_ADDR,
+# that is not one of these. The defaults match the networks traefik trusts in
+# docker/traefik/config/traefik.yml; set it to [] when nothing sits in front.
+TRUSTED_PROXIES: list[str] = env.list(
+    "TRUSTED_PROXIES", default=["127.0.0.1/32", "::1/128", "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"]
+)
+
 # Required when you're behind traefik using HTTPS
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
@@ -1,10 +1,9 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
 
 from nexxus.views import LegacyClientView, LegacyHtmlView, LegacyUpdateView
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     # Default, handles v1 and v2 metaserver
     path("", LegacyHtmlView.as_view(), name="index"),
     path("meta_client.php", LegacyClientView.as_view(), name="legacy_client"),
@@ -13,3 +12,13 @@ urlpatterns = [
     # v3 metaserver
     path("v3/", include(("nexxus.urls", "nexxus"), namespace="v3")),
 ]
+
+if settings.ENABLE_ADMIN:
+    from django.contrib import admin
+
+    from nexxus.admin import stats_view
+
+    urlpatterns += [
+        path("admin/stats/", admin.site.admin_view(stats_view), name="admin_stats"),
+        path("admin/", admin.site.urls),
+    ]
@@ -13,3 +13,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 application = get_wsgi_application()
+
+# Periodic jobs on a thread of this worker, when SCHEDULER_IN_PROCESS is on.
+from nexxus.scheduler import start_in_process  # noqa: E402
+
+start_in_process()
@@ -1,6 +1,23 @@
 from django.contrib import admin
+from django.http import HttpRequest
+from django.template.response import TemplateResponse
 
-from nexxus.models import Blacklist, Server
+from nexxus.models import Blacklist, ScheduledJob, Server, ServerKey
+from nexxus.sharedstats import shared_stats
 
 admin.site.register(Blacklist)
 admin.site.register(Server)
+admin.site.register(ServerKey)
+admin.site.register(ScheduledJob)
+
+
+def stats_view(request: HttpRequest) -> TemplateResponse:
+    """Show the shared request counters, summed and per worker process."""
+    registry = shared_stats()
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request counters",
+        "totals": sorted(registry.totals().items()),
+        "workers": sorted(registry.workers().items()),
+    }
+    return TemplateResponse(request, "admin/nexxus_stats.html", context)
@@ -0,0 +1,184 @@
+"""Admission control for write endpoints.
+
+Heartbeats are cheap to retry, list reads are not, so when the database slows
+down excess writes are shed with ``503 Service Unavailable`` and ``Retry-After``
+instead of tying up every worker thread. Limits are per process, so they only
+bite with threaded workers: ``scripts/nexxus.sh`` runs gunicorn's ``gthread``
+workers with ``GUNICORN_THREADS`` threads each, and ``INGEST_MAX_IN_FLIGHT``
+below that count keeps the remaining threads reserved for reads. In front of
+that global limit, ``INGEST_MAX_PER_CLIENT`` caps the slots and queue places one
+client address may hold, so a single noisy client cannot starve everyone else;
+it is per address, not per server, so leave room for hosts that run several
+servers on different ports.
+"""
+
+import threading
+from collections import Counter
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from functools import cache, wraps
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from nexxus.clientip import client_ip
+
+
+class AdmissionController:
+    """Cap concurrent in-flight operations, queue a few briefly and shed the rest."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+        *,
+        max_per_client: int | None = None,
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            name (str): Name reported in metrics
+            max_in_flight (int): Operations allowed to run at once
+            max_queue (int): Operations allowed to wait for a slot
+            queue_timeout (float): Seconds a queued operation waits before being shed
+            retry_after (int): Seconds clients are told to wait before retrying
+            max_per_client (int | None): Operations one client may have running or queued (default: no limit)
+
+        """
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.max_per_client = max_per_client
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._clients: Counter[Hashable] = Counter()
+        self.in_flight = 0
+        self.queued = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.shed_per_client = 0
+
+    def try_acquire(self, client: Hashable | None = None) -> bool:
+        """Take a slot for client, waiting up to queue_timeout if the queue has room; return False when shed.
+
+        A client already holding ``max_per_client`` slots or queue places is shed
+        at once, without touching the shared limit. None is not limited per client.
+        """
+        if not self._enter(client):
+            return False
+        if not self._acquire_slot():
+            self._leave(client)
+            return False
+        return True
+
+    def _enter(self, client: Hashable | None) -> bool:
+        if client is None or self.max_per_client is None:
+            return True
+        with self._lock:
+            if self._clients[client] >= self.max_per_client:
+                self.shed += 1
+                self.shed_per_client += 1
+                return False
+            self._clients[client] += 1
+        return True
+
+    def _leave(self, client: Hashable | None) -> None:
+        if client is None or self.max_per_client is None:
+            return
+        with self._lock:
+            self._clients[client] -= 1
+            if self._clients[client] <= 0:
+                del self._clients[client]
+
+    def _acquire_slot(self) -> bool:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.queued >= self.max_queue:
+                    self.shed += 1
+                    return False
+                self.queued += 1
+                self.peak_queued = max(self.peak_queued, self.queued)
+
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+
+            with self._lock:
+                self.queued -= 1
+                if not acquired:
+                    self.shed += 1
+                    return False
+
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+        return True
+
+    def release(self, client: Hashable | None = None) -> None:
+        """Return a slot taken by try_acquire for client."""
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+        self._leave(client)
+
+    @contextmanager
+    def admit(self, client: Hashable | None = None) -> Iterator[bool]:
+        """Yield whether the operation was admitted for client, releasing its slot afterwards."""
+        admitted = self.try_acquire(client)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release(client)
+
+    def overloaded_response(self) -> HttpResponse:
+        """Return the response sent to shed requests."""
+        response = HttpResponse("Service Unavailable: try again later", status=503, content_type="text/plain")
+        response["Retry-After"] = str(self.retry_after)
+        return response
+
+    def snapshot(self) -> dict[str, int]:
+        """Return the current queue depth and counters."""
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "peak_queued": self.peak_queued,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "shed_per_client": self.shed_per_client,
+                "clients": len(self._clients),
+            }
+
+
+@cache
+def ingest_controller() -> AdmissionController:
+    """Return the process-wide controller guarding heartbeat and server writes."""
+    return AdmissionController(
+        "ingest",
+        max_in_flight=settings.INGEST_MAX_IN_FLIGHT,
+        max_queue=settings.INGEST_MAX_QUEUE,
+        queue_timeout=settings.INGEST_QUEUE_TIMEOUT,
+        retry_after=settings.INGEST_RETRY_AFTER,
+        max_per_client=settings.INGEST_MAX_PER_CLIENT,
+    )
+
+
+def ingest_admission(view_func: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    """Shed the decorated view with 503/Retry-After when the ingest controller is saturated."""
+
+    @wraps(view_func)
+    def wrapper(request: HttpRequest, *args: object, **kwargs: object) -> HttpResponse:
+        controller = ingest_controller()
+        with controller.admit(client_ip(request)) as admitted:
+            if not admitted:
+                return controller.overloaded_response()
+            return view_func(request, *args, **kwargs)
+
+    return wrapper
@@ -1,15 +1,47 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
 from typing import Any
 
 from django.db.models import QuerySet
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils import timezone
 from ninja_extra import NinjaExtraAPI, api_controller, route
 
-from nexxus.models import Server
-from nexxus.schemas import ServerCreateSchema, ServerSchema
+from nexxus.admission import ingest_controller
+from nexxus.blacklist import BlacklistEntryError, bulk_load, parse_entry
+from nexxus.clientip import client_ip
+from nexxus.export import export_response, negotiate_export_format
+from nexxus.heartbeat import HeartbeatError, decode_heartbeat
+from nexxus.history import player_trend
+from nexxus.models import Blacklist, Server, ServerStatRollup
+from nexxus.permissions import HasAdminAPIKey
+from nexxus.scheduler import job_status
+from nexxus.schemas import (
+    BlacklistBulkResultSchema,
+    BlacklistBulkSchema,
+    BlacklistEntrySchema,
+    BlacklistSchema,
+    ErrorSchema,
+    FleetStatsSchema,
+    HistoryPointSchema,
+    ServerCreateSchema,
+    ServerSchema,
+)
+from nexxus.security import secured
+from nexxus.sharedstats import shared_stats
+from nexxus.stats import fleet_stats
+from nexxus.storage import SERVER_FIELDS, server_storage
 
 api = NinjaExtraAPI()
 
+# Window returned by the history endpoint when no start time is given.
+HISTORY_DEFAULT_WINDOW: dict[str, timedelta] = {
+    ServerStatRollup.Resolution.MINUTE: timedelta(hours=2),
+    ServerStatRollup.Resolution.HOUR: timedelta(days=7),
+    ServerStatRollup.Resolution.DAY: timedelta(days=365),
+}
+
 
 @api.get("")
 def index(request: HttpRequest):  # noqa: ARG001,ANN201
@@ -17,14 +49,46 @@ def index(request: HttpRequest):  # noqa: ARG001,ANN201
     return redirect("/v3/api/servers")
 
 
+@api.get("/stats", response=FleetStatsSchema)
+def stats(request: HttpRequest) -> dict[str, Any]:  # noqa: ARG001
+    """Return fleet-wide totals for the servers that are currently live, as this worker last saw them.
+
+    See nexxus.stats: workers may disagree by up to one FLEET_STATS_RESYNC_INTERVAL of writes.
+    """
+    return fleet_stats().snapshot()
+
+
+@api_controller("/metrics", permissions=[HasAdminAPIKey])
+class MetricsController:
+    """Controller for operational metrics, readable with ADMIN_API_KEY only."""
+
+    @route.get("")
+    def metrics(self) -> dict[str, Any]:
+        """Return ingest admission counters for this worker, counters summed over all workers and periodic job runs."""
+        return {"ingest": ingest_controller().snapshot(), "counters": shared_stats().totals(), "jobs": job_status()}
+
+
 @api_controller("/servers", permissions=[])
 class NexxusController:
     """Controller for managing Nexxus servers."""
 
     @route.get("", response={200: list[ServerSchema]}, permissions=[])
-    def get_servers(self, request: HttpRequest) -> QuerySet[Server]:
-        """Get a list of all servers."""
-        return Server.objects.all()
+    def get_servers(
+        self, request: HttpRequest, *, live: bool = False
+    ) -> QuerySet[Server] | Iterable[dict[str, Any]] | StreamingHttpResponse:
+        """Get a list of all servers, or with ``?live=true`` only the live ones.
+
+        Without ``live`` every listed row of the servers table is returned, as
+        before. ``?live=true`` returns the servers updated within
+        LAST_UPDATE_TIMEOUT from the SERVER_STORAGE backend, like meta_client.php.
+        Clients may ask for NDJSON, columnar JSON or a msgpack stream through
+        the Accept header instead of the default JSON array.
+        """
+        servers = server_storage().live_servers(SERVER_FIELDS) if live else Server.objects.listed()
+        export_format = negotiate_export_format(request.headers.get("Accept", ""))
+        if export_format:
+            return export_response(servers, export_format)
+        return servers
 
     @route.get("/{entry}", response={200: ServerSchema}, permissions=[])
     def get_server(self, request: HttpRequest, entry: int) -> Server:
@@ -32,20 +96,80 @@ class NexxusController:
         server = get_object_or_404(Server, entry=entry)
         return server
 
-    @route.patch("", response={201: ServerSchema}, permissions=[])
-    def create_server(self, request: HttpRequest, server: ServerCreateSchema) -> tuple[int, Any]:
-        """Create or update a server."""
-        if not server.hostname or not server.port:
-            return 400, {"message": "Hostname and port are required."}
-
-        instance, created = Server.objects.update_or_create(
-            hostname=server.hostname,
-            port=server.port,
-            defaults=server.dict(),
-        )
+    @route.get("/{entry}/history", response={200: list[HistoryPointSchema]}, permissions=[])
+    def get_server_history(
+        self,
+        request: HttpRequest,
+        entry: int,
+        resolution: ServerStatRollup.Resolution = ServerStatRollup.Resolution.HOUR,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> QuerySet[ServerStatRollup]:
+        """Get the player-count trend of a server at 1m, 1h or 1d resolution."""
+        server = get_object_or_404(Server, entry=entry)
+        since = since or timezone.now() - HISTORY_DEFAULT_WINDOW[resolution]
+        return player_trend(server.entry, resolution, since, until)
+
+    @route.patch("", response={201: ServerSchema, 400: ErrorSchema}, permissions=[])
+    @secured("api")
+    def create_server(self, request: HttpRequest, server: ServerCreateSchema) -> tuple[int, Any] | HttpResponse:
+        """Create or update a server.
+
+        The payload is validated by the heartbeat decoder alone, so the hostname
+        is normalised, strings truncated and counters clamped exactly as for
+        meta_update.php, and whatever it rejects is answered with 400.
+        """
+        try:
+            fields = decode_heartbeat({name: str(value) for name, value in server.dict().items()})
+        except HeartbeatError as error:
+            return 400, {"message": str(error)}
+        hostname = fields.pop("hostname")
+        port = fields.pop("port")
+
+        controller = ingest_controller()
+        with controller.admit(client_ip(request)) as admitted:
+            if not admitted:
+                return controller.overloaded_response()
+
+            instance, _created = server_storage().save_heartbeat(hostname, port, fields)
         return 201, instance
 
 
+@api_controller("/blacklist", permissions=[HasAdminAPIKey])
+class BlacklistController:
+    """Controller for managing blacklisted hostnames, domains, addresses and networks."""
+
+    @route.get("", response={200: list[BlacklistSchema]})
+    def list_entries(self) -> QuerySet[Blacklist]:
+        """List every blacklist entry."""
+        return Blacklist.objects.order_by("entry")
+
+    @route.post("", response={201: BlacklistSchema, 400: ErrorSchema})
+    def add_entry(self, payload: BlacklistEntrySchema) -> tuple[int, Any]:
+        """Add one entry, normalising addresses and networks."""
+        try:
+            fields = parse_entry(payload.value)
+        except BlacklistEntryError as error:
+            return 400, {"message": str(error)}
+        entry, _ = Blacklist.objects.get_or_create(**fields)
+        return 201, entry
+
+    @route.post("/bulk", response={200: BlacklistBulkResultSchema, 400: ErrorSchema})
+    def bulk_add(self, payload: BlacklistBulkSchema) -> tuple[int, dict[str, Any]]:
+        """Load many entries in one transaction; nothing is written when any entry is invalid."""
+        try:
+            created, skipped = bulk_load(payload.entries, replace=payload.replace)
+        except BlacklistEntryError as error:
+            return 400, {"message": str(error)}
+        return 200, {"created": created, "skipped": skipped}
+
+    @route.delete("/{entry}", response={204: None})
+    def delete_entry(self, entry: int) -> tuple[int, None]:
+        """Remove an entry."""
+        get_object_or_404(Blacklist, entry=entry).delete()
+        return 204, None
+
+
 # @api_controller("/meta_update.php", tags=["servers"], permissions=[])
 # class LegacyMetaUpdateController:
 #     def is_blacklisted(self, request: HttpRequest, server: ServerSchema):
@@ -77,5 +201,7 @@ class NexxusController:
 
 api.register_controllers(
     NexxusController,
+    BlacklistController,
+    MetricsController,
     # LegacyMetaUpdateController,
 )
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class NexxusConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "nexxus"
+
+    def ready(self) -> None:
+        """Connect the nexxus signal handlers and register checks, then precompile templates if enabled."""
+        from nexxus import checks, signals  # noqa: F401
+
+        if settings.TEMPLATE_PRECOMPILE:
+            from nexxus.warmup import precompile_templates
+
+            precompile_templates()
@@ -0,0 +1,271 @@
+"""Micro-benchmarks for the metaserver hot paths, run with ``manage.py benchmark``."""
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.utils.text import compress_string
+
+from nexxus.cache import bump_generation
+from nexxus.fleet import FLEET_CHUNK_SIZE, build_fleet
+from nexxus.models import Server
+
+
+@dataclass
+class BenchmarkResult:
+    """One measured variant of a benchmark."""
+
+    name: str
+    cpu_us: float
+    bytes_out: int | None = None
+
+    def __str__(self) -> str:
+        """Format the result as a table row."""
+        bytes_out = "" if self.bytes_out is None else f"{self.bytes_out:>10d} B"
+        return f"{self.name:<48s} {self.cpu_us:>12.1f} us/op {bytes_out}"
+
+
+BENCHMARKS: dict[str, Callable[[int, int], list[BenchmarkResult]]] = {}
+
+
+def benchmark(name: str) -> Callable:
+    """Register a benchmark function under name."""
+
+    def decorator(func: Callable[[int, int], list[BenchmarkResult]]) -> Callable:
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def cpu_per_call(func: Callable[[], object], iterations: int) -> float:
+    """Return the mean process CPU time of func in microseconds."""
+    func()  # warm up caches and lazy imports
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+# Swapped in for every cache while a benchmark runs, so it neither reads nor
+# disturbs the generation keys, rate limits and replay nonces of the server.
+BENCHMARK_CACHES: dict[str, dict[str, str]] = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "nexxus-benchmark"}
+}
+
+
+@contextmanager
+def seeded_servers(count: int) -> Iterator[None]:
+    """Temporarily insert count synthetic servers behind a private cache, rolling both back afterwards."""
+    with override_settings(CACHES=BENCHMARK_CACHES):
+        try:
+            with transaction.atomic():
+                Server.objects.bulk_create(build_fleet(count), batch_size=FLEET_CHUNK_SIZE)
+                bump_generation()
+                yield
+                transaction.set_rollback(True)
+        finally:
+            cache.clear()
+
+
+@benchmark("compression")
+def bench_compression(iterations: int, servers: int) -> list[BenchmarkResult]:
+    """Compare cached pre-compressed list bodies with compressing on every request."""
+    from nexxus.views import LegacyClientView, LegacyHtmlView
+
+    factory = RequestFactory()
+    results: list[BenchmarkResult] = []
+
+    with seeded_servers(servers):
+        for label, view in (
+            ("meta_client.php", LegacyClientView.as_view()),
+            ("meta_html.php", LegacyHtmlView.as_view()),
+        ):
+            identity = view(factory.get("/"))
+
+            def rebuild(view: Callable = view) -> None:
+                bump_generation()
+                view(factory.get("/", headers={"accept-encoding": "br, zstd, gzip"}))
+
+            results.append(BenchmarkResult(f"{label} cache miss (render+compress)", cpu_per_call(rebuild, iterations)))
+            results.append(
+                BenchmarkResult(
+                    f"{label} gzip per request",
+                    cpu_per_call(lambda body=identity.content: compress_string(body), iterations),
+                    len(compress_string(identity.content)),
+                )
+            )
+            for coding in ("identity", "gzip", "br", "zstd"):
+                request = factory.get("/", headers={"accept-encoding": coding})
+                response = view(request)
+                if coding != "identity" and response.get("Content-Encoding") != coding:
+                    continue
+                results.append(
+                    BenchmarkResult(
+                        f"{label} cached {coding}",
+                        cpu_per_call(lambda view=view, request=request: view(request), iterations),
+                        len(response.content),
+                    )
+                )
+
+    return results
+
+
+@benchmark("export")
+def bench_export(iterations: int, servers: int) -> list[BenchmarkResult]:
+    """Compare the v3 JSON array with the streaming export formats, producer and consumer side."""
+    import json
+
+    import msgpack
+    from django.urls import resolve
+
+    from nexxus.export import MSGPACK_CONTENT_TYPE, export_formats
+
+    factory = RequestFactory()
+    view = resolve("/v3/api/servers").func
+    results: list[BenchmarkResult] = []
+
+    with seeded_servers(servers):
+        for content_type in ("application/json", *export_formats()):
+
+            def fetch(content_type: str = content_type) -> bytes:
+                response = view(factory.get("/v3/api/servers", headers={"accept": content_type}))
+                return b"".join(response.streaming_content) if response.streaming else response.content
+
+            body = fetch()
+            results.append(BenchmarkResult(f"produce {content_type}", cpu_per_call(fetch, iterations), len(body)))
+
+            def parse(body: bytes = body, content_type: str = content_type) -> object:
+                if content_type == MSGPACK_CONTENT_TYPE:
+                    unpacker = msgpack.Unpacker(raw=False)
+                    unpacker.feed(body)
+                    return list(unpacker)
+                if content_type == "application/x-ndjson":
+                    return [json.loads(line) for line in body.splitlines()]
+                return json.loads(body)
+
+            results.append(BenchmarkResult(f"consume {content_type}", cpu_per_call(parse, iterations)))
+
+    return results
+
+
+def _legacy_heartbeat(data: QueryDict) -> dict:
+    """Decode a heartbeat the way LegacyUpdateView did before the table-driven decoder."""
+    hostname = data.get("hostname", "").strip()
+    port = data.get("port", "").strip()
+    return {
+        "hostname": hostname,
+        "port": int(port) if port.isdigit() else None,
+        "html_comment": data.get("html_comment", "").strip(),
+        "text_comment": data.get("text_comment", "").strip(),
+        "archbase": data.get("archbase", "").strip(),
+        "mapbase": data.get("mapbase", "").strip(),
+        "codebase": data.get("codebase", "").strip(),
+        "flags": data.get("flags", "").strip(),
+        "num_players": int(data.get("num_players", 0) or 0),
+        "in_bytes": int(data.get("in_bytes", 0) or 0),
+        "out_bytes": int(data.get("out_bytes", 0) or 0),
+        "uptime": int(data.get("uptime", 0) or 0),
+        "version": data.get("version", "").strip(),
+        "sc_version": data.get("sc_version", "").strip(),
+        "cs_version": data.get("cs_version", "").strip(),
+    }
+
+
+HEARTBEAT_BODY: str = (
+    "hostname=crossfire.example.org&port=13327&html_comment=%3Cb%3EWelcome%3C%2Fb%3E&text_comment=Welcome"
+    "&archbase=Standard&mapbase=Standard&codebase=Standard&flags=&num_players=12&in_bytes=123456"
+    "&out_bytes=654321&uptime=86400&version=1.75.0&sc_version=1029&cs_version=1023"
+)
+
+
+@benchmark("heartbeat")
+def bench_heartbeat(iterations: int, servers: int) -> list[BenchmarkResult]:  # noqa: ARG001
+    """Compare heartbeat decoding: previous inline parsing, the decoder table and ServerForm."""
+    from nexxus.forms import ServerForm
+    from nexxus.heartbeat import decode_heartbeat
+
+    data = QueryDict(HEARTBEAT_BODY)
+    return [
+        BenchmarkResult("inline request.POST lookups", cpu_per_call(lambda: _legacy_heartbeat(data), iterations)),
+        BenchmarkResult("decode_heartbeat", cpu_per_call(lambda: decode_heartbeat(data), iterations)),
+        BenchmarkResult("ServerForm.is_valid", cpu_per_call(lambda: ServerForm(data).is_valid(), iterations)),
+    ]
+
+
+@benchmark("validation")
+def bench_validation(iterations: int, servers: int) -> list[BenchmarkResult]:  # noqa: ARG001
+    """Compare validation throughput of ServerForm, the shared validators and the API schema."""
+    import re
+
+    from nexxus.forms import ServerForm
+    from nexxus.heartbeat import decode_heartbeat
+    from nexxus.schemas import ServerCreateSchema
+    from nexxus.validators import clean_hostname
+
+    data = QueryDict(HEARTBEAT_BODY)
+    payload = {**_legacy_heartbeat(data)}
+    hostname = payload["hostname"]
+    return [
+        BenchmarkResult(
+            "hostname re.match (uncompiled)", cpu_per_call(lambda: re.match(r"^[a-z0-9.-]+$", hostname), iterations)
+        ),
+        BenchmarkResult("hostname clean_hostname", cpu_per_call(lambda: clean_hostname(hostname), iterations)),
+        BenchmarkResult("v3 form ServerForm.is_valid", cpu_per_call(lambda: ServerForm(data).is_valid(), iterations)),
+        BenchmarkResult("v3 form decode_heartbeat", cpu_per_call(lambda: decode_heartbeat(data), iterations)),
+        BenchmarkResult(
+            "API ServerCreateSchema + decode_heartbeat",
+            cpu_per_call(
+                lambda: decode_heartbeat(
+                    {name: str(value) for name, value in ServerCreateSchema(**payload).dict().items()}
+                ),
+                iterations,
+            ),
+        ),
+    ]
+
+
+@benchmark("middleware")
+def bench_middleware(iterations: int, servers: int) -> list[BenchmarkResult]:
+    """Compare the full and slim middleware stacks on metaserver paths, end to end through the handler."""
+    from django.core.signals import request_started
+    from django.db import close_old_connections
+    from django.test.client import ClientHandler, FakePayload
+
+    factory = RequestFactory()
+    handler = ClientHandler(enforce_csrf_checks=True)
+    requests = (
+        ("GET meta_client.php", factory.get("/meta_client.php")),
+        ("POST meta_update.php", factory.post("/meta_update.php", HEARTBEAT_BODY, "application/x-www-form-urlencoded")),
+        ("GET v3/api/servers", factory.get("/v3/api/servers")),
+    )
+    results: list[BenchmarkResult] = []
+
+    def handle(request: HttpRequest) -> None:
+        environ = request.environ.copy()
+        environ["wsgi.input"] = FakePayload(request.body)
+        handler(environ)
+
+    # Like django.test.Client: keep the seeding transaction's connection open across requests.
+    request_started.disconnect(close_old_connections)
+    try:
+        with seeded_servers(servers):
+            for label, request in requests:
+                for profile, slim in (("full", False), ("slim", True)):
+                    with override_settings(SLIM_MIDDLEWARE=slim, ALLOWED_HOSTS=["testserver"]):
+                        results.append(
+                            BenchmarkResult(
+                                f"{label} {profile} middleware",
+                                cpu_per_call(lambda request=request: handle(request), iterations),
+                            )
+                        )
+    finally:
+        request_started.connect(close_old_connections)
+
+    return results
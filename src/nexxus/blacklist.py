@@ -0,0 +1,222 @@
+"""In-memory blacklist matching with interval lookups.
+
+Every worker keeps an index built from the whole ``blacklist`` table: IPv4 and
+IPv6 addresses and CIDR networks become merged integer intervals held in two
+sorted lists per family, so checking an address is one ``bisect``; hostnames are
+a set lookup per label suffix, which covers ``*.example.com`` wildcards. The
+index is rebuilt only when the blacklist generation changes, so security checks
+never query the database.
+"""
+
+import ipaddress
+import threading
+from bisect import bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cache
+from itertools import batched
+
+from django.db import transaction
+
+from nexxus.cache import BLACKLIST_GENERATION_KEY, bump_generation, get_generation
+from nexxus.models import Blacklist
+from nexxus.resolver import IPAddress, normalize_ip
+from nexxus.validators import ServerValidationError, clean_hostname
+
+WILDCARD_PREFIX: str = "*."
+
+# Rows inserted per round-trip by bulk_load().
+BULK_LOAD_BATCH_SIZE: int = 1000
+
+
+class BlacklistEntryError(ValueError):
+    """Raised when a value is not a hostname, wildcard domain, IP address or CIDR network."""
+
+
+def parse_entry(value: str) -> dict[str, str]:
+    """Classify value and return the Blacklist fields that store it.
+
+    Addresses and networks are normalised (``10.0.0.7/24`` becomes
+    ``10.0.0.0/24``, a /32 or /128 becomes a plain address); hostnames are
+    lower-cased.
+    """
+    value = value.strip()
+    if "/" in value:
+        try:
+            network = ipaddress.ip_network(value, strict=False)
+        except ValueError as error:
+            msg = f"Invalid network {value!r}"
+            raise BlacklistEntryError(msg) from error
+        if network.num_addresses > 1:
+            return {"network": str(network)}
+        value = str(network.network_address)
+
+    ip = normalize_ip(value)
+    if ip is not None:
+        return {"ip_address": str(ip)}
+
+    wildcard = value.startswith(WILDCARD_PREFIX)
+    try:
+        hostname = clean_hostname(value.removeprefix(WILDCARD_PREFIX))
+    except ServerValidationError as error:
+        msg = f"Invalid hostname {value!r}"
+        raise BlacklistEntryError(msg) from error
+    return {"hostname": WILDCARD_PREFIX + hostname if wildcard else hostname}
+
+
+class IntervalSet:
+    """Disjoint, sorted integer intervals with O(log n) membership tests."""
+
+    __slots__ = ("ends", "starts")
+
+    def __init__(self, intervals: Iterable[tuple[int, int]]) -> None:
+        """Merge overlapping and adjacent ``(first, last)`` intervals."""
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        for first, last in sorted(intervals):
+            if self.ends and first <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], last)
+            else:
+                self.starts.append(first)
+                self.ends.append(last)
+
+    def __contains__(self, value: int) -> bool:
+        """Return whether value falls inside one of the intervals."""
+        index = bisect_right(self.starts, value) - 1
+        return index >= 0 and value <= self.ends[index]
+
+    def __len__(self) -> int:
+        """Return the number of merged intervals."""
+        return len(self.starts)
+
+
+@dataclass(frozen=True, slots=True)
+class BlacklistIndex:
+    """An immutable snapshot of the blacklist, ready for matching."""
+
+    ipv4: IntervalSet
+    ipv6: IntervalSet
+    hostnames: frozenset[str]
+    domains: frozenset[str]
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple[str | None, str | None, str | None]]) -> "BlacklistIndex":
+        """Build the index from ``(hostname, ip_address, network)`` rows."""
+        intervals: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        hostnames: set[str] = set()
+        domains: set[str] = set()
+        for hostname, ip_address, network in rows:
+            if hostname:
+                name = hostname.strip().lower()
+                if name.startswith(WILDCARD_PREFIX):
+                    domains.add(name.removeprefix(WILDCARD_PREFIX))
+                else:
+                    hostnames.add(name)
+            if ip_address and (ip := normalize_ip(ip_address)) is not None:
+                intervals[ip.version].append((int(ip), int(ip)))
+            if network:
+                try:
+                    parsed = ipaddress.ip_network(network.strip(), strict=False)
+                except ValueError:
+                    continue
+                intervals[parsed.version].append((int(parsed.network_address), int(parsed.broadcast_address)))
+        return cls(IntervalSet(intervals[4]), IntervalSet(intervals[6]), frozenset(hostnames), frozenset(domains))
+
+    def blocks_ip(self, ip: IPAddress) -> bool:
+        """Return whether ip is blacklisted by an address or network entry."""
+        return int(ip) in (self.ipv4 if ip.version == 4 else self.ipv6)  # noqa: PLR2004
+
+    def blocks_hostname(self, hostname: str) -> bool:
+        """Return whether hostname, or a domain it is a subdomain of, is blacklisted."""
+        if hostname in self.hostnames:
+            return True
+        if not self.domains:
+            return False
+        labels = hostname.split(".")
+        return any(".".join(labels[start:]) in self.domains for start in range(1, len(labels)))
+
+
+class BlacklistMatcher:
+    """Hold the current BlacklistIndex of this process, rebuilding it when the blacklist changes."""
+
+    def __init__(self) -> None:
+        """Initialize the matcher; the index is built on first use."""
+        self._lock = threading.Lock()
+        self._index: BlacklistIndex | None = None
+        self._generation: int | None = None
+
+    def current(self) -> BlacklistIndex:
+        """Return the index for the current blacklist generation."""
+        generation = get_generation(BLACKLIST_GENERATION_KEY)
+        index = self._index
+        if index is not None and generation == self._generation:
+            return index
+        with self._lock:
+            if self._index is None or generation != self._generation:
+                rows = Blacklist.objects.values_list("hostname", "ip_address", "network")
+                self._index = BlacklistIndex.build(rows.iterator(chunk_size=BULK_LOAD_BATCH_SIZE))
+                self._generation = generation
+            return self._index
+
+    def blocks_ip(self, ip: IPAddress | None) -> bool:
+        """Return whether the address is blacklisted; an unknown address is not."""
+        return ip is not None and self.current().blocks_ip(ip)
+
+    def blocks_hostname(self, hostname: str) -> bool:
+        """Return whether the normalised hostname is blacklisted."""
+        return bool(hostname) and self.current().blocks_hostname(hostname)
+
+    def reset(self) -> None:
+        """Forget the index so the next check rebuilds it."""
+        with self._lock:
+            self._index = None
+            self._generation = None
+
+
+@cache
+def blacklist_matcher() -> BlacklistMatcher:
+    """Return the process-wide blacklist matcher."""
+    return BlacklistMatcher()
+
+
+def invalidate_blacklist() -> None:
+    """Make every worker rebuild its blacklist index on its next check."""
+    bump_generation(BLACKLIST_GENERATION_KEY)
+
+
+def bulk_load(values: Iterable[str], *, replace: bool = False) -> tuple[int, int]:
+    """Parse and insert blacklist entries, skipping ones already present; return ``(created, skipped)``.
+
+    Every value is validated before anything is written, and the load runs in
+    one transaction. With replace, the existing blacklist is deleted first.
+    Entries already in the table are left to the ``blacklist_unique_entry``
+    constraint, so the table is never read into memory.
+
+    Raises:
+        BlacklistEntryError: When any value is invalid; the message lists all of them.
+
+    """
+    parsed: dict[tuple[str, str], None] = {}
+    errors: list[str] = []
+    for value in values:
+        try:
+            ((field, normalized),) = parse_entry(value).items()
+        except BlacklistEntryError as error:
+            errors.append(str(error))
+            continue
+        parsed[field, normalized] = None
+    if errors:
+        raise BlacklistEntryError("; ".join(errors))
+
+    with transaction.atomic():
+        if replace:
+            Blacklist.objects.all().delete()
+        before = Blacklist.objects.count()
+        rows = (Blacklist(**{field: value}) for field, value in parsed)
+        for batch in batched(rows, BULK_LOAD_BATCH_SIZE, strict=False):
+            Blacklist.objects.bulk_create(batch, ignore_conflicts=True)
+        created = Blacklist.objects.count() - before
+
+    # bulk_create sends no signals.
+    invalidate_blacklist()
+    return created, len(parsed) - created
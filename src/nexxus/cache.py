@@ -0,0 +1,26 @@
+from django.core.cache import cache
+
+# Bumped on every write to the servers table so cached list bodies can be
+# keyed by the data they were rendered from instead of expiring blindly.
+GENERATION_KEY: str = "nexxus:generation"
+# Bumped on every write to the blacklist table so each worker rebuilds its
+# in-memory blacklist index.
+BLACKLIST_GENERATION_KEY: str = "nexxus:blacklist:generation"
+
+
+def get_generation(key: str = GENERATION_KEY) -> int:
+    """Return the current data generation of the servers table, or of the table key tracks."""
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, timeout=None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+def bump_generation(key: str = GENERATION_KEY) -> int:
+    """Advance the data generation, invalidating everything derived from the previous one."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 2, timeout=None)
+        return cache.get(key, 2)
@@ -0,0 +1,36 @@
+"""System checks run by ``manage.py check --deploy``."""
+
+from django.conf import settings
+from django.core.checks import CheckMessage, Error, Tags, register
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+
+from nexxus.warmup import cached_loader, precompile_templates, template_names
+
+
+@register(Tags.templates, deploy=True)
+def check_template_cache(**kwargs: object) -> list[CheckMessage]:  # noqa: ARG001
+    """Fail the deploy if any template would be read and parsed from disk at request time."""
+    loader = cached_loader()
+    if not settings.TEMPLATE_CACHE or loader is None:
+        return [
+            Error(
+                "Templates are not served by the cached template loader.",
+                hint="Set TEMPLATE_CACHE=true (the default when DEBUG is off).",
+                id="nexxus.E001",
+            )
+        ]
+
+    try:
+        precompile_templates()
+    except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+        return [Error(f"Template failed to compile: {error}", id="nexxus.E002")]
+
+    return [
+        Error(
+            f"Template {name!r} is not held by the cached template loader.",
+            hint="Check that TEMPLATES has no loader ahead of the cached loader.",
+            id="nexxus.E003",
+        )
+        for name in template_names()
+        if name not in loader.get_template_cache
+    ]
@@ -0,0 +1,73 @@
+"""Resolve the real client address of a request once, honouring trusted proxies.
+
+``X-Forwarded-For`` is only believed as far as it was written by proxies we
+trust. Starting from ``REMOTE_ADDR``, hops are taken from the right end of the
+header for as long as the current hop is a proxy on ``TRUSTED_PROXIES``; the
+first address that is not a trusted proxy is the client. A client can prepend
+anything it likes to the header, so the leftmost entry is never trusted on its
+own.
+
+``ClientIPMiddleware`` stores the result on ``request.client_ip`` as an
+``ipaddress`` object; security checks and throttles read it through
+``client_ip()``.
+"""
+
+import ipaddress
+from collections.abc import Callable
+from functools import cache
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from nexxus.resolver import IPAddress, normalize_ip
+
+IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+@cache
+def trusted_proxies() -> tuple[IPNetwork, ...]:
+    """Return the parsed TRUSTED_PROXIES networks."""
+    return tuple(ipaddress.ip_network(network, strict=False) for network in settings.TRUSTED_PROXIES)
+
+
+def is_trusted_proxy(ip: IPAddress) -> bool:
+    """Return whether ip belongs to a trusted proxy."""
+    return any(ip in network for network in trusted_proxies())
+
+
+def resolve_client_ip(remote_addr: str | None, forwarded_for: str | None) -> IPAddress | None:
+    """Return the client address from REMOTE_ADDR and X-Forwarded-For, or None when REMOTE_ADDR is not an IP."""
+    ip = normalize_ip(remote_addr or "")
+    if ip is None or not forwarded_for:
+        return ip
+    for hop in reversed(forwarded_for.split(",")):
+        if not is_trusted_proxy(ip):
+            break
+        forwarded = normalize_ip(hop.strip())
+        if forwarded is None:
+            # Garbage in the header: the last proxy that wrote a valid hop is as far as we can see.
+            break
+        ip = forwarded
+    return ip
+
+
+def client_ip(request: HttpRequest) -> IPAddress | None:
+    """Return the client address of request, resolving and caching it when the middleware has not run."""
+    try:
+        return request.client_ip
+    except AttributeError:
+        request.client_ip = resolve_client_ip(request.META.get("REMOTE_ADDR"), request.META.get("HTTP_X_FORWARDED_FOR"))
+        return request.client_ip
+
+
+class ClientIPMiddleware:
+    """Resolve the client address once per request and store it as ``request.client_ip``."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """Initialize the middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Set request.client_ip and carry on."""
+        request.client_ip = resolve_client_ip(request.META.get("REMOTE_ADDR"), request.META.get("HTTP_X_FORWARDED_FOR"))
+        return self.get_response(request)
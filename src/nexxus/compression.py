@@ -0,0 +1,131 @@
+import gzip
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from functools import cache
+
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli ships with whitenoise[brotli]
+    brotli = None
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+# Bodies smaller than this are not worth the Content-Encoding header.
+MIN_COMPRESS_SIZE: int = 200
+
+# Variants are built on the request path, once per data generation, so these
+# are the fast on-the-fly levels rather than the slow maximum-ratio ones.
+GZIP_LEVEL: int = 6
+BROTLI_QUALITY: int = 5
+ZSTD_LEVEL: int = 3
+
+
+def _compress_zstd(data: bytes) -> bytes:
+    """Compress data with whichever zstd binding is installed."""
+    if hasattr(zstd, "ZstdCompressor"):
+        return zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return zstd.compress(data, level=ZSTD_LEVEL)
+
+
+@cache
+def available_codings() -> dict[str, Callable[[bytes], bytes]]:
+    """Return the content codings this process can produce, in server preference order."""
+    codings: dict[str, Callable[[bytes], bytes]] = {}
+    if brotli is not None:
+        codings["br"] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+    if zstd is not None:
+        codings["zstd"] = _compress_zstd
+    codings["gzip"] = lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return codings
+
+
+def parse_qvalue_header(header: str) -> dict[str, float]:
+    """Parse an Accept or Accept-Encoding style header into a mapping of token to q-value."""
+    accepted: dict[str, float] = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+@dataclass(frozen=True)
+class PrecompressedBody:
+    """A rendered response body stored alongside the compressed variants built so far.
+
+    A variant is compressed the first time a request negotiates its coding, so
+    a body only plain clients fetch is never compressed at all.
+    """
+
+    content: bytes
+    content_type: str
+    # Compressed variants by coding; None marks a coding that did not make the body smaller.
+    encoded: dict[str, bytes | None] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, content: bytes, content_type: str, codings: Iterable[str] | None = None) -> "PrecompressedBody":
+        """Return a body with the variants for codings (default: every available one) compressed up front."""
+        body = cls(content=content, content_type=content_type)
+        for coding in available_codings() if codings is None else codings:
+            body.encode(coding)
+        return body
+
+    @property
+    def compressible(self) -> bool:
+        """Whether the body is large enough to be served compressed."""
+        return len(self.content) >= MIN_COMPRESS_SIZE
+
+    def encode(self, coding: str) -> bytes | None:
+        """Return the variant for coding, compressing it on first use, or None when it would not be smaller."""
+        if not self.compressible:
+            return None
+        if coding not in self.encoded:
+            variant = available_codings()[coding](self.content)
+            self.encoded[coding] = variant if len(variant) < len(self.content) else None
+        return self.encoded[coding]
+
+    def negotiate(self, accept_encoding: str) -> tuple[str | None, bytes]:
+        """Pick the best variant for an Accept-Encoding header, building it if needed."""
+        if not self.compressible or not accept_encoding:
+            return None, self.content
+
+        accepted = parse_qvalue_header(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        # sorted() is stable, so equal q-values keep the server preference order.
+        ranked = sorted(available_codings(), key=lambda coding: accepted.get(coding, wildcard), reverse=True)
+        for coding in ranked:
+            if accepted.get(coding, wildcard) <= 0:
+                break
+            variant = self.encode(coding)
+            if variant is not None:
+                return coding, variant
+        return None, self.content
+
+    def to_response(self, request: HttpRequest, status: int = 200) -> HttpResponse:
+        """Build an HttpResponse serving the variant negotiated for the request."""
+        coding, body = self.negotiate(request.headers.get("Accept-Encoding", ""))
+        response = HttpResponse(body, status=status, content_type=self.content_type)
+        if coding is not None:
+            response["Content-Encoding"] = coding
+        if self.compressible:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
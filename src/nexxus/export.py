@@ -0,0 +1,98 @@
+"""Streaming export formats for the v3 server list, negotiated through the Accept header."""
+
+import json
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Any
+
+import msgpack
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+from nexxus.compression import parse_qvalue_header
+from nexxus.storage import SERVER_FIELDS
+
+NDJSON_CONTENT_TYPE: str = "application/x-ndjson"
+COLUMNAR_JSON_CONTENT_TYPE: str = "application/vnd.nexxus.columnar+json"
+MSGPACK_CONTENT_TYPE: str = "application/msgpack"
+
+# Rows fetched from the database per round-trip while streaming.
+EXPORT_CHUNK_SIZE: int = 2000
+
+# Rows are SERVER_FIELDS dicts, in the same field order as ServerSchema, so
+# every format describes identical rows.
+ServerRows = Iterable[dict[str, Any]]
+
+_encoder = DjangoJSONEncoder(separators=(",", ":"))
+
+
+def export_formats() -> tuple[str, ...]:
+    """Return the export content types this process can produce."""
+    return (NDJSON_CONTENT_TYPE, COLUMNAR_JSON_CONTENT_TYPE, MSGPACK_CONTENT_TYPE)
+
+
+def negotiate_export_format(accept: str) -> str | None:
+    """Return the streaming export format requested by an Accept header, or None for the default JSON array."""
+    if not accept:
+        return None
+
+    accepted = parse_qvalue_header(accept)
+    best: str | None = None
+    best_quality = accepted.get("application/json", 0.0)
+    for content_type in export_formats():
+        quality = accepted.get(content_type, 0.0)
+        if quality > best_quality:
+            best, best_quality = content_type, quality
+    return best
+
+
+def _rows(servers: ServerRows) -> Iterator[tuple]:
+    """Yield value tuples in SERVER_FIELDS order; querysets are read in chunks without building model instances."""
+    if isinstance(servers, QuerySet):
+        return servers.values_list(*SERVER_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return (tuple(server[name] for name in SERVER_FIELDS) for server in servers)
+
+
+def iter_ndjson(servers: ServerRows) -> Iterator[bytes]:
+    """Yield one JSON object per server, newline terminated."""
+    for row in _rows(servers):
+        yield _encoder.encode(dict(zip(SERVER_FIELDS, row, strict=True))).encode() + b"\n"
+
+
+def iter_columnar_json(servers: ServerRows) -> Iterator[bytes]:
+    """Yield a ``{"fields": [...], "rows": [[...], ...]}`` document, one row per chunk."""
+    yield b'{"fields":' + json.dumps(SERVER_FIELDS, separators=(",", ":")).encode() + b',"rows":['
+    separator = b""
+    for row in _rows(servers):
+        yield separator + _encoder.encode(row).encode()
+        separator = b","
+    yield b"]}"
+
+
+def _msgpack_value(value: object) -> object:
+    """Convert values msgpack cannot encode natively, datetimes exactly as the JSON formats write them."""
+    return _encoder.default(value) if isinstance(value, datetime) else value
+
+
+def iter_msgpack(servers: ServerRows) -> Iterator[bytes]:
+    """Yield a msgpack stream: the field names array followed by one array per server."""
+    packer = msgpack.Packer()
+    yield packer.pack(list(SERVER_FIELDS))
+    for row in _rows(servers):
+        yield packer.pack([_msgpack_value(value) for value in row])
+
+
+_WRITERS = {
+    NDJSON_CONTENT_TYPE: iter_ndjson,
+    COLUMNAR_JSON_CONTENT_TYPE: iter_columnar_json,
+    MSGPACK_CONTENT_TYPE: iter_msgpack,
+}
+
+
+def export_response(servers: ServerRows, content_type: str) -> StreamingHttpResponse:
+    """Stream the servers in the given export format."""
+    stream: Iterable[bytes] = _WRITERS[content_type](servers)
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response["Vary"] = "Accept"
+    return response
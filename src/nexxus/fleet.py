@@ -0,0 +1,120 @@
+"""Deterministic synthetic server fleets for performance testing.
+
+Random values are drawn for a whole chunk at once from one seeded
+``random.Random`` (``choices(k=...)`` over small pools of words, comments and
+versions) instead of calling Faker per attribute, and rows are inserted with
+one ``bulk_create`` per chunk. The same seed always yields the same fleet.
+"""
+
+import random
+from collections.abc import Iterator
+from datetime import timedelta
+from itertools import batched
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from nexxus.cache import bump_generation
+from nexxus.models import Server
+from nexxus.stats import fleet_stats
+from nexxus.transfer import bulk_create_as_given, delete_all
+
+# Rows built and inserted per round-trip.
+FLEET_CHUNK_SIZE: int = 2000
+
+WORDS: tuple[str, ...] = (
+    "amber", "basalt", "cinder", "dragon", "ember", "frost", "garnet", "harbor", "iron", "jade",
+    "kestrel", "lantern", "marble", "nether", "onyx", "pyre", "quartz", "raven", "sable", "thorn",
+    "umber", "vale", "wyvern", "xenon", "yew", "zephyr",
+)  # fmt: skip
+DOMAINS: tuple[str, ...] = ("example.org", "example.net", "example.com", "crossfire.example")
+BASES: tuple[str, ...] = ("Standard", "Classic", "Experimental", "Custom")
+VERSIONS: tuple[str, ...] = ("1.71.0", "1.73.0", "1.74.0", "1.75.0", "1.80.0")
+SC_VERSIONS: tuple[str, ...] = ("1027", "1028", "1029")
+CS_VERSIONS: tuple[str, ...] = ("1021", "1022", "1023")
+FLAGS: tuple[str, ...] = ("", "pvp", "hardcore", "pvp,hardcore")
+
+
+def comment_pool(rng: random.Random, size: int, words: int) -> list[str]:
+    """Return size comments of about words words each."""
+    return [" ".join(rng.choices(WORDS, k=words)).capitalize() + "." for _ in range(size)]
+
+
+def build_fleet(count: int, seed: int = 0, live_fraction: float = 1.0, start: int = 0) -> Iterator[Server]:
+    """Yield count unsaved servers, numbered from start, with reproducible attributes.
+
+    ``live_fraction`` of them have a ``last_update`` within
+    ``LAST_UPDATE_TIMEOUT``; the rest are stale and hidden from the lists.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    text_comments = comment_pool(rng, 64, 12)
+    html_comments = [f"<b>{comment}</b>" for comment in comment_pool(rng, 64, 40)]
+    now = timezone.now()
+    timeout = settings.LAST_UPDATE_TIMEOUT
+
+    for chunk in batched(range(start, start + count), FLEET_CHUNK_SIZE, strict=False):
+        k = len(chunk)
+        words = rng.choices(WORDS, k=k)
+        domains = rng.choices(DOMAINS, k=k)
+        ports = rng.choices(range(1024, 65536), k=k)
+        texts = rng.choices(text_comments, k=k)
+        htmls = rng.choices(html_comments, k=k)
+        bases = rng.choices(BASES, k=3 * k)
+        versions = rng.choices(VERSIONS, k=k)
+        sc_versions = rng.choices(SC_VERSIONS, k=k)
+        cs_versions = rng.choices(CS_VERSIONS, k=k)
+        flags = rng.choices(FLAGS, k=k)
+        players = rng.choices(range(100), k=k)
+        traffic = rng.choices(range(1_000_000), k=3 * k)
+        ages = [
+            rng.uniform(0, timeout) if rng.random() < live_fraction else rng.uniform(timeout + 1, 30 * 86400)
+            for _ in range(k)
+        ]
+        for i, index in enumerate(chunk):
+            yield Server(
+                hostname=f"{words[i]}-{index}.{domains[i]}",
+                port=ports[i],
+                html_comment=htmls[i],
+                text_comment=texts[i],
+                archbase=bases[3 * i],
+                mapbase=bases[3 * i + 1],
+                codebase=bases[3 * i + 2],
+                flags=flags[i],
+                num_players=players[i],
+                in_bytes=traffic[3 * i],
+                out_bytes=traffic[3 * i + 1],
+                uptime=traffic[3 * i + 2],
+                version=versions[i],
+                sc_version=sc_versions[i],
+                cs_version=cs_versions[i],
+                last_update=now - timedelta(seconds=ages[i]),
+            )
+
+
+def generate_fleet(
+    count: int,
+    seed: int = 0,
+    live_fraction: float = 1.0,
+    chunk_size: int = FLEET_CHUNK_SIZE,
+    *,
+    replace: bool = False,
+) -> Iterator[int]:
+    """Insert a synthetic fleet, yielding the running row count after each chunk.
+
+    Numbering continues after the existing rows so repeated runs add distinct
+    hostnames. With replace, existing servers are deleted first.
+    """
+    with transaction.atomic():
+        if replace:
+            delete_all(Server)
+        start = Server.objects.count()
+        inserted = 0
+        for chunk in batched(build_fleet(count, seed, live_fraction, start), chunk_size, strict=False):
+            bulk_create_as_given(Server, chunk, chunk_size)
+            inserted += len(chunk)
+            yield inserted
+
+    # bulk_create sends no signals: refresh the list caches and fleet aggregates here.
+    bump_generation()
+    fleet_stats().reset()
@@ -1,12 +1,9 @@
-import re
 from typing import ClassVar
 
 from django import forms
 
 from nexxus.models import Server
-
-MIN_PORT: int = 1
-MAX_PORT: int = 65535
+from nexxus.validators import ServerValidationError, clean_hostname, clean_port
 
 
 class ServerForm(forms.ModelForm):
@@ -36,29 +33,14 @@ class ServerForm(forms.ModelForm):
 
     def clean_hostname(self) -> str:
         """Validate and clean the hostname field."""
-        hostname = self.cleaned_data.get("hostname", "")
-
-        if not hostname:
-            error_msg = "Invalid hostname."
-            raise forms.ValidationError(error_msg)
-
-        hostname = hostname.strip().lower()
-
-        if not re.match(r"^[a-z0-9.-]+$", hostname):
-            error_msg = "Invalid hostname format."
-            raise forms.ValidationError(error_msg)
-
-        return hostname
+        try:
+            return clean_hostname(self.cleaned_data.get("hostname", ""))
+        except ServerValidationError as error:
+            raise forms.ValidationError(str(error)) from error
 
     def clean_port(self) -> int:
         """Validate and clean the port field."""
-        port = self.cleaned_data.get("port")
-
-        if port is None:
-            error_msg = "Port is required."
-            raise forms.ValidationError(error_msg)
-        if not (MIN_PORT <= port <= MAX_PORT):
-            error_msg = f"Port must be between {MIN_PORT} and {MAX_PORT}."
-            raise forms.ValidationError(error_msg)
-
-        return port
+        try:
+            return clean_port(self.cleaned_data.get("port"))
+        except ServerValidationError as error:
+            raise forms.ValidationError(str(error)) from error
@@ -0,0 +1,113 @@
+"""Liveness and readiness probes answered ahead of the middleware stack.
+
+Orchestrator probes arrive every few seconds from every node, so they are
+answered by the first middleware, before sessions, CSRF or auth run. The
+readiness result is cached per process for ``READINESS_CACHE_SECONDS``, so
+however often probes arrive, each worker checks the database and cache at
+most once per interval.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Callable
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+READINESS_CACHE_KEY: str = "nexxus:readiness"
+
+
+def check_database() -> None:
+    """Run a trivial query on the default database."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def check_cache() -> None:
+    """Round-trip a value through the default cache."""
+    django_cache.set(READINESS_CACHE_KEY, 1, timeout=60)
+    if django_cache.get(READINESS_CACHE_KEY) != 1:
+        msg = "cache did not return the value just written"
+        raise RuntimeError(msg)
+
+
+class ReadinessProbe:
+    """Run the readiness checks, caching the combined result for a few seconds."""
+
+    def __init__(self, checks: dict[str, Callable[[], None]], interval: float) -> None:
+        """Initialize the probe.
+
+        Args:
+            checks (dict[str, Callable[[], None]]): Named checks that raise when a dependency is unavailable
+            interval (float): Seconds a result is reused before the checks run again
+
+        """
+        self.checks = checks
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._checked_at: float | None = None
+        self._results: dict[str, str] = {}
+
+    def results(self) -> dict[str, str]:
+        """Return ``{"name": "ok" | error}`` for every check, re-running them when the cached result expired."""
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.interval:
+                self._results = {name: self._run(check) for name, check in self.checks.items()}
+                self._checked_at = now
+            return dict(self._results)
+
+    @staticmethod
+    def _run(check: Callable[[], None]) -> str:
+        try:
+            check()
+        except Exception as error:  # noqa: BLE001
+            return f"{type(error).__name__}: {error}"
+        return "ok"
+
+    def reset(self) -> None:
+        """Forget the cached result."""
+        with self._lock:
+            self._checked_at = None
+
+
+@cache
+def readiness_probe() -> ReadinessProbe:
+    """Return the process-wide readiness probe."""
+    return ReadinessProbe({"database": check_database, "cache": check_cache}, settings.READINESS_CACHE_SECONDS)
+
+
+class HealthCheckMiddleware:
+    """Answer liveness and readiness probes before any other middleware runs."""
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        """Initialize the middleware."""
+        self.get_response = get_response
+        self.health_path = settings.HEALTH_CHECK_PATH
+        self.readiness_path = settings.READINESS_CHECK_PATH
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Short-circuit probe paths; pass every other request on."""
+        if request.path == self.health_path:
+            return HttpResponse(b"OK", content_type="text/plain")
+        if request.path == self.readiness_path:
+            return self.readiness_response()
+        return self.get_response(request)
+
+    @staticmethod
+    def readiness_response() -> HttpResponse:
+        """Return 200 when every dependency is available, 503 with the failing checks otherwise."""
+        results = readiness_probe().results()
+        ready = all(result == "ok" for result in results.values())
+        response = HttpResponse(
+            json.dumps({"ready": ready, "checks": results}),
+            status=200 if ready else 503,
+            content_type="application/json",
+        )
+        response["Cache-Control"] = "no-store"
+        return response
@@ -0,0 +1,118 @@
+"""Single-pass decoder for legacy ``meta_update.php`` heartbeats."""
+
+import sys
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from functools import cache
+
+from django.db import connection, models
+
+from nexxus.models import Server
+from nexxus.validators import MAX_PORT, MIN_PORT, ServerValidationError, clean_hostname
+
+REQUIRED_FIELDS: frozenset[str] = frozenset({"hostname", "port"})
+
+
+class HeartbeatError(ServerValidationError):
+    """Raised when a heartbeat cannot be decoded; the message is returned to the client."""
+
+
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """How one heartbeat field is parsed, derived from the matching Server model field."""
+
+    name: str
+    is_int: bool
+    required: bool = False
+    max_length: int | None = None
+    min_value: int = 0
+    max_value: int = sys.maxsize
+    clamp: bool = True
+    clean: Callable[[str], str] | None = None
+
+
+@cache
+def heartbeat_fields() -> tuple[FieldSpec, ...]:
+    """Return the decode table for every client-settable Server field."""
+    specs: list[FieldSpec] = []
+    for field in Server._meta.concrete_fields:  # noqa: SLF001
+        if field.primary_key or not field.editable:
+            continue
+        required = field.name in REQUIRED_FIELDS
+        if field.name == "port":
+            specs.append(
+                FieldSpec("port", is_int=True, required=True, min_value=MIN_PORT, max_value=MAX_PORT, clamp=False)
+            )
+        elif isinstance(field, models.IntegerField):
+            min_value, max_value = connection.ops.integer_field_range(field.get_internal_type())
+            min_value = 0 if min_value is None else max(min_value, 0)
+            max_value = sys.maxsize if max_value is None else max_value
+            specs.append(
+                FieldSpec(field.name, is_int=True, required=required, min_value=min_value, max_value=max_value)
+            )
+        elif field.name == "hostname":
+            specs.append(
+                FieldSpec("hostname", is_int=False, required=True, max_length=field.max_length, clean=clean_hostname)
+            )
+        else:
+            specs.append(FieldSpec(field.name, is_int=False, required=required, max_length=field.max_length))
+    return tuple(specs)
+
+
+def _invalid(spec: FieldSpec) -> HeartbeatError:
+    return HeartbeatError(f"Invalid {spec.name} value")
+
+
+def decode_missing(spec: FieldSpec) -> str | int:
+    """Return the value of an absent or blank field: 0 or "", or raise for a required one."""
+    if spec.required:
+        msg = "Missing required fields hostname and/or port"
+        raise HeartbeatError(msg)
+    return 0 if spec.is_int else ""
+
+
+def decode_string(spec: FieldSpec, value: str) -> str:
+    """Run the field's clean hook and truncate to max_length; an over-long required field is rejected."""
+    if spec.required and spec.max_length and len(value) > spec.max_length:
+        # Truncating a key field would silently merge distinct servers.
+        raise _invalid(spec)
+    if spec.clean is not None:
+        try:
+            value = spec.clean(value)
+        except ServerValidationError as error:
+            raise HeartbeatError(str(error)) from error
+    return value[: spec.max_length]
+
+
+def decode_int(spec: FieldSpec, value: str) -> int:
+    """Parse a non-negative integer and clamp it to the column range, or reject it when clamp is off."""
+    if not (value.isascii() and value.isdigit()):
+        raise _invalid(spec)
+    number = int(value)
+    if not spec.min_value <= number <= spec.max_value:
+        if not spec.clamp:
+            raise _invalid(spec)
+        number = min(max(number, spec.min_value), spec.max_value)
+    return number
+
+
+def decode_heartbeat(data: Mapping[str, str]) -> dict[str, str | int]:
+    """Parse, truncate and coerce a heartbeat in one pass over the field table.
+
+    Strings are stripped and truncated to the model's ``max_length``, counters
+    default to 0 and are clamped to the column range, and fields with a
+    ``clean`` hook (the hostname) go through the shared validators. A missing,
+    over-long or malformed ``hostname``, a missing or out-of-range ``port`` and
+    non-numeric numbers raise :class:`HeartbeatError`.
+    """
+    get = data.get
+    decoded: dict[str, str | int] = {}
+    for spec in heartbeat_fields():
+        value = (get(spec.name) or "").strip()
+        if not value:
+            decoded[spec.name] = decode_missing(spec)
+        elif spec.is_int:
+            decoded[spec.name] = decode_int(spec, value)
+        else:
+            decoded[spec.name] = decode_string(spec, value)
+    return decoded
@@ -0,0 +1,272 @@
+"""Time-series history of server statistics.
+
+Every saved heartbeat appends a sample to an in-process buffer; a background
+thread writes the buffer to ``server_stats`` with one ``bulk_create`` per
+batch, so recording history never adds a database round-trip to the request.
+``rollup()`` downsamples raw samples into 1 minute buckets, 1 minute buckets
+into 1 hour buckets and 1 hour buckets into 1 day buckets.
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Min, QuerySet, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+from nexxus.models import Server, ServerStat, ServerStatRollup
+
+logger = logging.getLogger(__name__)
+
+Resolution = ServerStatRollup.Resolution
+
+# Bucket width, truncation function and the finer resolution each level is built from.
+RESOLUTIONS: dict[str, tuple[timedelta, type, str | None]] = {
+    Resolution.MINUTE: (timedelta(minutes=1), TruncMinute, None),
+    Resolution.HOUR: (timedelta(hours=1), TruncHour, Resolution.MINUTE),
+    Resolution.DAY: (timedelta(days=1), TruncDay, Resolution.HOUR),
+}
+
+ROLLUP_FIELDS: tuple[str, ...] = (
+    "samples",
+    "players_sum",
+    "players_min",
+    "players_max",
+    "in_bytes",
+    "out_bytes",
+    "uptime",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Sample:
+    """One buffered statistics sample."""
+
+    server_id: int
+    timestamp: datetime
+    num_players: int
+    in_bytes: int
+    out_bytes: int
+    uptime: int
+
+
+class HistoryBuffer:
+    """Thread-safe append buffer flushed to the database in batches."""
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int) -> None:
+        """Initialize the buffer.
+
+        Args:
+            batch_size (int): Samples that trigger an early flush
+            flush_interval (float): Seconds between background flushes
+            max_buffer (int): Samples kept while the database is unavailable; older ones are dropped
+
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._samples: deque[Sample] = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        """Return the number of buffered samples."""
+        return len(self._samples)
+
+    def append(self, sample: Sample) -> None:
+        """Buffer a sample; never touches the database."""
+        with self._lock:
+            self._samples.append(sample)
+            full = len(self._samples) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def drain(self) -> list[Sample]:
+        """Remove and return every buffered sample."""
+        with self._lock:
+            samples = list(self._samples)
+            self._samples.clear()
+        return samples
+
+    def flush(self) -> int:
+        """Write buffered samples with one bulk insert per batch and return how many were written."""
+        samples = self.drain()
+        if samples:
+            ServerStat.objects.bulk_create(
+                (
+                    ServerStat(
+                        server_id=sample.server_id,
+                        timestamp=sample.timestamp,
+                        num_players=sample.num_players,
+                        in_bytes=sample.in_bytes,
+                        out_bytes=sample.out_bytes,
+                        uptime=sample.uptime,
+                    )
+                    for sample in samples
+                ),
+                batch_size=self.batch_size,
+            )
+        return len(samples)
+
+    def start(self) -> None:
+        """Start the background flusher for this process if it is not running yet."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="nexxus-history", daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_safely)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush_safely()
+
+    def _flush_safely(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush server history")
+        finally:
+            connection.close()
+
+
+@cache
+def history_buffer() -> HistoryBuffer:
+    """Return the process-wide history buffer."""
+    return HistoryBuffer(
+        batch_size=settings.HISTORY_BATCH_SIZE,
+        flush_interval=settings.HISTORY_FLUSH_INTERVAL,
+        max_buffer=settings.HISTORY_MAX_BUFFER,
+    )
+
+
+def record_sample(server: Server) -> None:
+    """Buffer the statistics carried by a freshly saved server row."""
+    if not settings.HISTORY_ENABLED:
+        return
+
+    buffer = history_buffer()
+    buffer.append(
+        Sample(
+            server_id=server.entry,
+            timestamp=server.last_update or timezone.now(),
+            num_players=server.num_players or 0,
+            in_bytes=server.in_bytes or 0,
+            out_bytes=server.out_bytes or 0,
+            uptime=server.uptime or 0,
+        )
+    )
+    if settings.HISTORY_BACKGROUND_FLUSH:
+        buffer.start()
+
+
+def bucket_start(resolution: str, moment: datetime) -> datetime:
+    """Return the start of the bucket containing moment, in the current time zone."""
+    moment = timezone.localtime(moment)
+    if resolution == Resolution.MINUTE:
+        return moment.replace(second=0, microsecond=0)
+    if resolution == Resolution.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup(resolution: str, since: datetime) -> int:
+    """Recompute every bucket of resolution from since onwards and return how many were written."""
+    _width, trunc, source = RESOLUTIONS[resolution]
+    since = bucket_start(resolution, since)
+
+    if source is None:
+        rows = (
+            ServerStat.objects.filter(timestamp__gte=since)
+            .annotate(period=trunc("timestamp"))
+            .values("server_id", "period")
+            .annotate(
+                n=Count("id"),
+                p_sum=Sum("num_players"),
+                p_min=Min("num_players"),
+                p_max=Max("num_players"),
+                in_max=Max("in_bytes"),
+                out_max=Max("out_bytes"),
+                up_max=Max("uptime"),
+            )
+        )
+    else:
+        rows = (
+            ServerStatRollup.objects.filter(resolution=source, bucket__gte=since)
+            .annotate(period=trunc("bucket"))
+            .values("server_id", "period")
+            .annotate(
+                n=Sum("samples"),
+                p_sum=Sum("players_sum"),
+                p_min=Min("players_min"),
+                p_max=Max("players_max"),
+                in_max=Max("in_bytes"),
+                out_max=Max("out_bytes"),
+                up_max=Max("uptime"),
+            )
+        )
+
+    rollups = [
+        ServerStatRollup(
+            server_id=row["server_id"],
+            resolution=resolution,
+            bucket=row["period"],
+            samples=row["n"],
+            players_sum=row["p_sum"] or 0,
+            players_min=row["p_min"] or 0,
+            players_max=row["p_max"] or 0,
+            in_bytes=row["in_max"] or 0,
+            out_bytes=row["out_max"] or 0,
+            uptime=row["up_max"] or 0,
+        )
+        for row in rows.order_by()
+    ]
+    ServerStatRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        # MySQL upserts on any unique key and rejects an explicit conflict target.
+        unique_fields=(
+            ["server", "resolution", "bucket"] if connection.features.supports_update_conflicts_with_target else None
+        ),
+        update_fields=list(ROLLUP_FIELDS),
+        batch_size=1000,
+    )
+    return len(rollups)
+
+
+def rollup_all(now: datetime | None = None) -> dict[str, int]:
+    """Refresh the current and previous bucket at every resolution."""
+    now = now or timezone.now()
+    return {resolution: rollup(resolution, now - 2 * width) for resolution, (width, _, _) in RESOLUTIONS.items()}
+
+
+def prune(now: datetime | None = None) -> dict[str, int]:
+    """Delete raw samples and rollups older than their HISTORY_RETENTION_DAYS entry."""
+    now = now or timezone.now()
+    deleted: dict[str, int] = {}
+    for level, days in settings.HISTORY_RETENTION_DAYS.items():
+        if days is None:
+            continue
+        cutoff = now - timedelta(days=days)
+        if level == "raw":
+            deleted[level], _ = ServerStat.objects.filter(timestamp__lt=cutoff).delete()
+        else:
+            deleted[level], _ = ServerStatRollup.objects.filter(resolution=level, bucket__lt=cutoff).delete()
+    return deleted
+
+
+def player_trend(server_id: int, resolution: str, since: datetime, until: datetime | None = None) -> QuerySet:
+    """Return the rollup buckets for one server between since and until, oldest first."""
+    queryset = ServerStatRollup.objects.filter(server_id=server_id, resolution=resolution, bucket__gte=since)
+    if until is not None:
+        queryset = queryset.filter(bucket__lt=until)
+    return queryset.order_by("bucket")
@@ -0,0 +1,67 @@
+"""Measure what a cold worker imports, using ``python -X importtime``."""
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+# Boots Django the way a gunicorn worker does before serving its first request.
+STARTUP_SCRIPT: str = (
+    "from django.core.wsgi import get_wsgi_application\n"
+    "get_wsgi_application()\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ImportTiming:
+    """Time spent importing one module, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def package(self) -> str:
+        """Return the top-level package the module belongs to."""
+        return self.module.partition(".")[0]
+
+
+def parse_importtime(output: str) -> list[ImportTiming]:
+    """Parse the ``import time:`` lines written to stderr by ``-X importtime``."""
+    timings: list[ImportTiming] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        module = name.strip()
+        # -X importtime indents nested imports by two spaces after the first.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append(ImportTiming(module, int(self_us), int(cumulative_us), depth))
+    return timings
+
+
+def by_package(timings: list[ImportTiming]) -> dict[str, int]:
+    """Return the self time of every top-level package, most expensive first."""
+    totals: dict[str, int] = defaultdict(int)
+    for timing in timings:
+        totals[timing.package] += timing.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def profile_startup(script: str = STARTUP_SCRIPT) -> list[ImportTiming]:
+    """Run script in a fresh interpreter with the current settings and return its import timings."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))}
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", script],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
@@ -0,0 +1 @@
+"""Django management package of the nexxus app."""
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from nexxus.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = "Run nexxus micro-benchmarks and report CPU time and bytes out per operation."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all). Choices: {sorted(BENCHMARKS)}")
+        parser.add_argument("--iterations", type=int, default=200, help="Operations measured per variant.")
+        parser.add_argument("--servers", type=int, default=200, help="Synthetic servers seeded for the run.")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Run the selected benchmarks."""
+        names = options["names"] or sorted(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            msg = f"Unknown benchmark(s): {', '.join(sorted(unknown))}"
+            raise CommandError(msg)
+
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({options['servers']} servers)"))
+            for result in BENCHMARKS[name](options["iterations"], options["servers"]):
+                self.stdout.write(str(result))
@@ -0,0 +1,41 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from nexxus.transfer import FORMATS, TRANSFER_CHUNK_SIZE, TRANSFER_MODELS, export_rows, format_for_path
+
+
+class Command(BaseCommand):
+    help = "Stream the servers or blacklist table to CSV or NDJSON."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("table", choices=sorted(TRANSFER_MODELS), help="Table to export.")
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout).")
+        parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the file extension).")
+        parser.add_argument("--chunk-size", type=int, default=TRANSFER_CHUNK_SIZE, help="Rows read per query.")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Export the table."""
+        path = options["output"]
+        fmt = options["format"] or format_for_path(path)
+        model = TRANSFER_MODELS[options["table"]]
+
+        stream = sys.stdout if path == "-" else Path(path).open("w", newline="", encoding="utf-8")  # noqa: SIM115
+        start = time.perf_counter()
+        count = 0
+        try:
+            for count in export_rows(model, stream, fmt, options["chunk_size"]):
+                self.report(count, start)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        self.report(count, start, done=True)
+
+    def report(self, count: int, start: float, *, done: bool = False) -> None:
+        """Write progress and throughput to stderr, keeping stdout for the data."""
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        prefix = "Exported" if done else "  exported"
+        self.stderr.write(f"{prefix} {count} rows in {elapsed:.1f}s ({count / elapsed:.0f} rows/s)")
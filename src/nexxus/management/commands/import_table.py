@@ -0,0 +1,50 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import IntegrityError
+
+from nexxus.transfer import (
+    FORMATS,
+    TRANSFER_CHUNK_SIZE,
+    TRANSFER_MODELS,
+    TransferError,
+    format_for_path,
+    import_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk load the servers or blacklist table from CSV or NDJSON."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("table", choices=sorted(TRANSFER_MODELS), help="Table to import into.")
+        parser.add_argument("--input", "-i", default="-", help="File to read (default: stdin).")
+        parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension).")
+        parser.add_argument("--chunk-size", type=int, default=TRANSFER_CHUNK_SIZE, help="Rows inserted per query.")
+        parser.add_argument("--replace", action="store_true", help="Delete existing rows first (snapshot restore).")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Import the file."""
+        path = options["input"]
+        fmt = options["format"] or format_for_path(path)
+        model = TRANSFER_MODELS[options["table"]]
+
+        stream = sys.stdin if path == "-" else Path(path).open(newline="", encoding="utf-8")  # noqa: SIM115
+        start = time.perf_counter()
+        count = 0
+        try:
+            for count in import_rows(model, stream, fmt, options["chunk_size"], replace=options["replace"]):
+                elapsed = max(time.perf_counter() - start, 1e-9)
+                self.stderr.write(f"  imported {count} rows ({count / elapsed:.0f} rows/s)")
+        except (TransferError, IntegrityError) as error:
+            msg = f"Import failed, nothing was written: {error}"
+            raise CommandError(msg) from error
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        self.stdout.write(f"Imported {count} rows in {elapsed:.1f}s ({count / elapsed:.0f} rows/s)")
@@ -0,0 +1,41 @@
+import subprocess
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from nexxus.importtime import by_package, profile_startup
+
+
+class Command(BaseCommand):
+    help = "Boot a fresh worker under -X importtime and report the most expensive imports."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("--limit", type=int, default=25, help="Rows to report.")
+        parser.add_argument(
+            "--by",
+            choices=["package", "module"],
+            default="package",
+            help="Aggregate self time per top-level package, or list modules by cumulative time.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Profile a cold start."""
+        try:
+            timings = profile_startup()
+        except subprocess.CalledProcessError as error:
+            msg = f"Worker startup failed:\n{error.stderr}"
+            raise CommandError(msg) from error
+
+        total_ms = sum(timing.self_us for timing in timings) / 1000
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{len(timings)} modules imported in {total_ms:.1f} ms"))
+
+        if options["by"] == "package":
+            for package, self_us in list(by_package(timings).items())[: options["limit"]]:
+                self.stdout.write(f"{self_us / 1000:10.1f} ms  {package}")
+            return
+
+        for timing in sorted(timings, key=lambda timing: timing.cumulative_us, reverse=True)[: options["limit"]]:
+            self.stdout.write(
+                f"{timing.cumulative_us / 1000:10.1f} ms cumulative {timing.self_us / 1000:8.1f} ms self  "
+                f"{timing.module}"
+            )
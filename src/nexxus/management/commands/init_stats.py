@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from nexxus.sharedstats import shared_stats
+
+
+class Command(BaseCommand):
+    help = "Create or reset the shared stats registry file; run once before starting the workers."
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Reset the registry."""
+        registry = shared_stats()
+        registry.create()
+        self.stdout.write(
+            f"Reset {registry.path} ({registry.max_slots} worker slots, {registry.max_counters} counters)"
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from nexxus.prober import probe_servers
+
+
+class Command(BaseCommand):
+    help = "Check that every live server accepts TCP connections and record reachability and RTT."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("--concurrency", type=int, help="Connections open at once (default: PROBE_CONCURRENCY).")
+        parser.add_argument("--timeout", type=float, help="Seconds allowed per server (default: PROBE_TIMEOUT).")
+        parser.add_argument(
+            "--handshake",
+            action="store_true",
+            default=None,
+            help="Require the Crossfire version greeting (default: PROBE_HANDSHAKE).",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Run one probe pass."""
+        results = probe_servers(options["concurrency"], options["timeout"], handshake=options["handshake"])
+        reachable = sum(result.reachable for result in results)
+        self.stdout.write(
+            f"Probed {len(results)} servers: {reachable} reachable, {len(results) - reachable} unreachable"
+        )
+        for result in results:
+            if not result.reachable:
+                self.stdout.write(f"  {result.entry}: {result.error}")
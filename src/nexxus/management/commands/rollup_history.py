@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from nexxus.history import history_buffer, prune, rollup_all
+
+
+class Command(BaseCommand):
+    help = "Flush buffered server statistics, refresh the 1m/1h/1d rollups and prune expired history."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("--no-prune", action="store_true", help="Keep data older than HISTORY_RETENTION_DAYS.")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Run the rollups."""
+        flushed = history_buffer().flush()
+        self.stdout.write(f"Flushed {flushed} buffered samples")
+
+        for resolution, count in rollup_all().items():
+            self.stdout.write(f"Rolled up {count} {resolution} buckets")
+
+        if not options["no_prune"]:
+            for level, count in prune().items():
+                self.stdout.write(f"Pruned {count} {level} rows")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from nexxus.fleet import FLEET_CHUNK_SIZE, generate_fleet
+
+
+class Command(BaseCommand):
+    help = "Insert a deterministic synthetic server fleet for load and performance testing."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("--count", type=int, default=10000, help="Servers to insert.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed yields the same fleet.")
+        parser.add_argument(
+            "--live-fraction", type=float, default=1.0, help="Share of servers with a recent heartbeat (0 to 1)."
+        )
+        parser.add_argument("--chunk-size", type=int, default=FLEET_CHUNK_SIZE, help="Rows per bulk insert.")
+        parser.add_argument("--clear", action="store_true", help="Delete every existing server first.")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Seed the fleet."""
+        if not 0 <= options["live_fraction"] <= 1:
+            msg = "--live-fraction must be between 0 and 1"
+            raise CommandError(msg)
+
+        inserted = 0
+        for inserted in generate_fleet(
+            options["count"],
+            options["seed"],
+            options["live_fraction"],
+            options["chunk_size"],
+            replace=options["clear"],
+        ):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"Inserted {inserted} servers")
+        self.stdout.write(self.style.SUCCESS(f"Seeded {inserted} servers"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from nexxus.models import ServerKey
+from nexxus.signing import generate_secret
+from nexxus.validators import ServerValidationError, clean_hostname
+
+
+class Command(BaseCommand):
+    help = "Create or rotate the HMAC key a server signs its announces with, and print the secret."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("hostname", help="Hostname the server announces; it is the key id.")
+        parser.add_argument("--deactivate", action="store_true", help="Disable the key instead of issuing a secret.")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Issue a new secret, or deactivate the key."""
+        try:
+            key_id = clean_hostname(options["hostname"])
+        except ServerValidationError as error:
+            raise CommandError(str(error)) from error
+
+        if options["deactivate"]:
+            updated = ServerKey.objects.filter(key_id=key_id).update(active=False)
+            if not updated:
+                msg = f"No key for {key_id}"
+                raise CommandError(msg)
+            self.stdout.write(f"Deactivated the key of {key_id}")
+            return
+
+        secret = generate_secret()
+        _, created = ServerKey.objects.update_or_create(key_id=key_id, defaults={"secret": secret, "active": True})
+        self.stdout.write(f"{'Created' if created else 'Rotated'} the key of {key_id}; its secret is:")
+        self.stdout.write(secret)
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from nexxus.scheduler import job_status, scheduler
+
+
+class Command(BaseCommand):
+    help = "Run the periodic SCHEDULER_JOBS; any number of workers may run, each job runs on one at a time."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add command line arguments."""
+        parser.add_argument("--once", action="store_true", help="Run the jobs that are due now and exit.")
+        parser.add_argument("--status", action="store_true", help="Show each job's schedule and last run, then exit.")
+        parser.add_argument("--tick", type=float, help="Seconds between looks for due jobs (default: SCHEDULER_TICK).")
+
+    def handle(self, *args: object, **options: object) -> None:  # noqa: ARG002
+        """Run the scheduler."""
+        if options["status"]:
+            for job in job_status():
+                duration = "-" if job["last_duration_ms"] is None else f"{job['last_duration_ms']:.1f} ms"
+                lag = "-" if job["last_lag_ms"] is None else f"{job['last_lag_ms']:.0f} ms"
+                self.stdout.write(
+                    f"{job['name']:<20s} next {job['next_run']:%Y-%m-%d %H:%M:%S}  runs {job['runs']}"
+                    f"  failures {job['failures']}  last {duration}, lag {lag}  {job['owner']}"
+                )
+            return
+
+        if options["once"]:
+            for run in scheduler().run_pending():
+                outcome = f"failed: {run.error}" if run.error else "ok"
+                self.stdout.write(f"{run.name}: {outcome} in {run.duration_ms:.1f} ms, {run.lag_ms:.0f} ms late")
+            return
+
+        self.stdout.write(f"Running {', '.join(scheduler().jobs)} as {scheduler().owner}")
+        scheduler().run_forever(options["tick"] or settings.SCHEDULER_TICK)
@@ -0,0 +1,69 @@
+"""Slim middleware profile for metaserver protocol and API paths.
+
+Game servers and clients talking to ``meta_*.php`` and ``/v3/api/`` never use
+sessions, auth, messages or CSRF tokens. These drop-in subclasses of the
+Django middleware pass such requests straight through when ``SLIM_MIDDLEWARE``
+is on, so they skip the work without splitting the URLconf or the handler.
+Browser pages such as ``/v3/`` and the admin keep the full stack.
+"""
+
+import re
+from collections.abc import Callable
+from functools import cache
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.http import HttpRequest, HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+@cache
+def _slim_path_patterns() -> tuple[re.Pattern[str], ...]:
+    return tuple(re.compile(pattern) for pattern in settings.SLIM_MIDDLEWARE_PATHS)
+
+
+def is_slim_path(path: str) -> bool:
+    """Return whether a request path is served with the slim middleware profile."""
+    if not settings.SLIM_MIDDLEWARE:
+        return False
+    # Same convention as SECURE_REDIRECT_EXEMPT: patterns match the path without its leading slash.
+    path = path.lstrip("/")
+    return any(pattern.search(path) for pattern in _slim_path_patterns())
+
+
+class SlimPathMixin:
+    """Skip this middleware for requests on SLIM_MIDDLEWARE_PATHS."""
+
+    get_response: Callable[[HttpRequest], HttpResponse]
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Pass slim-path requests straight to the next middleware."""
+        if is_slim_path(request.path_info):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SlimSessionMiddleware(SlimPathMixin, SessionMiddleware):
+    """SessionMiddleware that skips slim paths."""
+
+
+class SlimAuthenticationMiddleware(SlimPathMixin, AuthenticationMiddleware):
+    """AuthenticationMiddleware that skips slim paths."""
+
+
+class SlimMessageMiddleware(SlimPathMixin, MessageMiddleware):
+    """MessageMiddleware that skips slim paths."""
+
+
+class SlimCsrfViewMiddleware(SlimPathMixin, CsrfViewMiddleware):
+    """CsrfViewMiddleware that skips slim paths, including the view-level check."""
+
+    def process_view(
+        self, request: HttpRequest, callback: Callable, callback_args: tuple, callback_kwargs: dict
+    ) -> HttpResponse | None:
+        """Skip the CSRF check on slim paths."""
+        if is_slim_path(request.path_info):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
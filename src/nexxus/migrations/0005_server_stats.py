@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nexxus", "0004_alter_server_port"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServerStat",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("timestamp", models.DateTimeField()),
+                ("num_players", models.IntegerField(default=0)),
+                ("in_bytes", models.IntegerField(default=0)),
+                ("out_bytes", models.IntegerField(default=0)),
+                ("uptime", models.IntegerField(default=0)),
+                (
+                    "server",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="nexxus.server",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "server_stats",
+                "indexes": [
+                    models.Index(fields=["timestamp"], name="server_stat_timesta_3c7876_idx"),
+                    models.Index(fields=["server", "timestamp"], name="server_stat_server__6dff7a_idx"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ServerStatRollup",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "resolution",
+                    models.CharField(choices=[("1m", "1 minute"), ("1h", "1 hour"), ("1d", "1 day")], max_length=2),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("samples", models.IntegerField(default=0)),
+                ("players_sum", models.BigIntegerField(default=0)),
+                ("players_min", models.IntegerField(default=0)),
+                ("players_max", models.IntegerField(default=0)),
+                ("in_bytes", models.IntegerField(default=0)),
+                ("out_bytes", models.IntegerField(default=0)),
+                ("uptime", models.IntegerField(default=0)),
+                (
+                    "server",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="nexxus.server",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "server_stat_rollups",
+                "indexes": [models.Index(fields=["resolution", "bucket"], name="server_stat_resolut_3fca1b_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("server", "resolution", "bucket"), name="server_stat_rollup_bucket")
+                ],
+            },
+        ),
+    ]
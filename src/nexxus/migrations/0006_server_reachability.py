@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nexxus", "0005_server_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="server",
+            name="last_probe",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="server",
+            name="reachable",
+            field=models.BooleanField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="server",
+            name="rtt_ms",
+            field=models.FloatField(editable=False, null=True),
+        ),
+    ]
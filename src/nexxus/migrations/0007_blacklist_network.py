@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nexxus', '0006_server_reachability'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blacklist',
+            name='network',
+            field=models.CharField(blank=True, max_length=43, null=True),
+        ),
+    ]
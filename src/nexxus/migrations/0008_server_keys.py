@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nexxus', '0007_blacklist_network'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServerKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_id', models.CharField(max_length=80, unique=True)),
+                ('secret', models.CharField(max_length=128)),
+                ('active', models.BooleanField(default=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'server_keys',
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:56
+
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def lowercase_hostnames(apps, schema_editor):
+    """Store every hostname stripped and lower-cased, merging rows that then collide.
+
+    Heartbeats have been normalised by clean_hostname since it was introduced,
+    so older mixed-case rows would otherwise live on next to their lower-case
+    twins. Per (hostname, port) the most recently updated row survives; raw
+    samples of the others are moved to it and their rollups are dropped.
+    Hostnames are compared in Python because MySQL's default collation
+    ignores case.
+    """
+    Server = apps.get_model('nexxus', 'Server')
+    ServerStat = apps.get_model('nexxus', 'ServerStat')
+    ServerStatRollup = apps.get_model('nexxus', 'ServerStatRollup')
+
+    groups = defaultdict(list)
+    rows = Server.objects.exclude(hostname=None).values_list('last_update', 'entry', 'hostname', 'port')
+    for last_update, entry, hostname, port in rows.iterator():
+        groups[hostname.strip().lower(), port].append((last_update, entry, hostname))
+
+    for (hostname, _port), servers in groups.items():
+        if len(servers) == 1 and servers[0][2] == hostname:
+            continue
+        servers.sort(reverse=True)
+        survivor = servers[0][1]
+        duplicates = [entry for _last_update, entry, _hostname in servers[1:]]
+        if duplicates:
+            ServerStat.objects.filter(server_id__in=duplicates).update(server_id=survivor)
+            ServerStatRollup.objects.filter(server_id__in=duplicates).delete()
+            Server.objects.filter(entry__in=duplicates).delete()
+        Server.objects.filter(entry=survivor).update(hostname=hostname)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nexxus', '0009_scheduled_jobs'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_hostnames, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:02
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def drop_duplicate_entries(apps, schema_editor):
+    """Keep the oldest of every set of blacklist rows that block the same value.
+
+    Values are compared stripped and lower-cased, the way MySQL's default
+    collation compares them once the unique constraint exists.
+    """
+    Blacklist = apps.get_model('nexxus', 'Blacklist')
+
+    seen = set()
+    duplicates = []
+    rows = Blacklist.objects.order_by('entry').values_list('entry', 'hostname', 'ip_address', 'network')
+    for entry, hostname, ip_address, network in rows.iterator():
+        value = hostname if hostname is not None else ip_address if ip_address is not None else network
+        key = value.strip().lower()
+        if key in seen:
+            duplicates.append(entry)
+        else:
+            seen.add(key)
+    Blacklist.objects.filter(entry__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nexxus', '0010_lowercase_hostnames'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='blacklist',
+            name='network',
+            field=models.CharField(blank=True, default='', max_length=43),
+        ),
+        migrations.RunPython(drop_duplicate_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='blacklist',
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.comparison.Coalesce(
+                    'hostname',
+                    django.db.models.functions.comparison.Cast('ip_address', models.CharField(max_length=80)),
+                    'network',
+                ),
+                name='blacklist_unique_entry',
+            ),
+        ),
+    ]
@@ -1,23 +1,52 @@
+from typing import ClassVar
+
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Cast, Coalesce
 
 
 class Blacklist(models.Model):
-    """Represents a list of blacklisted hostnames."""
+    """Represents a blacklisted hostname, IP address or network.
+
+    A hostname starting with ``*.`` bans every subdomain of the rest of the
+    name; ``network`` holds an IPv4 or IPv6 range in CIDR notation.
+    """
 
     entry = models.AutoField(primary_key=True)
     hostname = models.CharField(max_length=80, blank=True, null=True)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
+    network = models.CharField(max_length=43, blank=True, default="")
 
     class Meta:
         """Meta options for the Blacklist model."""
 
         db_table = "blacklist"
+        constraints: ClassVar[list[models.UniqueConstraint]] = [
+            # Each row sets one of the three columns; this keeps that value unique.
+            models.UniqueConstraint(
+                Coalesce("hostname", Cast("ip_address", models.CharField(max_length=80)), "network"),
+                name="blacklist_unique_entry",
+            ),
+        ]
 
     def __str__(self) -> str:
         """Return the string representation of the Blacklist entry."""
         return self.hostname or "(Unnamed)"
 
 
+class ServerQuerySet(models.QuerySet):
+    """Query helpers shared by the server list endpoints."""
+
+    def listed(self) -> "ServerQuerySet":
+        """Drop servers the prober found unreachable when HIDE_UNREACHABLE_SERVERS is on.
+
+        Servers that have not been probed yet stay listed.
+        """
+        if settings.HIDE_UNREACHABLE_SERVERS:
+            return self.exclude(reachable=False)
+        return self
+
+
 class Server(models.Model):
     """Represents a server with various metadata and statistics."""
 
@@ -38,6 +67,16 @@ class Server(models.Model):
     sc_version = models.CharField(max_length=20, blank=True, null=True)
     cs_version = models.CharField(max_length=20, blank=True, null=True)
     last_update: models.DateTimeField = models.DateTimeField(auto_now=True)
+    # Written by the reachability prober (manage.py probe_servers), never by heartbeats.
+    reachable = models.BooleanField(null=True, editable=False)
+    rtt_ms = models.FloatField(null=True, editable=False)
+    last_probe = models.DateTimeField(null=True, editable=False)
+
+    objects = ServerQuerySet.as_manager()
+
+    # Column values as last read from or written to the database, keyed by attname;
+    # None for an instance that was never loaded. Lets post_save tell what a save changed.
+    loaded_values: dict[str, object] | None = None
 
     class Meta:
         """Meta options for the Server model."""
@@ -47,3 +86,130 @@ class Server(models.Model):
     def __str__(self) -> str:
         """Return the string representation of the Server entry."""
         return f"{self.hostname}:{self.port}" if self.hostname and self.port else "(Unnamed Server)"
+
+    @classmethod
+    def from_db(cls, db: str | None, field_names: list[str], values: list[object]) -> "Server":
+        """Load an instance and remember the column values it was read with."""
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_values = dict(zip(field_names, values, strict=True))
+        return instance
+
+
+class ServerStat(models.Model):
+    """A raw statistics sample recorded from one heartbeat.
+
+    Rows are only ever appended, in batches, and pruned by timestamp, so the
+    table can be range-partitioned on ``timestamp`` without code changes.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    server = models.ForeignKey(Server, on_delete=models.CASCADE, db_constraint=False, related_name="+")
+    timestamp = models.DateTimeField()
+    num_players = models.IntegerField(default=0)
+    in_bytes = models.IntegerField(default=0)
+    out_bytes = models.IntegerField(default=0)
+    uptime = models.IntegerField(default=0)
+
+    class Meta:
+        """Meta options for the ServerStat model."""
+
+        db_table = "server_stats"
+        indexes: ClassVar[list[models.Index]] = [
+            models.Index(fields=["timestamp"]),
+            models.Index(fields=["server", "timestamp"]),
+        ]
+
+    def __str__(self) -> str:
+        """Return the string representation of the sample."""
+        return f"{self.server_id}@{self.timestamp:%Y-%m-%d %H:%M:%S}"
+
+
+class ServerStatRollup(models.Model):
+    """Statistics for one server downsampled to a 1 minute, 1 hour or 1 day bucket."""
+
+    class Resolution(models.TextChoices):
+        """Rollup bucket widths."""
+
+        MINUTE = "1m", "1 minute"
+        HOUR = "1h", "1 hour"
+        DAY = "1d", "1 day"
+
+    id = models.BigAutoField(primary_key=True)
+    server = models.ForeignKey(Server, on_delete=models.CASCADE, db_constraint=False, related_name="+")
+    resolution = models.CharField(max_length=2, choices=Resolution.choices)
+    bucket = models.DateTimeField()
+    samples = models.IntegerField(default=0)
+    players_sum = models.BigIntegerField(default=0)
+    players_min = models.IntegerField(default=0)
+    players_max = models.IntegerField(default=0)
+    in_bytes = models.IntegerField(default=0)
+    out_bytes = models.IntegerField(default=0)
+    uptime = models.IntegerField(default=0)
+
+    class Meta:
+        """Meta options for the ServerStatRollup model."""
+
+        db_table = "server_stat_rollups"
+        constraints: ClassVar[list[models.UniqueConstraint]] = [
+            models.UniqueConstraint(fields=["server", "resolution", "bucket"], name="server_stat_rollup_bucket"),
+        ]
+        indexes: ClassVar[list[models.Index]] = [models.Index(fields=["resolution", "bucket"])]
+
+    def __str__(self) -> str:
+        """Return the string representation of the rollup bucket."""
+        return f"{self.server_id}@{self.resolution}:{self.bucket:%Y-%m-%d %H:%M}"
+
+    @property
+    def players_avg(self) -> float:
+        """Return the mean player count over the bucket."""
+        return self.players_sum / self.samples if self.samples else 0.0
+
+
+class ServerKey(models.Model):
+    """A shared secret a server signs its announces with (see ``nexxus.signing``).
+
+    ``key_id`` is the hostname the server announces; the key only verifies
+    heartbeats for that hostname.
+    """
+
+    key_id = models.CharField(max_length=80, unique=True)
+    secret = models.CharField(max_length=128)
+    active = models.BooleanField(default=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Meta options for the ServerKey model."""
+
+        db_table = "server_keys"
+
+    def __str__(self) -> str:
+        """Return the string representation of the key."""
+        return self.key_id if self.active else f"{self.key_id} (inactive)"
+
+
+class ScheduledJob(models.Model):
+    """Schedule, lease and last outcome of one periodic job (see ``nexxus.scheduler``).
+
+    The process holding an unexpired lease is the only one running the job;
+    ``next_run`` is when it is due again.
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    next_run = models.DateTimeField()
+    owner = models.CharField(max_length=128, blank=True, default="")
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    runs = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    last_started = models.DateTimeField(null=True, blank=True)
+    last_duration_ms = models.FloatField(null=True, blank=True)
+    last_lag_ms = models.FloatField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        """Meta options for the ScheduledJob model."""
+
+        db_table = "scheduled_jobs"
+
+    def __str__(self) -> str:
+        """Return the string representation of the job."""
+        return self.name
@@ -0,0 +1,25 @@
+"""Permissions for v3 API routes that change metaserver state.
+
+The v3 API skips the session and authentication middleware, so these routes
+authenticate with a shared key sent in the ``X-API-Key`` header instead of a
+logged-in user.
+"""
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest
+from ninja_extra import ControllerBase
+from ninja_extra.permissions import BasePermission
+
+
+class HasAdminAPIKey(BasePermission):
+    """Allow requests carrying ``ADMIN_API_KEY``; deny everything while the key is unset."""
+
+    message: str = "A valid X-API-Key header is required."
+
+    def has_permission(self, request: HttpRequest, controller: ControllerBase) -> bool:  # noqa: ARG002
+        """Compare the header to the configured key in constant time."""
+        expected = settings.ADMIN_API_KEY
+        provided = request.headers.get("X-API-Key", "")
+        return bool(expected) and hmac.compare_digest(provided.encode(), expected.encode())
@@ -0,0 +1,162 @@
+"""Active reachability checks for listed servers.
+
+Heartbeats only prove a server could reach the metaserver; the prober checks
+the reverse by opening a TCP connection to every live ``hostname:port``, many at
+once on one asyncio loop, and records the outcome and round-trip time on the
+``Server`` row. With the handshake enabled, a server only counts as reachable
+once it sends the ``version`` command every Crossfire server greets new
+connections with.
+
+Hostnames are announced by anonymous clients, so each one is resolved first and
+only a global unicast address is connected to: loopback, private, link-local,
+reserved and multicast targets are refused without a connection (unless
+``PROBE_ALLOW_PRIVATE`` is on), and the address that was checked is the one
+dialled, so a second DNS answer cannot point the probe elsewhere.
+"""
+
+import asyncio
+import contextlib
+import socket
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from nexxus.cache import bump_generation
+from nexxus.models import Server
+from nexxus.resolver import IPAddress, normalize_ip
+
+# Crossfire frames every command with a 2-byte big-endian length.
+FRAME_HEADER_SIZE: int = 2
+VERSION_COMMAND: bytes = b"version "
+
+
+class ProbeTargetError(ValueError):
+    """The announced hostname does not resolve to an address the prober may connect to."""
+
+
+@dataclass(frozen=True, slots=True)
+class ProbeResult:
+    """The outcome of probing one server."""
+
+    entry: int
+    reachable: bool
+    rtt_ms: float | None = None
+    version: str | None = None
+    error: str | None = None
+
+
+async def read_version(reader: asyncio.StreamReader) -> str:
+    """Read the server's first frame and return its version command."""
+    header = await reader.readexactly(FRAME_HEADER_SIZE)
+    payload = await reader.readexactly(int.from_bytes(header, "big"))
+    if not payload.startswith(VERSION_COMMAND):
+        msg = f"unexpected greeting {payload[:32]!r}"
+        raise ValueError(msg)
+    return payload.decode("utf-8", "replace")
+
+
+def is_probeable(ip: IPAddress) -> bool:
+    """Return whether ip is a global unicast address."""
+    return ip.is_global and not ip.is_multicast
+
+
+async def resolve_target(hostname: str, port: int, *, allow_private: bool) -> str:
+    """Return the first address of hostname the prober may connect to.
+
+    Raises:
+        ProbeTargetError: When every address of hostname is loopback, private, link-local, reserved or multicast
+
+    """
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    for info in infos:
+        ip = normalize_ip(info[4][0])
+        if ip is not None and (allow_private or is_probeable(ip)):
+            return str(ip)
+    msg = f"{hostname} has no global address"
+    raise ProbeTargetError(msg)
+
+
+async def probe(entry: int, hostname: str, port: int, *, handshake: bool, allow_private: bool = False) -> ProbeResult:
+    """Connect to one server and report whether, and how fast, it answered.
+
+    The probe has no deadline of its own; callers bound it with ``asyncio.timeout()``.
+    """
+    writer: asyncio.StreamWriter | None = None
+    try:
+        address = await resolve_target(hostname, port, allow_private=allow_private)
+        start = time.perf_counter()
+        reader, writer = await asyncio.open_connection(address, port)
+        rtt_ms = (time.perf_counter() - start) * 1000
+        version = await read_version(reader) if handshake else None
+    except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+        return ProbeResult(entry, reachable=False, error=repr(error))
+    finally:
+        if writer is not None:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+    return ProbeResult(entry, reachable=True, rtt_ms=round(rtt_ms, 3), version=version)
+
+
+async def probe_many(
+    targets: Iterable[tuple[int, str, int]],
+    concurrency: int,
+    probe_timeout: float,
+    *,
+    handshake: bool,
+    allow_private: bool = False,
+) -> list[ProbeResult]:
+    """Probe every ``(entry, hostname, port)`` target, each within probe_timeout, with at most concurrency open."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(entry: int, hostname: str, port: int) -> ProbeResult:
+        async with semaphore:
+            try:
+                async with asyncio.timeout(probe_timeout):
+                    return await probe(entry, hostname, port, handshake=handshake, allow_private=allow_private)
+            except TimeoutError as error:
+                return ProbeResult(entry, reachable=False, error=repr(error))
+
+    return await asyncio.gather(*(bounded(*target) for target in targets))
+
+
+def probe_servers(
+    concurrency: int | None = None, timeout: float | None = None, *, handshake: bool | None = None
+) -> list[ProbeResult]:
+    """Probe every live server and record the results; return them."""
+    cutoff = timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT)
+    targets = list(
+        Server.objects.filter(last_update__gt=cutoff, hostname__isnull=False, port__isnull=False).values_list(
+            "entry", "hostname", "port", "reachable"
+        )
+    )
+    results = asyncio.run(
+        probe_many(
+            [(entry, hostname, port) for entry, hostname, port, _ in targets],
+            concurrency or settings.PROBE_CONCURRENCY,
+            timeout or settings.PROBE_TIMEOUT,
+            handshake=settings.PROBE_HANDSHAKE if handshake is None else handshake,
+            allow_private=settings.PROBE_ALLOW_PRIVATE,
+        )
+    )
+
+    # bulk_update leaves last_update alone, so probing never makes a dead server look live.
+    probed_at = timezone.now()
+    Server.objects.bulk_update(
+        [
+            Server(entry=result.entry, reachable=result.reachable, rtt_ms=result.rtt_ms, last_probe=probed_at)
+            for result in results
+        ],
+        ["reachable", "rtt_ms", "last_probe"],
+        batch_size=500,
+    )
+
+    previous = {entry: reachable for entry, _, _, reachable in targets}
+    if any(previous[result.entry] != result.reachable for result in results):
+        bump_generation()
+    return results
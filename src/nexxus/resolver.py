@@ -0,0 +1,203 @@
+"""Asynchronous hostname resolution with a TTL cache, kept off the request path.
+
+Heartbeats only ever read the cache: a miss schedules a lookup on a background
+asyncio loop and the heartbeat carries on, so a slow or broken DNS server never
+holds up a request. Successful lookups are cached for ``RESOLVER_TTL`` seconds
+and failures such as NXDOMAIN for ``RESOLVER_NEGATIVE_TTL``. A timeout says
+nothing about the hostname, so it is only remembered for
+``RESOLVER_TIMEOUT_TTL`` seconds, to avoid retrying at once, and the hostname
+counts as unresolved meanwhile. At most ``RESOLVER_MAX_PENDING`` lookups are
+queued; misses beyond that are not scheduled until the queue drains.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import cache
+
+from django.conf import settings
+
+from nexxus.sharedstats import shared_stats
+
+IPAddress = ipaddress.IPv4Address | ipaddress.IPv6Address
+Resolve = Callable[[str], Awaitable[frozenset[str]]]
+
+
+def normalize_ip(address: str) -> IPAddress | None:
+    """Parse an address, unwrapping IPv4-mapped IPv6; None when it is not an IP address."""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return None
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        return ip.ipv4_mapped
+    return ip
+
+
+async def getaddrinfo_resolve(hostname: str) -> frozenset[str]:
+    """Return every A/AAAA address of hostname using the running loop's resolver."""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+    return frozenset(info[4][0] for info in infos)
+
+
+@dataclass(frozen=True, slots=True)
+class Resolution:
+    """The cached outcome of resolving one hostname."""
+
+    addresses: frozenset[IPAddress]
+    expires_at: float
+    error: str | None = None
+    timed_out: bool = False
+
+    @property
+    def resolved(self) -> bool:
+        """Return whether the lookup succeeded."""
+        return self.error is None
+
+
+class HostnameResolver:
+    """Resolve hostnames on a background event loop and cache the results."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        resolve: Resolve,
+        *,
+        ttl: float,
+        negative_ttl: float,
+        timeout: float,
+        max_concurrency: int,
+        max_entries: int,
+        timeout_ttl: float = 5.0,
+        max_pending: int = 1000,
+    ) -> None:
+        """Initialize the resolver.
+
+        Args:
+            resolve (Resolve): Coroutine function returning the addresses of a hostname
+            ttl (float): Seconds a successful lookup is cached
+            negative_ttl (float): Seconds a failed lookup is cached
+            timeout (float): Seconds a single lookup may take before it counts as failed
+            max_concurrency (int): Lookups allowed in flight at once
+            max_entries (int): Hostnames kept in the cache; the oldest are evicted first
+            timeout_ttl (float): Seconds a timed-out lookup is held before it is retried
+            max_pending (int): Lookups queued or in flight at once; further misses are not scheduled
+
+        """
+        self.resolve = resolve
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_entries = max_entries
+        self.timeout_ttl = timeout_ttl
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._cache: dict[str, Resolution] = {}
+        self._pending: dict[str, Future] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def cached(self, hostname: str) -> Resolution | None:
+        """Return the unexpired cached resolution of hostname without scheduling anything."""
+        with self._lock:
+            resolution = self._cache.get(hostname)
+        if resolution is None or resolution.expires_at <= time.monotonic():
+            return None
+        return resolution
+
+    def lookup(self, hostname: str) -> Resolution | None:
+        """Return the cached resolution, scheduling a background lookup on a miss; never blocks on DNS.
+
+        None means the hostname is unresolved: not looked up yet, or the last lookup timed out.
+        """
+        resolution = self.cached(hostname)
+        if resolution is None:
+            self.schedule(hostname)
+            return None
+        return None if resolution.timed_out else resolution
+
+    def schedule(self, hostname: str) -> Future | None:
+        """Start resolving hostname on the background loop, or return the lookup already pending.
+
+        Returns None without scheduling when ``max_pending`` lookups are already pending.
+        """
+        loop = self._ensure_loop()
+        with self._lock:
+            # Held until the future is recorded, so refresh() cannot finish and unregister it first.
+            future = self._pending.get(hostname)
+            if future is None:
+                if len(self._pending) >= self.max_pending:
+                    shared_stats().add("resolver.dropped")
+                    return None
+                future = asyncio.run_coroutine_threadsafe(self.refresh(hostname), loop)
+                self._pending[hostname] = future
+            return future
+
+    async def refresh(self, hostname: str) -> Resolution:
+        """Resolve hostname now, store the result and return it."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        resolution: Resolution | None = None
+        try:
+            async with self._semaphore:
+                addresses = await asyncio.wait_for(self.resolve(hostname), self.timeout)
+            parsed = frozenset(ip for ip in map(normalize_ip, addresses) if ip is not None)
+            resolution = Resolution(parsed, time.monotonic() + self.ttl)
+        except TimeoutError as error:
+            resolution = Resolution(frozenset(), time.monotonic() + self.timeout_ttl, error=repr(error), timed_out=True)
+        except (OSError, UnicodeError, ValueError) as error:
+            resolution = Resolution(frozenset(), time.monotonic() + self.negative_ttl, error=repr(error))
+        finally:
+            # Stored before the future is unregistered, so a lookup in between
+            # finds either of them and does not start a second resolution.
+            if resolution is not None:
+                self.store(hostname, resolution)
+            with self._lock:
+                self._pending.pop(hostname, None)
+        return resolution
+
+    def store(self, hostname: str, resolution: Resolution) -> None:
+        """Cache a resolution, evicting expired and then the oldest entries when full."""
+        with self._lock:
+            self._cache.pop(hostname, None)
+            if len(self._cache) >= self.max_entries:
+                now = time.monotonic()
+                for key in [key for key, value in self._cache.items() if value.expires_at <= now]:
+                    del self._cache[key]
+                while len(self._cache) >= self.max_entries:
+                    del self._cache[next(iter(self._cache))]
+            self._cache[hostname] = resolution
+
+    def clear(self) -> None:
+        """Forget every cached resolution."""
+        with self._lock:
+            self._cache.clear()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="nexxus-resolver", daemon=True).start()
+            return self._loop
+
+
+@cache
+def hostname_resolver() -> HostnameResolver:
+    """Return the process-wide hostname resolver."""
+    return HostnameResolver(
+        getaddrinfo_resolve,
+        ttl=settings.RESOLVER_TTL,
+        negative_ttl=settings.RESOLVER_NEGATIVE_TTL,
+        timeout=settings.RESOLVER_TIMEOUT,
+        max_concurrency=settings.RESOLVER_MAX_CONCURRENCY,
+        max_entries=settings.RESOLVER_MAX_ENTRIES,
+        timeout_ttl=settings.RESOLVER_TIMEOUT_TTL,
+        max_pending=settings.RESOLVER_MAX_PENDING,
+    )
@@ -0,0 +1,194 @@
+"""Periodic jobs, each run by one process at a time across every replica.
+
+``SCHEDULER_JOBS`` maps a job name to the dotted path of a function and the
+interval in seconds it runs at. Any number of processes may run a
+:class:`Scheduler`: ``manage.py worker``, or a thread in every web worker when
+``SCHEDULER_IN_PROCESS`` is on. A due job is claimed with a conditional
+``UPDATE`` on its ``ScheduledJob`` row, so only the process whose update
+matched runs it; the others see the lease and skip it. A lease lasts
+``SCHEDULER_LEASE_SECONDS``, after which a runner that died mid-job is assumed
+gone and the job can be claimed again.
+
+Every run stores its duration and lag (how late after it was due it started)
+on the row and adds to the shared counters ``scheduler.<job>.runs``,
+``.failures``, ``.us`` and ``.lag_ms``.
+"""
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from nexxus.models import ScheduledJob
+from nexxus.sharedstats import shared_stats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    """A function run every interval seconds."""
+
+    name: str
+    func: Callable[[], object]
+    interval: float
+
+
+@dataclass(frozen=True, slots=True)
+class JobRun:
+    """The outcome of one run of a job."""
+
+    name: str
+    started: datetime
+    duration_ms: float
+    lag_ms: float
+    error: str = ""
+
+
+def default_owner() -> str:
+    """Return a name for this process that is unique across replicas."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Scheduler:
+    """Run the jobs that are due, claiming each through its ScheduledJob row."""
+
+    def __init__(self, jobs: Iterable[Job], lease: float, owner: str | None = None) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            jobs (Iterable[Job]): Jobs to run
+            lease (float): Seconds a claim on a job is held before others may take it over
+            owner (str | None): Name recorded on claimed rows (default: hostname and pid)
+
+        """
+        self.jobs: dict[str, Job] = {job.name: job for job in jobs}
+        self.lease = timedelta(seconds=lease)
+        self.owner = owner or default_owner()
+        self._rows_ready = False
+
+    def ensure_rows(self, now: datetime | None = None) -> None:
+        """Create the row of every job that has none yet, due at once."""
+        now = now or timezone.now()
+        ScheduledJob.objects.bulk_create(
+            [ScheduledJob(name=name, next_run=now) for name in self.jobs], ignore_conflicts=True
+        )
+
+    def claim(self, name: str, next_run: datetime, now: datetime) -> bool:
+        """Take the lease on a job due at next_run; return whether this process won it."""
+        return bool(
+            ScheduledJob.objects.filter(name=name, next_run=next_run)
+            .filter(Q(lease_expires__isnull=True) | Q(lease_expires__lte=now))
+            .update(owner=self.owner, lease_expires=now + self.lease)
+        )
+
+    def run_pending(self, now: datetime | None = None) -> list[JobRun]:
+        """Run every due job this process can claim and return the runs."""
+        now = now or timezone.now()
+        if not self._rows_ready:
+            self.ensure_rows(now)
+            self._rows_ready = True
+        due = ScheduledJob.objects.filter(name__in=self.jobs, next_run__lte=now).filter(
+            Q(lease_expires__isnull=True) | Q(lease_expires__lte=now)
+        )
+        runs: list[JobRun] = []
+        for name, next_run in due.values_list("name", "next_run"):
+            if self.claim(name, next_run, now):
+                runs.append(self.run(self.jobs[name], next_run))
+        return runs
+
+    def run(self, job: Job, scheduled: datetime) -> JobRun:
+        """Run a claimed job, record the outcome and release the lease."""
+        started = timezone.now()
+        lag_ms = max((started - scheduled).total_seconds() * 1000, 0.0)
+        start = time.perf_counter_ns()
+        error = ""
+        try:
+            job.func()
+        except Exception as exc:
+            logger.exception("Scheduled job %s failed", job.name)
+            error = f"{type(exc).__name__}: {exc}"
+        elapsed_ns = time.perf_counter_ns() - start
+
+        # Runs missed while the job was late or running are skipped, not replayed.
+        finished = timezone.now()
+        missed = max(math.floor((finished - scheduled).total_seconds() / job.interval), 0)
+        next_run = scheduled + timedelta(seconds=job.interval * (missed + 1))
+        recorded = ScheduledJob.objects.filter(name=job.name, owner=self.owner).update(
+            next_run=next_run,
+            owner="",
+            lease_expires=None,
+            runs=F("runs") + 1,
+            failures=F("failures") + (1 if error else 0),
+            last_started=started,
+            last_duration_ms=elapsed_ns / 1_000_000,
+            last_lag_ms=lag_ms,
+            last_error=error,
+        )
+        if not recorded:
+            logger.warning(
+                "Scheduled job %s ran past its %ss lease and was claimed by another process; this run is not recorded",
+                job.name,
+                self.lease.total_seconds(),
+            )
+
+        stats = shared_stats()
+        stats.add(f"scheduler.{job.name}.runs")
+        stats.add(f"scheduler.{job.name}.us", elapsed_ns // 1000)
+        stats.add(f"scheduler.{job.name}.lag_ms", int(lag_ms))
+        if error:
+            stats.add(f"scheduler.{job.name}.failures")
+        return JobRun(job.name, started, elapsed_ns / 1_000_000, lag_ms, error)
+
+    def run_forever(self, tick: float, stop: threading.Event | None = None) -> None:
+        """Run due jobs every tick seconds until stop is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            finally:
+                connection.close()
+            stop.wait(tick)
+
+
+@cache
+def scheduler() -> Scheduler:
+    """Return the scheduler for the SCHEDULER_JOBS of this process."""
+    return Scheduler(
+        (Job(name, import_string(path), interval) for name, (path, interval) in settings.SCHEDULER_JOBS.items()),
+        lease=settings.SCHEDULER_LEASE_SECONDS,
+    )
+
+
+def start_in_process() -> threading.Thread | None:
+    """Start the scheduler on a daemon thread when SCHEDULER_IN_PROCESS is on."""
+    if not settings.SCHEDULER_IN_PROCESS:
+        return None
+    thread = threading.Thread(
+        target=scheduler().run_forever, args=(settings.SCHEDULER_TICK,), name="nexxus-scheduler", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def job_status() -> list[dict]:
+    """Return the schedule and last outcome of every job."""
+    return list(
+        ScheduledJob.objects.order_by("name").values(
+            "name", "next_run", "owner", "runs", "failures", "last_started", "last_duration_ms", "last_lag_ms"
+        )
+    )
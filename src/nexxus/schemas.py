@@ -1,6 +1,8 @@
+from datetime import datetime
+
 from ninja import ModelSchema, Schema
 
-from nexxus.models import Server
+from nexxus.models import Blacklist, Server
 
 
 class ServerSchema(ModelSchema):
@@ -33,6 +35,61 @@ class ServerCreateSchema(Schema):
     cs_version: str
 
 
+class HistoryPointSchema(Schema):
+    """Schema for one downsampled statistics bucket."""
+
+    bucket: datetime
+    samples: int
+    players_avg: float
+    players_min: int
+    players_max: int
+    in_bytes: int
+    out_bytes: int
+    uptime: int
+
+
+class FleetStatsSchema(Schema):
+    """Schema for the fleet-wide aggregate statistics."""
+
+    live_servers: int
+    total_players: int
+    in_bytes: int
+    out_bytes: int
+    by_version: dict[str, int]
+    by_codebase: dict[str, int]
+    by_archbase: dict[str, int]
+
+
+class BlacklistSchema(ModelSchema):
+    """Schema for the Blacklist model."""
+
+    class Meta:
+        """Meta options for the BlacklistSchema."""
+
+        model = Blacklist
+        fields = "__all__"
+
+
+class BlacklistEntrySchema(Schema):
+    """Schema for adding one blacklist entry: a hostname, ``*.domain``, IP address or CIDR network."""
+
+    value: str
+
+
+class BlacklistBulkSchema(Schema):
+    """Schema for loading many blacklist entries at once."""
+
+    entries: list[str]
+    replace: bool = False
+
+
+class BlacklistBulkResultSchema(Schema):
+    """Schema for the outcome of a bulk blacklist load."""
+
+    created: int
+    skipped: int
+
+
 class ErrorSchema(Schema):
     """Schema for error responses."""
 
@@ -1,22 +1,44 @@
-import hashlib
-import hmac
+import functools
+import logging
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from typing import ClassVar
 
 from django.conf import settings
 from django.core.cache import cache
 from django.http import HttpRequest, HttpResponse
+from django.utils.module_loading import import_string
 
-from nexxus.models import Blacklist
+from nexxus.blacklist import blacklist_matcher
+from nexxus.clientip import client_ip
+from nexxus.resolver import hostname_resolver, normalize_ip
+from nexxus.sharedstats import shared_stats
+from nexxus.signing import SignatureError, signature_verifier
+from nexxus.validators import ServerValidationError, clean_hostname
 
-# Blacklisted IPs and Hostnames
-BLACKLISTED_IPS = {"192.168.1.100", "2001:db8::ff00:42:8329"}
-BLACKLISTED_HOSTNAMES = {"banned.example.com"}
-API_SECRET_KEY = b"supersecurekey"
+logger = logging.getLogger(__name__)
+
+# Cost tiers a SecurityPipeline orders its checks by, cheapest first.
+COST_MEMORY: int = 0  # Process-local lookups
+COST_CPU: int = 10  # Hashing the request body
+COST_CACHE: int = 20  # A round-trip to the Django cache
+COST_DATABASE: int = 30  # A database query
 
 
 class SecurityCheck(ABC):
     """Abstract base class for security checks."""
 
+    # Relative cost of one validate() call, one of the COST_* tiers.
+    cost: ClassVar[int] = COST_DATABASE
+    # Whether validate() reads request.body, which must then be read before request.POST.
+    reads_body: ClassVar[bool] = False
+
+    @property
+    def name(self) -> str:
+        """Return the name the check's timings and rejections are counted under."""
+        return type(self).__name__
+
     @abstractmethod
     def validate(self, request: HttpRequest) -> HttpResponse | None:
         """Perform a security check. Return HttpResponse if check fails, otherwise None."""
@@ -25,34 +47,77 @@ class SecurityCheck(ABC):
 class IPBlacklistCheck(SecurityCheck):
     """Check if the request comes from a blacklisted IP."""
 
-    def get_client_ip(self, request: HttpRequest) -> str | bool:
-        """Extract the client's IP address from the HTTP request."""
-        ip = request.META.get("HTTP_X_FORWARDED_FOR")
-        ip_address = ip.split(",")[0].strip() if ip else request.META.get("REMOTE_ADDR")
-        return Blacklist.objects.filter(ip_address=ip_address).exists()
+    # The index is in memory, but its generation is read from the cache.
+    cost: ClassVar[int] = COST_CACHE
 
     def validate(self, request: HttpRequest) -> HttpResponse | None:
-        """Validate the incoming request by checking if the client's IP address is blacklisted."""
-        ip = self.get_client_ip(request)
-        if ip:
+        """Reject clients whose address is blacklisted on its own or through a network entry."""
+        if blacklist_matcher().blocks_ip(client_ip(request)):
             return HttpResponse("Forbidden: Blacklisted IP", status=403)
         return None
 
 
+def announced_hostname(request: HttpRequest) -> str:
+    """Return the normalised hostname a heartbeat announces, or "" when it has none or it is invalid."""
+    try:
+        return clean_hostname(request.POST.get("hostname", ""))
+    except ServerValidationError:
+        return ""
+
+
 class HostnameBlacklistCheck(SecurityCheck):
-    """Check if the request comes from a blacklisted hostname."""
+    """Check if the announced server hostname is blacklisted."""
+
+    cost: ClassVar[int] = COST_CACHE
 
     def validate(self, request: HttpRequest) -> HttpResponse | None:
-        """Check if the request originates from a blacklisted hostname."""
-        hostname = request.META.get("HTTP_HOST", "")
-        if Blacklist.objects.filter(hostname=hostname).exists():
+        """Check the hostname submitted in the heartbeat, not the metaserver's own Host header."""
+        if blacklist_matcher().blocks_hostname(announced_hostname(request)):
             return HttpResponse("Forbidden: Blacklisted Hostname", status=403)
         return None
 
 
+class AnnounceVerificationCheck(SecurityCheck):
+    """Check that the announced hostname resolves to the address the heartbeat came from.
+
+    Only cached resolutions are consulted; an unknown hostname is resolved in the
+    background and let through meanwhile. ``ANNOUNCE_VERIFICATION`` selects
+    ``"off"``, ``"log"`` (report mismatches only) or ``"enforce"`` (reject them).
+    """
+
+    cost: ClassVar[int] = COST_MEMORY
+
+    def validate(self, request: HttpRequest) -> HttpResponse | None:
+        """Reject a heartbeat whose hostname is known not to resolve to the client address."""
+        mode = settings.ANNOUNCE_VERIFICATION
+        hostname = announced_hostname(request)
+        address = client_ip(request)
+        if mode == "off" or not hostname or address is None:
+            return None
+
+        announced_ip = normalize_ip(hostname)
+        if announced_ip is not None:
+            addresses = frozenset({announced_ip})
+        else:
+            resolution = hostname_resolver().lookup(hostname)
+            if resolution is None:
+                return None
+            addresses = resolution.addresses
+
+        if address in addresses:
+            return None
+
+        logger.warning("Announced hostname %s does not resolve to client address %s", hostname, address)
+        if mode == "enforce":
+            return HttpResponse("Forbidden: Hostname does not resolve to client address", status=403)
+        return None
+
+
 class APIKeyCheck(SecurityCheck):
     """Ensure the request includes a valid API key."""
 
+    cost: ClassVar[int] = COST_MEMORY
+
     def validate(self, request: HttpRequest) -> HttpResponse | None:
         """Validate the presence and correctness of the API key in the request headers."""
         api_key = request.headers.get("X-API-Key")
@@ -62,32 +127,36 @@ class APIKeyCheck(SecurityCheck):
 
 
 class HMACSignatureCheck(SecurityCheck):
-    """Verify the HMAC signature for request integrity."""
+    """Verify the per-server HMAC signature, timestamp and nonce of a request (see ``nexxus.signing``).
+
+    A heartbeat may only announce the hostname of the key that signed it.
+    """
+
+    # Hashes the body; nonces are also recorded in the cache with HMAC_SHARED_REPLAY_CACHE.
+    cost: ClassVar[int] = COST_CACHE
+    reads_body: ClassVar[bool] = True
 
     def validate(self, request: HttpRequest) -> HttpResponse | None:
-        """Validate the HMAC (Hash-based Message Authentication Code) signature included in the request headers."""
-        signature = request.headers.get("X-Signature")
-        if not signature:
-            return HttpResponse("Unauthorized: Missing Signature", status=401)
-
-        expected_hmac = hmac.new(API_SECRET_KEY, request.body, hashlib.sha256).hexdigest()
-        if not hmac.compare_digest(signature, expected_hmac):
-            return HttpResponse("Unauthorized: Invalid Signature", status=401)
+        """Validate the signature headers against the body."""
+        try:
+            key_id = signature_verifier().verify(request.headers, request.body)
+        except SignatureError as error:
+            return HttpResponse(f"Unauthorized: {error}", status=401)
+
+        hostname = announced_hostname(request)
+        if hostname and hostname != key_id:
+            return HttpResponse("Unauthorized: Key does not match hostname", status=401)
         return None
 
 
 class RateLimitCheck(SecurityCheck):
     """Apply rate limiting to prevent abuse."""
 
-    def get_client_ip(self, request: HttpRequest) -> HttpResponse | None:
-        """Retrieve the IP address of the client from the HTTP request."""
-        ip = request.META.get("HTTP_X_FORWARDED_FOR")
-        return ip.split(",")[0].strip() if ip else request.META.get("REMOTE_ADDR")
+    cost: ClassVar[int] = COST_CACHE
 
     def validate(self, request: HttpRequest) -> HttpResponse | None:
         """Validate the incoming request against the rate limiting policy."""
-        client_ip = self.get_client_ip(request)
-        cache_key = f"rate_limit_{client_ip}"
+        cache_key = f"rate_limit_{client_ip(request)}"
         request_count = cache.get(cache_key, 0)
 
         if request_count > settings.LEGACY_REQUESTS_PER_MINUTE:
@@ -95,3 +164,71 @@ class RateLimitCheck(SecurityCheck):
 
         cache.set(cache_key, request_count + 1, timeout=60)
         return None
+
+
+class SecurityPipeline:
+    """Run security checks cheapest first and stop at the first rejection.
+
+    Checks of equal cost keep their configured order. Every run of a check adds
+    to the shared counters ``security.<check>.calls``, ``.us`` (microseconds
+    spent) and ``.rejected``.
+    """
+
+    def __init__(self, checks: Iterable[SecurityCheck]) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            checks (Iterable[SecurityCheck]): Checks in their configured order
+
+        """
+        self.checks: tuple[SecurityCheck, ...] = tuple(sorted(checks, key=lambda check: check.cost))
+        self.reads_body = any(check.reads_body for check in self.checks)
+
+    def prepare(self, request: HttpRequest) -> None:
+        """Buffer the raw body when a check needs it; call before anything reads request.POST.
+
+        Parsing a multipart request.POST consumes the stream, after which
+        request.body raises RawPostDataException. Read first, the body is kept
+        and request.POST is parsed from the copy.
+        """
+        if self.reads_body:
+            request.body  # noqa: B018
+
+    def run(self, request: HttpRequest) -> HttpResponse | None:
+        """Return the response of the first check that rejects request, or None when all pass."""
+        self.prepare(request)
+        stats = shared_stats()
+        for check in self.checks:
+            start = time.perf_counter_ns()
+            response = check.validate(request)
+            stats.add(f"security.{check.name}.calls")
+            stats.add(f"security.{check.name}.us", (time.perf_counter_ns() - start) // 1000)
+            if response is not None:
+                stats.add(f"security.{check.name}.rejected")
+                return response
+        return None
+
+
+@functools.cache
+def security_pipeline(name: str) -> SecurityPipeline:
+    """Return the pipeline configured as SECURITY_PIPELINES[name], building its checks once per process."""
+    return SecurityPipeline(import_string(path)() for path in settings.SECURITY_PIPELINES[name])
+
+
+def secured(pipeline: str) -> Callable[[Callable[..., object]], Callable[..., object]]:
+    """Decorate a view function or controller route to run a security pipeline first.
+
+    The decorated callable is only called when every check passes; otherwise
+    the rejecting check's response is returned. Works for ``(request, ...)``
+    views and ``(self, request, ...)`` controller methods.
+    """
+
+    def decorator(view: Callable[..., object]) -> Callable[..., object]:
+        @functools.wraps(view)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            request = next(arg for arg in (*args, *kwargs.values()) if isinstance(arg, HttpRequest))
+            return security_pipeline(pipeline).run(request) or view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,245 @@
+"""Counters shared by every worker process through one memory-mapped file.
+
+Each gunicorn worker has its own memory, so plain counters only ever describe
+one process. The registry file holds a table of counter names and one row of
+64-bit counters per worker slot. A worker claims a slot the first time it
+counts something, then increments only its own row: an increment is a dict
+lookup plus an in-memory add, with no lock and no system call. Readers sum the
+rows.
+
+File layout::
+
+    header   magic, slot count, counter count
+    names    counter count x NAME_SIZE bytes, NUL padded
+    pids     slot count x int64, the process that owns each slot
+    counts   slot count x counter count x int64
+
+Registering a new name or claiming a slot takes an ``flock`` on the file; that
+happens once per name and once per process. Threads of one worker share its
+row, so concurrent increments of one counter from two threads can
+occasionally lose an update. These are statistics, not accounting.
+
+Names longer than ``NAME_SIZE`` bytes are stored as a prefix plus a short hash
+of the whole name, so two long names never share a counter. Once the name
+table is full, increments of new names are dropped and logged once per process
+rather than failing the request or job that counted them.
+"""
+
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import IO
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC: bytes = b"NXSTATS1"
+HEADER = struct.Struct("<8sII")
+NAME_SIZE: int = 64
+INT64: int = 8
+# Index of names that did not fit in a full table; add() ignores them.
+DROPPED: int = -1
+# Hex digits of the hash that stands in for the tail of an over-long name.
+NAME_HASH_SIZE: int = 8
+
+
+def stored_name(name: str) -> str:
+    """Return name as kept in the file: unchanged when it fits, else a prefix and a hash of the whole name."""
+    encoded = name.encode()
+    if len(encoded) <= NAME_SIZE:
+        return name
+    digest = hashlib.blake2b(encoded, digest_size=NAME_HASH_SIZE // 2).hexdigest()
+    prefix = encoded[: NAME_SIZE - NAME_HASH_SIZE - 1].decode(errors="ignore")
+    return f"{prefix}~{digest}"
+
+
+class SharedStats:
+    """Fixed-slot, per-worker counters in a shared memory-mapped file."""
+
+    def __init__(self, path: str | Path, max_slots: int, max_counters: int) -> None:
+        """Initialize the registry; the file is opened on first use in each process.
+
+        Args:
+            path (str | Path): Registry file, ideally on tmpfs such as /dev/shm
+            max_slots (int): Worker processes that get a row of their own
+            max_counters (int): Distinct counter names the file can hold
+
+        """
+        self.path = Path(path)
+        self.max_slots = max_slots
+        self.max_counters = max_counters
+        self._names_offset = HEADER.size
+        self._pids_offset = self._names_offset + max_counters * NAME_SIZE
+        self._counts_offset = self._pids_offset + max_slots * INT64
+        self.size = self._counts_offset + max_slots * max_counters * INT64
+
+        self._lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+        self._pids: memoryview | None = None
+        self._counts: memoryview | None = None
+        self._index: dict[str, int] = {}
+        self._row: int | None = None
+        self._full_logged = False
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def create(self) -> None:
+        """Create or reset the file; run once in the master before workers start."""
+        with self._file_lock(), self.path.open("r+b") as file:
+            self._initialize(file)
+        self._index.clear()
+        self._after_fork()
+
+    def add(self, name: str, value: int = 1) -> None:
+        """Add value to the calling worker's counter name; dropped when the name table is full."""
+        index = self._index.get(name)
+        row = self._row
+        if index is None or row is None:
+            index, row = self._prepare(name)
+        if index != DROPPED:
+            self._counts[row + index] += value
+
+    def totals(self) -> dict[str, int]:
+        """Return every counter summed over all worker slots."""
+        self._open()
+        totals: dict[str, int] = {}
+        for index, name in self._names():
+            totals[name] = sum(self._counts[slot * self.max_counters + index] for slot in range(self.max_slots))
+        return totals
+
+    def workers(self) -> dict[int, dict[str, int]]:
+        """Return the non-zero counters of every slot that has been claimed, keyed by owner pid."""
+        self._open()
+        names = self._names()
+        workers: dict[int, dict[str, int]] = {}
+        for slot in range(self.max_slots):
+            pid = self._pids[slot]
+            if pid:
+                row = slot * self.max_counters
+                workers[pid] = {name: self._counts[row + index] for index, name in names if self._counts[row + index]}
+        return workers
+
+    def _prepare(self, name: str) -> tuple[int, int]:
+        """Open the file, claim a slot and register name as needed; the slow path of add()."""
+        self._open()
+        with self._lock:
+            if self._row is None:
+                self._row = self._claim_slot() * self.max_counters
+            index = self._index.get(name)
+            if index is None:
+                index = self._register(name)
+        return index, self._row
+
+    def _open(self) -> None:
+        if self._mmap is not None:
+            return
+        with self._lock:
+            if self._mmap is not None:
+                return
+            with self._file_lock(), self.path.open("r+b") as file:
+                header = file.read(HEADER.size)
+                if header != HEADER.pack(MAGIC, self.max_slots, self.max_counters):
+                    self._initialize(file)
+                self._mmap = mmap.mmap(file.fileno(), self.size)
+            self._pids = memoryview(self._mmap)[self._pids_offset : self._counts_offset].cast("q")
+            self._counts = memoryview(self._mmap)[self._counts_offset :].cast("q")
+
+    def _initialize(self, file: IO[bytes]) -> None:
+        # Zero in place rather than truncating: another process may still have the file mapped.
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, self.max_slots, self.max_counters))
+        file.write(bytes(self.size - HEADER.size))
+        file.truncate(self.size)
+        file.flush()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a+b") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _names(self) -> list[tuple[int, str]]:
+        names = []
+        for index in range(self.max_counters):
+            start = self._names_offset + index * NAME_SIZE
+            raw = self._mmap[start : start + NAME_SIZE].rstrip(b"\0")
+            if not raw:
+                break
+            names.append((index, raw.decode()))
+        return names
+
+    def _register(self, name: str) -> int:
+        """Return the index of name, adding it to the table; DROPPED when the table is full."""
+        stored = stored_name(name)
+        with self._file_lock():
+            names = self._names()
+            for index, existing in names:
+                self._index[existing] = index
+            index = self._index.get(stored)
+            if index is None:
+                index = len(names)
+                if index >= self.max_counters:
+                    self._log_full(name)
+                    index = DROPPED
+                else:
+                    encoded = stored.encode()
+                    start = self._names_offset + index * NAME_SIZE
+                    self._mmap[start : start + len(encoded)] = encoded
+                    self._index[stored] = index
+            self._index[name] = index
+            return index
+
+    def _log_full(self, name: str) -> None:
+        if not self._full_logged:
+            self._full_logged = True
+            logger.error(
+                "Shared stats registry is full (%d counters); dropping %r and any other new counter",
+                self.max_counters,
+                name,
+            )
+
+    def _claim_slot(self) -> int:
+        """Take a free slot, or one whose process has exited; its counts carry over so totals never drop."""
+        pid = os.getpid()
+        with self._file_lock():
+            for slot in range(self.max_slots):
+                owner = self._pids[slot]
+                if owner in (0, pid) or not _alive(owner):
+                    self._pids[slot] = pid
+                    return slot
+        # Every slot is held by a live process: share the last row.
+        return self.max_slots - 1
+
+    def _after_fork(self) -> None:
+        # The mapping is inherited and still shared; only the slot belongs to the parent.
+        self._lock = threading.Lock()
+        self._row = None
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user.
+        return True
+    return True
+
+
+@cache
+def shared_stats() -> SharedStats:
+    """Return the process-wide handle on the shared stats registry."""
+    return SharedStats(settings.STATS_REGISTRY_PATH, settings.STATS_MAX_WORKERS, settings.STATS_MAX_COUNTERS)
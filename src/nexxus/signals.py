@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from nexxus.blacklist import invalidate_blacklist
+from nexxus.cache import bump_generation
+from nexxus.history import record_sample
+from nexxus.models import Blacklist, Server, ServerKey
+from nexxus.signing import signature_verifier
+from nexxus.stats import fleet_stats
+from nexxus.storage import SERVER_FIELDS, changes_listing, live_cutoff
+
+
+@receiver(post_save, sender=Server)
+def invalidate_server_lists(
+    sender: type[Server],  # noqa: ARG001
+    instance: Server,
+    created: bool,  # noqa: FBT001
+    update_fields: frozenset[str] | None,
+    **kwargs: object,  # noqa: ARG001
+) -> None:
+    """Invalidate cached server list bodies when a save changes what they show.
+
+    A heartbeat that only refreshes last_update leaves them cached; the
+    LIST_CACHE_TIMEOUT bounds how stale that column gets.
+    """
+    saved = SERVER_FIELDS if update_fields is None else [Server._meta.get_field(name).attname for name in update_fields]  # noqa: SLF001
+    after = {name: getattr(instance, name) for name in saved}
+    if created or changes_listing(instance.loaded_values, after, live_cutoff()):
+        bump_generation()
+    instance.loaded_values = {**(instance.loaded_values or {}), **after}
+
+
+@receiver(post_delete, sender=Server)
+def invalidate_deleted_server_lists(sender: type[Server], **kwargs: object) -> None:  # noqa: ARG001
+    """Invalidate cached server list bodies whenever a server row is deleted."""
+    bump_generation()
+
+
+@receiver(post_save, sender=Server)
+def record_server_history(sender: type[Server], instance: Server, **kwargs: object) -> None:  # noqa: ARG001
+    """Buffer the saved statistics for the history store."""
+    record_sample(instance)
+
+
+@receiver(post_save, sender=Server)
+def update_fleet_stats(sender: type[Server], instance: Server, **kwargs: object) -> None:  # noqa: ARG001
+    """Apply the saved server's delta to the fleet aggregates."""
+    fleet_stats().apply(instance)
+
+
+@receiver(post_delete, sender=Server)
+def discard_fleet_stats(sender: type[Server], instance: Server, **kwargs: object) -> None:  # noqa: ARG001
+    """Remove a deleted server from the fleet aggregates."""
+    fleet_stats().discard(instance.entry)
+
+
+@receiver(post_save, sender=Blacklist)
+@receiver(post_delete, sender=Blacklist)
+def invalidate_blacklist_index(sender: type[Blacklist], **kwargs: object) -> None:  # noqa: ARG001
+    """Make every worker rebuild its blacklist index whenever an entry changes."""
+    invalidate_blacklist()
+
+
+@receiver(post_save, sender=ServerKey)
+@receiver(post_delete, sender=ServerKey)
+def invalidate_server_key(sender: type[ServerKey], instance: ServerKey, **kwargs: object) -> None:  # noqa: ARG001
+    """Drop a changed key from this process's key cache; other workers pick it up within HMAC_KEY_CACHE_TTL."""
+    signature_verifier().keys.invalidate(instance.key_id)
@@ -0,0 +1,234 @@
+r"""HMAC-signed announces with per-server keys and replay protection.
+
+A signed request carries four headers:
+
+``X-Key-Id``
+    The ``ServerKey.key_id`` (the server's hostname) whose secret signed it.
+``X-Signature-Timestamp``
+    Unix time in seconds; it must lie within ``HMAC_MAX_SKEW`` of ours.
+``X-Signature-Nonce``
+    16 to 64 URL-safe characters, never reused within the skew window.
+``X-Signature``
+    Hex HMAC-SHA256 of ``timestamp + "\n" + nonce + "\n" + body``.
+
+Keys are read through an in-process cache with a TTL and nonces are
+remembered in a bounded in-process set whose entries expire a time bucket at
+a time, so a verified announce costs no database query once its key is cached.
+``HMAC_SHARED_REPLAY_CACHE`` additionally records each nonce in the Django
+cache so a replay sent to another worker is caught too.
+"""
+
+import hashlib
+import hmac
+import re
+import secrets
+import threading
+import time
+from collections.abc import Callable, Mapping
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+
+from nexxus.models import ServerKey
+
+NONCE_RE: re.Pattern[str] = re.compile(r"[A-Za-z0-9_-]{16,64}")
+SHARED_NONCE_PREFIX: str = "nexxus:nonce"
+
+
+class SignatureError(ValueError):
+    """Raised when a signed request must be rejected; the message is safe to return to the client."""
+
+
+def generate_secret() -> str:
+    """Return a new random key secret."""
+    return secrets.token_urlsafe(32)
+
+
+def signature(secret: str, timestamp: str, nonce: str, body: bytes) -> str:
+    """Return the hex HMAC-SHA256 of a request."""
+    message = b"%s\n%s\n%s" % (timestamp.encode(), nonce.encode(), body)
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign(
+    key_id: str, secret: str, body: bytes, timestamp: int | None = None, nonce: str | None = None
+) -> dict[str, str]:
+    """Return the headers that sign body, as a server would send them."""
+    stamp = str(int(time.time()) if timestamp is None else timestamp)
+    nonce = nonce or secrets.token_urlsafe(16)
+    return {
+        "X-Key-Id": key_id,
+        "X-Signature-Timestamp": stamp,
+        "X-Signature-Nonce": nonce,
+        "X-Signature": signature(secret, stamp, nonce, body),
+    }
+
+
+class KeyCache:
+    """Active ServerKey secrets by key id, cached in process for a TTL, misses included."""
+
+    def __init__(self, load: Callable[[str], str | None], ttl: float, max_entries: int) -> None:
+        """Initialize the cache.
+
+        Args:
+            load (Callable[[str], str | None]): Return the active secret of a key id, or None
+            ttl (float): Seconds a loaded secret, or its absence, is trusted
+            max_entries (int): Key ids kept; the oldest are evicted first
+
+        """
+        self.load = load
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[str | None, float]] = {}
+
+    def get(self, key_id: str) -> str | None:
+        """Return the secret of key_id, loading it when missing or expired."""
+        now = time.monotonic()
+        entry = self._entries.get(key_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        secret = self.load(key_id)
+        with self._lock:
+            self._entries.pop(key_id, None)
+            while len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key_id] = (secret, now + self.ttl)
+        return secret
+
+    def invalidate(self, key_id: str | None = None) -> None:
+        """Forget one key id, or every key when key_id is None."""
+        with self._lock:
+            if key_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key_id, None)
+
+
+def load_secret(key_id: str) -> str | None:
+    """Return the secret of the active key key_id from the database."""
+    return ServerKey.objects.filter(key_id=key_id, active=True).values_list("secret", flat=True).first()
+
+
+class ReplayCache:
+    """Nonces seen within the skew window, grouped into time buckets that expire whole.
+
+    A nonce is filed under the bucket of its timestamp. Buckets older than the
+    window are dropped as time moves on, so memory is bounded by the announce
+    rate over the window, and by max_nonces in any case.
+    """
+
+    def __init__(self, window: int, bucket_seconds: int, max_nonces: int) -> None:
+        """Initialize the cache.
+
+        Args:
+            window (int): Seconds a timestamp may differ from now, either way
+            bucket_seconds (int): Width of one expiry bucket
+            max_nonces (int): Nonces remembered at most; new ones are refused beyond it
+
+        """
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self.max_nonces = max_nonces
+        self._lock = threading.Lock()
+        self._buckets: dict[int, set[str]] = {}
+        self._size = 0
+
+    def add(self, nonce: str, timestamp: int, now: float | None = None) -> bool:
+        """Record nonce and return True, or return False when it was already seen.
+
+        Raises:
+            SignatureError: When the cache is full.
+
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if any(nonce in bucket for bucket in self._buckets.values()):
+                return False
+            if self._size >= self.max_nonces:
+                msg = "Replay cache full, try again later"
+                raise SignatureError(msg)
+            self._buckets.setdefault(timestamp // self.bucket_seconds, set()).add(nonce)
+            self._size += 1
+            return True
+
+    def __len__(self) -> int:
+        """Return the number of nonces remembered."""
+        return self._size
+
+    def _expire(self, now: float) -> None:
+        oldest = int(now - self.window) // self.bucket_seconds
+        for bucket in [bucket for bucket in self._buckets if bucket < oldest]:
+            self._size -= len(self._buckets.pop(bucket))
+
+
+class SignatureVerifier:
+    """Verify signed requests against cached per-server keys."""
+
+    def __init__(self, keys: KeyCache, replay: ReplayCache, max_skew: int, *, shared_replay: bool) -> None:
+        """Initialize the verifier.
+
+        Args:
+            keys (KeyCache): Where secrets are looked up
+            replay (ReplayCache): Where nonces are remembered
+            max_skew (int): Seconds a timestamp may differ from now, either way
+            shared_replay (bool): Also record nonces in the Django cache, across workers
+
+        """
+        self.keys = keys
+        self.replay = replay
+        self.max_skew = max_skew
+        self.shared_replay = shared_replay
+
+    def verify(self, headers: Mapping[str, str], body: bytes, now: float | None = None) -> str:
+        """Check a request's signature headers and return its key id.
+
+        Raises:
+            SignatureError: When the signature is missing, invalid, stale or replayed.
+
+        """
+        key_id = headers.get("X-Key-Id", "")
+        stamp = headers.get("X-Signature-Timestamp", "")
+        nonce = headers.get("X-Signature-Nonce", "")
+        provided = headers.get("X-Signature", "")
+        if not (key_id and stamp and nonce and provided):
+            msg = "Missing Signature"
+            raise SignatureError(msg)
+
+        now = time.time() if now is None else now
+        if not stamp.isdigit() or abs(now - int(stamp)) > self.max_skew:
+            msg = "Stale Signature"
+            raise SignatureError(msg)
+        if not NONCE_RE.fullmatch(nonce):
+            msg = "Invalid Nonce"
+            raise SignatureError(msg)
+
+        secret = self.keys.get(key_id)
+        if secret is None or not hmac.compare_digest(provided, signature(secret, stamp, nonce, body)):
+            msg = "Invalid Signature"
+            raise SignatureError(msg)
+
+        # Only verified requests reach the replay cache, so forged ones cannot fill it.
+        if not self.replay.add(nonce, int(stamp), now) or (
+            self.shared_replay and not django_cache.add(f"{SHARED_NONCE_PREFIX}:{nonce}", 1, timeout=2 * self.max_skew)
+        ):
+            msg = "Replayed Signature"
+            raise SignatureError(msg)
+        return key_id
+
+
+@cache
+def signature_verifier() -> SignatureVerifier:
+    """Return the process-wide signature verifier."""
+    return SignatureVerifier(
+        KeyCache(load_secret, ttl=settings.HMAC_KEY_CACHE_TTL, max_entries=settings.HMAC_KEY_CACHE_MAX_ENTRIES),
+        ReplayCache(
+            window=settings.HMAC_MAX_SKEW,
+            bucket_seconds=settings.HMAC_REPLAY_BUCKET_SECONDS,
+            max_nonces=settings.HMAC_REPLAY_MAX_NONCES,
+        ),
+        settings.HMAC_MAX_SKEW,
+        shared_replay=settings.HMAC_SHARED_REPLAY_CACHE,
+    )
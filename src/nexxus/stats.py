@@ -0,0 +1,187 @@
+"""Fleet-wide aggregate statistics maintained incrementally.
+
+Totals and per-version/codebase/archbase counts are updated with deltas from
+each saved or deleted server and from expiry of servers that stop sending
+heartbeats, instead of running GROUP BY queries over ``servers`` per request.
+The aggregates are seeded from the database once per process and re-seeded
+every ``FLEET_STATS_RESYNC_INTERVAL`` seconds so writes handled by other
+workers are picked up.
+
+The aggregates are per worker process. A worker applies deltas only for the
+writes it handles itself, so two workers can answer differently until their
+next re-seed, by at most the writes of one resync interval. Sharing a running
+total would need each server's previous contribution on whichever worker
+takes its next heartbeat, and no worker has that.
+"""
+
+import heapq
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+
+from django.conf import settings
+from django.utils import timezone
+
+from nexxus.models import Server
+
+UNKNOWN: str = "unknown"
+
+CONTRIBUTION_FIELDS: tuple[str, ...] = (
+    "entry",
+    "num_players",
+    "in_bytes",
+    "out_bytes",
+    "version",
+    "codebase",
+    "archbase",
+    "last_update",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Contribution:
+    """What one live server adds to the fleet aggregates."""
+
+    players: int
+    in_bytes: int
+    out_bytes: int
+    version: str
+    codebase: str
+    archbase: str
+    expires_at: float
+
+    @classmethod
+    def from_values(cls, values: dict, timeout: int) -> "Contribution":
+        """Build a contribution from a Server row or ``values()`` dict."""
+        last_update: datetime = values["last_update"] or timezone.now()
+        return cls(
+            players=values["num_players"] or 0,
+            in_bytes=values["in_bytes"] or 0,
+            out_bytes=values["out_bytes"] or 0,
+            version=values["version"] or UNKNOWN,
+            codebase=values["codebase"] or UNKNOWN,
+            archbase=values["archbase"] or UNKNOWN,
+            expires_at=last_update.timestamp() + timeout,
+        )
+
+
+class FleetStats:
+    """Running totals over every live server, updated by delta."""
+
+    def __init__(self, timeout: int, resync_interval: float) -> None:
+        """Initialize empty, unseeded aggregates.
+
+        Args:
+            timeout (int): Seconds after its last update a server stops counting (LAST_UPDATE_TIMEOUT)
+            resync_interval (float): Seconds between re-seeds from the database
+
+        """
+        self.timeout = timeout
+        self.resync_interval = resync_interval
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._servers: dict[int, Contribution] = {}
+        self._expiry: list[tuple[float, int]] = []
+        self.players = 0
+        self.in_bytes = 0
+        self.out_bytes = 0
+        self.by_version: Counter[str] = Counter()
+        self.by_codebase: Counter[str] = Counter()
+        self.by_archbase: Counter[str] = Counter()
+        self.seeded_at: float | None = None
+
+    def reset(self) -> None:
+        """Drop every aggregate; the next read re-seeds from the database."""
+        with self._lock:
+            self._clear()
+
+    def _add(self, entry: int, contribution: Contribution) -> None:
+        self._servers[entry] = contribution
+        self.players += contribution.players
+        self.in_bytes += contribution.in_bytes
+        self.out_bytes += contribution.out_bytes
+        self.by_version[contribution.version] += 1
+        self.by_codebase[contribution.codebase] += 1
+        self.by_archbase[contribution.archbase] += 1
+        heapq.heappush(self._expiry, (contribution.expires_at, entry))
+
+    def _remove(self, entry: int) -> None:
+        contribution = self._servers.pop(entry, None)
+        if contribution is None:
+            return
+        self.players -= contribution.players
+        self.in_bytes -= contribution.in_bytes
+        self.out_bytes -= contribution.out_bytes
+        for counter, key in (
+            (self.by_version, contribution.version),
+            (self.by_codebase, contribution.codebase),
+            (self.by_archbase, contribution.archbase),
+        ):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+
+    def seed(self) -> None:
+        """Rebuild the aggregates from the live rows of the servers table."""
+        now = time.time()
+        cutoff = timezone.now() - timedelta(seconds=self.timeout)
+        rows = Server.objects.filter(last_update__gt=cutoff).values(*CONTRIBUTION_FIELDS)
+        contributions = {row["entry"]: Contribution.from_values(row, self.timeout) for row in rows}
+        with self._lock:
+            self._clear()
+            for entry, contribution in contributions.items():
+                self._add(entry, contribution)
+            self.seeded_at = now
+
+    def apply(self, server: Server) -> None:
+        """Replace a server's contribution with the values it was just saved with."""
+        values = {name: getattr(server, name) for name in CONTRIBUTION_FIELDS}
+        contribution = Contribution.from_values(values, self.timeout)
+        with self._lock:
+            if self.seeded_at is None:
+                return
+            self._remove(server.entry)
+            self._add(server.entry, contribution)
+
+    def discard(self, entry: int) -> None:
+        """Remove a deleted server's contribution."""
+        with self._lock:
+            self._remove(entry)
+
+    def expire(self, now: float) -> None:
+        """Remove servers whose last heartbeat is older than the timeout."""
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, entry = heapq.heappop(self._expiry)
+                current = self._servers.get(entry)
+                # Heap entries left behind by later heartbeats are skipped.
+                if current is not None and current.expires_at == expires_at:
+                    self._remove(entry)
+
+    def snapshot(self) -> dict:
+        """Return the current aggregates, seeding or re-seeding first when due."""
+        now = time.time()
+        if self.seeded_at is None or now - self.seeded_at >= self.resync_interval:
+            self.seed()
+        self.expire(now)
+        with self._lock:
+            return {
+                "live_servers": len(self._servers),
+                "total_players": self.players,
+                "in_bytes": self.in_bytes,
+                "out_bytes": self.out_bytes,
+                "by_version": dict(self.by_version),
+                "by_codebase": dict(self.by_codebase),
+                "by_archbase": dict(self.by_archbase),
+            }
+
+
+@cache
+def fleet_stats() -> FleetStats:
+    """Return the process-wide fleet aggregates."""
+    return FleetStats(timeout=settings.LAST_UPDATE_TIMEOUT, resync_interval=settings.FLEET_STATS_RESYNC_INTERVAL)
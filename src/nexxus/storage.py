@@ -0,0 +1,451 @@
+"""Where heartbeats are written to and the live server lists are read from.
+
+``SERVER_STORAGE`` selects the backend behind the heartbeat and list views:
+
+``nexxus.storage.DatabaseStorage``
+    Every heartbeat is an ``update_or_create`` on ``servers`` and every list
+    is read from it. This is the default.
+``nexxus.storage.MemoryStorage``
+    Heartbeats and list reads use a registry in each worker, split into
+    ``SERVER_STORAGE_SHARDS`` shards by a hash of the hostname so concurrent
+    heartbeats rarely wait on the same lock. Changed servers are written to
+    ``servers`` in bulk every ``SERVER_STORAGE_PERSIST_INTERVAL`` seconds, and
+    the registry re-reads the live rows every ``SERVER_STORAGE_RESYNC_INTERVAL``
+    seconds to pick up servers announced to other workers, the v3 API or the
+    prober. A crash loses at most one persist interval of heartbeats.
+
+Either way the ``servers`` table stays the durable record that the admin,
+the prober and the other workers read. The list caches are invalidated when
+a write changes what the lists show, per heartbeat with ``DatabaseStorage``
+and once per persist or resync with ``MemoryStorage``. A heartbeat that only
+refreshes ``last_update`` of a listed server does not count: the lists keep
+serving the cached body and ``LIST_CACHE_TIMEOUT`` bounds how stale that
+timestamp gets, so a live fleet does not invalidate them continuously.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import cache
+from typing import Any, Self
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from nexxus.cache import bump_generation
+from nexxus.history import record_sample
+from nexxus.models import Server
+from nexxus.stats import fleet_stats
+
+logger = logging.getLogger(__name__)
+
+# Columns of a live server row, in the order meta_client.php prints them.
+LIST_FIELDS: tuple[str, ...] = (
+    "hostname",
+    "port",
+    "html_comment",
+    "text_comment",
+    "archbase",
+    "mapbase",
+    "codebase",
+    "flags",
+    "num_players",
+    "in_bytes",
+    "out_bytes",
+    "uptime",
+    "version",
+    "sc_version",
+    "cs_version",
+    "last_update",
+)
+# Columns whose change alters what a list shows: the printed ones except
+# last_update, and reachability, which HIDE_UNREACHABLE_SERVERS filters on.
+LISTING_FIELDS: tuple[str, ...] = (*(name for name in LIST_FIELDS if name != "last_update"), "reachable")
+# Every column of a server, as the v3 API and the exports return it.
+SERVER_FIELDS: tuple[str, ...] = tuple(field.attname for field in Server._meta.concrete_fields)  # noqa: SLF001
+# Columns held in a registry row; entry and reachability are kept beside it.
+REGISTRY_FIELDS: tuple[str, ...] = tuple(name for name in SERVER_FIELDS if name not in {"entry", "reachable"})
+# Columns only the prober writes, which a reload takes even for servers with pending heartbeats.
+PROBE_FIELDS: tuple[str, ...] = ("rtt_ms", "last_probe")
+# Columns a persisted heartbeat overwrites on an existing row.
+PERSIST_FIELDS: tuple[str, ...] = tuple(name for name in LIST_FIELDS if name not in {"hostname", "port"})
+PERSIST_BATCH_SIZE: int = 1000
+
+ServerKey = tuple[str, int]
+
+
+def live_cutoff() -> datetime:
+    """Return the oldest last_update a server may have and still be listed."""
+    return timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT)
+
+
+def changes_listing(before: Mapping[str, Any] | None, after: Mapping[str, Any], cutoff: datetime) -> bool:
+    """Return whether a server going from before to after changes the server lists.
+
+    That is the case for a new server (before is None), one that was not live
+    at cutoff, and one whose LISTING_FIELDS differ; columns missing from after
+    are unchanged.
+    """
+    if before is None or before.get("last_update") is None or before["last_update"] <= cutoff:
+        return True
+    return any(name in after and before.get(name) != after[name] for name in LISTING_FIELDS)
+
+
+class ServerStorage(ABC):
+    """Backend the heartbeat and list views store and read servers through."""
+
+    @classmethod
+    def from_settings(cls) -> Self:
+        """Return a backend configured from the SERVER_STORAGE_* settings."""
+        return cls()
+
+    @abstractmethod
+    def save_heartbeat(self, hostname: str, port: int, fields: Mapping[str, Any]) -> tuple[dict[str, Any], bool]:
+        """Store a decoded heartbeat and return the server as a SERVER_FIELDS dict and whether it was new."""
+
+    @abstractmethod
+    def live_servers(self, fields: Sequence[str] = LIST_FIELDS) -> Iterable[dict[str, Any]]:
+        """Return the listed servers updated within LAST_UPDATE_TIMEOUT as dicts of fields, by hostname and port."""
+
+
+class DatabaseStorage(ServerStorage):
+    """Read and write the servers table directly."""
+
+    def save_heartbeat(self, hostname: str, port: int, fields: Mapping[str, Any]) -> tuple[dict[str, Any], bool]:
+        """Update or create the server row."""
+        server, created = Server.objects.update_or_create(hostname=hostname, port=port, defaults=fields)
+        return {name: getattr(server, name) for name in SERVER_FIELDS}, created
+
+    def live_servers(self, fields: Sequence[str] = LIST_FIELDS) -> QuerySet[Server, dict[str, Any]]:
+        """Return a values() queryset, so pagination counts and slices in SQL."""
+        return (
+            Server.objects.filter(last_update__gt=live_cutoff()).listed().values(*fields).order_by("hostname", "port")
+        )
+
+
+@dataclass(slots=True)
+class RegistryEntry:
+    """One server held in the registry."""
+
+    row: dict[str, Any]
+    entry: int | None = None
+    reachable: bool | None = None
+
+    def listing(self) -> dict[str, Any]:
+        """Return the row with reachable, the columns changes_listing compares."""
+        return {**self.row, "reachable": self.reachable}
+
+    def project(self, fields: Sequence[str]) -> dict[str, Any]:
+        """Return a new dict of the given columns, entry and reachable included."""
+        return {
+            name: self.entry if name == "entry" else self.reachable if name == "reachable" else self.row[name]
+            for name in fields
+        }
+
+
+@dataclass(slots=True, eq=False)
+class Shard:
+    """A slice of the registry with its own lock."""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    servers: dict[ServerKey, RegistryEntry] = field(default_factory=dict)
+    # Servers changed since they were last written to the database.
+    dirty: set[ServerKey] = field(default_factory=set)
+    # Whether any of those changes alters the server lists (see changes_listing).
+    relisted: bool = False
+
+
+class ServerRegistry:
+    """Live servers partitioned into shards by a stable hash of the hostname."""
+
+    def __init__(self, shards: int) -> None:
+        """Initialize an empty registry.
+
+        Args:
+            shards (int): Number of independently locked partitions
+
+        """
+        self.shards: tuple[Shard, ...] = tuple(Shard() for _ in range(shards))
+
+    def shard(self, hostname: str) -> Shard:
+        """Return the shard hostname belongs to; every port of a host shares one."""
+        return self.shards[zlib.crc32(hostname.encode()) % len(self.shards)]
+
+    def __len__(self) -> int:
+        """Return the number of servers held."""
+        return sum(len(shard.servers) for shard in self.shards)
+
+    def upsert(self, hostname: str, port: int, fields: Mapping[str, Any], now: datetime) -> tuple[dict[str, Any], bool]:
+        """Apply a heartbeat and return the server as a SERVER_FIELDS dict and whether it was not held yet."""
+        key = (hostname, port)
+        shard = self.shard(hostname)
+        cutoff = now - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT)
+        with shard.lock:
+            item = shard.servers.get(key)
+            created = item is None
+            shard.relisted = shard.relisted or changes_listing(None if item is None else item.row, fields, cutoff)
+            if item is None:
+                row = dict.fromkeys(REGISTRY_FIELDS)
+                row.update(fields, hostname=hostname, port=port, last_update=now)
+                item = shard.servers[key] = RegistryEntry(row)
+            else:
+                item.row.update(fields, last_update=now)
+            shard.dirty.add(key)
+            return item.project(SERVER_FIELDS), created
+
+    def live(
+        self, cutoff: datetime, *, hide_unreachable: bool, fields: Sequence[str] = LIST_FIELDS
+    ) -> list[dict[str, Any]]:
+        """Return the fields of the servers updated after cutoff, ordered by hostname and port."""
+        rows: list[dict[str, Any]] = []
+        for shard in self.shards:
+            with shard.lock:
+                rows.extend(
+                    item.project(fields)
+                    for item in shard.servers.values()
+                    if item.row["last_update"] > cutoff and not (hide_unreachable and item.reachable is False)
+                )
+        rows.sort(key=lambda row: (row["hostname"], row["port"]))
+        return rows
+
+    def take_dirty(self) -> list[RegistryEntry]:
+        """Return copies of every changed server and mark them clean."""
+        taken: list[RegistryEntry] = []
+        for shard in self.shards:
+            with shard.lock:
+                for key in shard.dirty:
+                    item = shard.servers[key]
+                    taken.append(RegistryEntry(dict(item.row), item.entry, item.reachable))
+                shard.dirty.clear()
+        return taken
+
+    def take_relisted(self) -> bool:
+        """Return whether any change since the last call alters the server lists, and reset that."""
+        relisted = False
+        for shard in self.shards:
+            with shard.lock:
+                relisted = relisted or shard.relisted
+                shard.relisted = False
+        return relisted
+
+    def mark_dirty(self, items: Iterable[RegistryEntry]) -> None:
+        """Queue servers whose write failed for the next persist."""
+        for item in items:
+            shard = self.shard(item.row["hostname"])
+            with shard.lock:
+                if (item.row["hostname"], item.row["port"]) in shard.servers:
+                    shard.dirty.add((item.row["hostname"], item.row["port"]))
+
+    def set_entries(self, entries: Mapping[ServerKey, int | None]) -> None:
+        """Record the primary keys of freshly inserted rows."""
+        for (hostname, port), entry in entries.items():
+            if entry is None:
+                continue
+            shard = self.shard(hostname)
+            with shard.lock:
+                item = shard.servers.get((hostname, port))
+                if item is not None:
+                    item.entry = entry
+
+    def replace(self, rows: Iterable[dict[str, Any]]) -> int:
+        """Rebuild the registry from live database rows and return how many servers changed the lists.
+
+        Servers with unpersisted heartbeats keep them and only take the row's
+        entry and reachability; every other server takes the database row, and
+        servers no longer live there are dropped. Rows that differ only in
+        columns the lists do not depend on, such as last_update, are taken but
+        not counted.
+        """
+        cutoff = live_cutoff()
+        incoming: dict[Shard, dict[ServerKey, RegistryEntry]] = {shard: {} for shard in self.shards}
+        for row in rows:
+            entry, reachable = row.pop("entry"), row.pop("reachable")
+            incoming[self.shard(row["hostname"])][row["hostname"], row["port"]] = RegistryEntry(row, entry, reachable)
+
+        changed = 0
+        for shard, fresh in incoming.items():
+            with shard.lock:
+                for key in shard.dirty:
+                    item = shard.servers[key]
+                    if key in fresh:
+                        item.entry = item.entry or fresh[key].entry
+                        item.reachable = fresh[key].reachable
+                        item.row.update({name: fresh[key].row[name] for name in PROBE_FIELDS})
+                    fresh[key] = item
+                changed += sum(
+                    1
+                    for key, item in fresh.items()
+                    if key not in shard.dirty
+                    and (
+                        key not in shard.servers
+                        or changes_listing(shard.servers[key].listing(), item.listing(), cutoff)
+                    )
+                )
+                changed += sum(1 for key in shard.servers if key not in fresh)
+                shard.servers = fresh
+        return changed
+
+
+class MemoryStorage(ServerStorage):
+    """Serve heartbeats and lists from a sharded in-process registry, persisting it periodically."""
+
+    def __init__(
+        self, shards: int, persist_interval: float, resync_interval: float, *, background: bool = True
+    ) -> None:
+        """Initialize the storage; the registry is loaded from the database on first use.
+
+        Args:
+            shards (int): Registry partitions
+            persist_interval (float): Seconds between writes of changed servers to the database
+            resync_interval (float): Seconds between reloads of the live servers from the database
+            background (bool): Persist from a daemon thread; otherwise persist() must be called
+
+        """
+        self.registry = ServerRegistry(shards)
+        self.persist_interval = persist_interval
+        self.resync_interval = resync_interval
+        self.background = background
+        self.synced_at: float | None = None
+        self._lock = threading.Lock()
+        # Held while the registry is written or reloaded, so a reload never sees half a persist.
+        self._sync_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_settings(cls) -> Self:
+        """Return a storage configured from the SERVER_STORAGE_* settings."""
+        return cls(
+            shards=settings.SERVER_STORAGE_SHARDS,
+            persist_interval=settings.SERVER_STORAGE_PERSIST_INTERVAL,
+            resync_interval=settings.SERVER_STORAGE_RESYNC_INTERVAL,
+            background=settings.SERVER_STORAGE_BACKGROUND_PERSIST,
+        )
+
+    def save_heartbeat(self, hostname: str, port: int, fields: Mapping[str, Any]) -> tuple[dict[str, Any], bool]:
+        """Apply the heartbeat to the registry; the database and the list caches see it at the next persist.
+
+        A server first seen here has no entry until it is persisted.
+        """
+        self.ensure_synced()
+        row, created = self.registry.upsert(hostname, port, fields, timezone.now())
+        if self.background:
+            self.start()
+        return row, created
+
+    def live_servers(self, fields: Sequence[str] = LIST_FIELDS) -> list[dict[str, Any]]:
+        """Return the live servers from the registry."""
+        self.ensure_synced()
+        return self.registry.live(live_cutoff(), hide_unreachable=settings.HIDE_UNREACHABLE_SERVERS, fields=fields)
+
+    def ensure_synced(self) -> None:
+        """Load the registry on first use and reload it once the resync interval has passed."""
+        if self.synced_at is None or time.monotonic() - self.synced_at >= self.resync_interval:
+            self.resync()
+
+    def resync(self) -> int:
+        """Reload the live servers from the database and return how many changed."""
+        with self._sync_lock:
+            rows = Server.objects.filter(last_update__gt=live_cutoff()).values("entry", "reachable", *REGISTRY_FIELDS)
+            changed = self.registry.replace(rows)
+            self.synced_at = time.monotonic()
+        if changed:
+            bump_generation()
+        return changed
+
+    def persist(self) -> int:
+        """Write every changed server to the database in bulk and return how many were written.
+
+        Servers are matched to existing rows by hostname and port, updated with
+        ``bulk_update`` and otherwise inserted with ``bulk_create``. On failure
+        they stay queued for the next attempt.
+        """
+        with self._sync_lock:
+            items = self.registry.take_dirty()
+            if not items:
+                return 0
+            try:
+                servers = self._write(items)
+            except Exception:
+                self.registry.mark_dirty(items)
+                raise
+            self.registry.set_entries({(server.hostname, server.port): server.entry for server in servers})
+
+        # Bulk writes send no signals: invalidate the list caches once for the
+        # whole batch if it changed them, and feed history and the fleet aggregates here.
+        if self.registry.take_relisted():
+            bump_generation()
+        for server in servers:
+            if server.entry is None:
+                continue
+            record_sample(server)
+            fleet_stats().apply(server)
+        return len(servers)
+
+    def _write(self, items: list[RegistryEntry]) -> list[Server]:
+        servers = [Server(entry=item.entry, **item.row) for item in items]
+        with transaction.atomic():
+            unknown = [server for server in servers if server.entry is None]
+            if unknown:
+                existing = self._entries_of(unknown)
+                for server in unknown:
+                    server.entry = existing.get((server.hostname, server.port))
+
+            Server.objects.bulk_update(
+                [server for server in servers if server.entry is not None],
+                PERSIST_FIELDS,
+                batch_size=PERSIST_BATCH_SIZE,
+            )
+            new = [server for server in servers if server.entry is None]
+            Server.objects.bulk_create(new, batch_size=PERSIST_BATCH_SIZE)
+            if new and not connection.features.can_return_rows_from_bulk_insert:
+                created = self._entries_of(new)
+                for server in new:
+                    server.entry = created.get((server.hostname, server.port))
+        return servers
+
+    @staticmethod
+    def _entries_of(servers: list[Server]) -> dict[ServerKey, int]:
+        """Return the entry of the lowest-numbered row of each server's hostname and port."""
+        rows = (
+            Server.objects.filter(hostname__in={server.hostname for server in servers})
+            .order_by("-entry")
+            .values_list("hostname", "port", "entry")
+        )
+        return {(hostname, port): entry for hostname, port, entry in rows}
+
+    def start(self) -> None:
+        """Start the background persister for this process if it is not running yet."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="nexxus-storage", daemon=True)
+            self._thread.start()
+        atexit.register(self._persist_safely)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.persist_interval)
+            self._persist_safely()
+
+    def _persist_safely(self) -> None:
+        try:
+            self.persist()
+        except Exception:
+            logger.exception("Failed to persist the server registry")
+        finally:
+            connection.close()
+
+
+@cache
+def server_storage() -> ServerStorage:
+    """Return the process-wide SERVER_STORAGE backend."""
+    return import_string(settings.SERVER_STORAGE).from_settings()
@@ -0,0 +1,31 @@
+"""Periodic jobs run by the scheduler; see SCHEDULER_JOBS."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from nexxus import history, prober
+from nexxus.models import Server
+
+
+def rollup_history() -> dict[str, int]:
+    """Flush this process's buffered samples, refresh the rollups and prune expired history."""
+    history.history_buffer().flush()
+    counts = history.rollup_all()
+    counts.update(history.prune())
+    return counts
+
+
+def probe_servers() -> int:
+    """Probe every live server and return how many were probed."""
+    return len(prober.probe_servers())
+
+
+def expire_servers() -> int:
+    """Delete servers silent for longer than SERVER_RETENTION_DAYS and return how many were deleted."""
+    if settings.SERVER_RETENTION_DAYS is None:
+        return 0
+    cutoff = timezone.now() - timedelta(days=settings.SERVER_RETENTION_DAYS)
+    _total, deleted = Server.objects.filter(last_update__lt=cutoff).delete()
+    return deleted.get(Server._meta.label, 0)  # noqa: SLF001
@@ -0,0 +1,84 @@
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+
+import pytest
+from django.conf import Settings
+from django.core.cache import cache
+
+from nexxus.blacklist import blacklist_matcher
+from nexxus.fleet import generate_fleet
+from nexxus.history import history_buffer
+from nexxus.sharedstats import shared_stats
+from nexxus.signing import signature_verifier
+from nexxus.stats import fleet_stats
+from nexxus.tests.querybudget import QueryBudget, QueryUsage
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> None:
+    """Start every test with an empty cache so cached list bodies never leak between tests."""
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def history_in_foreground(settings: Settings) -> None:
+    """Keep history writes on the test thread and start each test with an empty buffer."""
+    settings.HISTORY_BACKGROUND_FLUSH = False
+    history_buffer().drain()
+
+
+@pytest.fixture(autouse=True)
+def reset_fleet_stats() -> None:
+    """Forget aggregates built from rows of previous, rolled back tests."""
+    fleet_stats().reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_blacklist_matcher() -> None:
+    """Forget the blacklist index built from rows of previous, rolled back tests."""
+    blacklist_matcher().reset()
+
+
+@pytest.fixture(autouse=True)
+def announce_verification_off(settings: Settings) -> None:
+    """Keep heartbeat tests from resolving real hostnames; verification tests turn it back on."""
+    settings.ANNOUNCE_VERIFICATION = "off"
+
+
+@pytest.fixture(autouse=True)
+def isolated_shared_stats(settings: Settings, tmp_path_factory: pytest.TempPathFactory) -> None:
+    """Count into a fresh registry file instead of the one in the system temp directory."""
+    settings.STATS_REGISTRY_PATH = str(tmp_path_factory.getbasetemp() / "nexxus-stats")
+    shared_stats.cache_clear()
+    shared_stats().create()
+
+
+@pytest.fixture(autouse=True)
+def fresh_signature_verifier() -> None:
+    """Start every test with empty key and replay caches."""
+    signature_verifier.cache_clear()
+
+
+@pytest.fixture
+def server_fleet(db: None) -> Callable[..., int]:  # noqa: ARG001
+    """Return a function that inserts a deterministic synthetic fleet and returns the number of rows added."""
+
+    def make(count: int, seed: int = 0, **kwargs: object) -> int:
+        return max(generate_fleet(count, seed, **kwargs), default=0)
+
+    return make
+
+
+@pytest.fixture
+def query_budget(request: pytest.FixtureRequest) -> Callable[..., AbstractContextManager[QueryUsage]]:
+    """Return a context manager factory asserting a block's query and wall-time budget.
+
+    Arguments default to those of the test's ``query_budget`` marker.
+    """
+    marker = request.node.get_closest_marker("query_budget")
+    defaults = marker.kwargs if marker else {}
+
+    def budget(**kwargs: object) -> AbstractContextManager[QueryUsage]:
+        return QueryBudget(**(defaults | kwargs)).measure()
+
+    return budget
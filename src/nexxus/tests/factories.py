@@ -1,7 +1,9 @@
 import factory
 from faker import Faker
 
+from nexxus.fleet import FLEET_CHUNK_SIZE, build_fleet
 from nexxus.models import Blacklist, Server
+from nexxus.transfer import bulk_create_as_given
 
 fake = Faker()
 
@@ -43,3 +45,12 @@ class ServerFactory(factory.django.DjangoModelFactory):
     def as_dict(cls, **kwargs):
         """Return a dictionary of all fields for use in tests."""
         return factory.build(dict, FACTORY_CLASS=cls, **kwargs)
+
+    @classmethod
+    def create_fleet(cls, count: int, seed: int = 0, **kwargs: object) -> list[Server]:
+        """Bulk-insert count deterministic servers from ``nexxus.fleet``; kwargs override every row."""
+        servers = list(build_fleet(count, seed, start=Server.objects.count()))
+        for server in servers:
+            for name, value in kwargs.items():
+                setattr(server, name, value)
+        return list(bulk_create_as_given(Server, servers, FLEET_CHUNK_SIZE))
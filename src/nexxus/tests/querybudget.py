@@ -0,0 +1,79 @@
+"""Query and wall-time budgets for endpoint tests.
+
+Wrap the request under test in the ``query_budget`` fixture::
+
+    def test_update(query_budget):
+        with query_budget(reads=1, writes=1, ms=250):
+            client.post(...)
+
+or declare the budget on the test and call the fixture without arguments::
+
+    @pytest.mark.query_budget(reads=1, writes=1)
+    def test_update(query_budget):
+        with query_budget():
+            client.post(...)
+
+Only the statements run inside the block count. Savepoints and other
+transaction bookkeeping are ignored; ``INSERT``, ``UPDATE``, ``DELETE`` and
+``REPLACE`` are writes and everything else is a read. A block that goes over
+budget fails the test with the captured SQL.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+WRITE_VERBS: tuple[str, ...] = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+IGNORED_VERBS: tuple[str, ...] = ("SAVEPOINT", "RELEASE", "ROLLBACK", "BEGIN", "COMMIT")
+
+
+@dataclass
+class QueryUsage:
+    """What a budgeted block actually ran."""
+
+    reads: list[str] = field(default_factory=list)
+    writes: list[str] = field(default_factory=list)
+    ms: float = 0.0
+
+    def record(self, sql: str) -> None:
+        """File one executed statement as a read or a write."""
+        verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if verb in IGNORED_VERBS:
+            return
+        (self.writes if verb in WRITE_VERBS else self.reads).append(sql)
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """The most reads, writes and milliseconds a block may use; None leaves a limit unchecked."""
+
+    reads: int | None = None
+    writes: int | None = None
+    ms: float | None = None
+
+    @contextmanager
+    def measure(self) -> Iterator[QueryUsage]:
+        """Run the block, then fail the test if it went over budget."""
+        usage = QueryUsage()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            yield usage
+            usage.ms = (time.perf_counter() - start) * 1000
+        for query in context.captured_queries:
+            usage.record(query["sql"])
+
+        problems = [
+            f"{len(statements)} {kind} over a budget of {limit}"
+            for kind, statements, limit in (("reads", usage.reads, self.reads), ("writes", usage.writes, self.writes))
+            if limit is not None and len(statements) > limit
+        ]
+        if self.ms is not None and usage.ms > self.ms:
+            problems.append(f"{usage.ms:.1f} ms over a budget of {self.ms} ms")
+        if problems:
+            executed = "\n".join(f"  {sql}" for sql in usage.reads + usage.writes)
+            pytest.fail(f"Query budget exceeded: {'; '.join(problems)}\n{executed}")
@@ -0,0 +1,135 @@
+import ipaddress
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.conf import Settings
+from django.test import Client
+from django.urls import reverse
+from pytest_mock import MockerFixture
+
+from nexxus.admission import AdmissionController, ingest_controller
+from nexxus.models import Server
+
+
+@pytest.fixture
+def controller() -> AdmissionController:
+    """Return a controller with one slot and no queue."""
+    return AdmissionController("test", max_in_flight=1, max_queue=0, queue_timeout=0.01, retry_after=7)
+
+
+class TestAdmissionController:
+    """Unit tests for AdmissionController."""
+
+    def test_admits_within_limit(self, controller: AdmissionController) -> None:
+        """An idle controller admits and releases the slot afterwards."""
+        with controller.admit() as admitted:
+            assert admitted
+            assert controller.snapshot()["in_flight"] == 1
+        assert controller.snapshot()["in_flight"] == 0
+        assert controller.snapshot()["admitted"] == 1
+
+    def test_sheds_when_saturated(self, controller: AdmissionController) -> None:
+        """With the slot taken and no queue, the next operation is shed."""
+        assert controller.try_acquire()
+        assert not controller.try_acquire()
+        assert controller.snapshot()["shed"] == 1
+        controller.release()
+        assert controller.try_acquire()
+
+    def test_queued_operation_gets_released_slot(self) -> None:
+        """A queued operation takes the slot once the running one finishes."""
+        controller = AdmissionController("test", max_in_flight=1, max_queue=1, queue_timeout=5, retry_after=7)
+        assert controller.try_acquire()
+        threading.Timer(0.05, controller.release).start()
+        assert controller.try_acquire()
+        assert controller.snapshot()["peak_queued"] == 1
+        assert controller.snapshot()["shed"] == 0
+
+    def test_per_client_cap(self) -> None:
+        """A client at its cap is shed while other clients still get the free slots."""
+        controller = AdmissionController(
+            "test", max_in_flight=3, max_queue=0, queue_timeout=0.01, retry_after=7, max_per_client=1
+        )
+        assert controller.try_acquire("192.0.2.1")
+        assert not controller.try_acquire("192.0.2.1")
+        assert controller.try_acquire("192.0.2.2")
+        assert controller.snapshot()["shed_per_client"] == 1
+
+        controller.release("192.0.2.1")
+        assert controller.try_acquire("192.0.2.1")
+
+    def test_per_client_place_is_freed_when_shed_globally(self, controller: AdmissionController) -> None:
+        """A client shed by the global limit does not keep counting against its own cap."""
+        controller.max_per_client = 1
+        assert controller.try_acquire("192.0.2.1")
+        assert not controller.try_acquire("192.0.2.2")
+        controller.release("192.0.2.1")
+        assert controller.try_acquire("192.0.2.2")
+        assert controller.snapshot()["clients"] == 1
+
+    def test_overloaded_response(self, controller: AdmissionController) -> None:
+        """Shed requests get 503 with Retry-After."""
+        response = controller.overloaded_response()
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "7"
+
+
+@pytest.mark.django_db
+class TestIngestAdmission:
+    """Functional tests for admission control on the write endpoints."""
+
+    def test_heartbeat_shed_when_saturated(self, mocker: MockerFixture) -> None:
+        """meta_update.php returns 503 and writes nothing when the controller sheds."""
+        mocker.patch.object(ingest_controller(), "try_acquire", return_value=False)
+        response = Client().post(reverse("legacy_update"), data={"hostname": "busy", "port": "1234"})
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert "Retry-After" in response
+        assert not Server.objects.filter(hostname="busy").exists()
+
+    def test_reads_are_not_shed(self, mocker: MockerFixture) -> None:
+        """List reads bypass the ingest controller."""
+        mocker.patch.object(ingest_controller(), "try_acquire", return_value=False)
+        assert Client().get(reverse("legacy_client")).status_code == HTTPStatus.OK
+
+    def test_heartbeat_shed_per_client(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A client already holding its share of slots gets 503 while others are admitted."""
+        controller = ingest_controller()
+        monkeypatch.setattr(controller, "max_per_client", 1)
+        controller.try_acquire(ipaddress.ip_address("192.0.2.1"))
+        try:
+            busy = Client(REMOTE_ADDR="192.0.2.1").post(
+                reverse("legacy_update"), data={"hostname": "busy", "port": "1"}
+            )
+            other = Client(REMOTE_ADDR="192.0.2.2").post(reverse("legacy_update"), data={"hostname": "ok", "port": "1"})
+        finally:
+            controller.release(ipaddress.ip_address("192.0.2.1"))
+
+        assert busy.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+        assert other.status_code == HTTPStatus.CREATED
+
+    def test_one_host_may_send_concurrent_heartbeats(self) -> None:
+        """By default a host running several servers is not shed for a second heartbeat in flight."""
+        controller = ingest_controller()
+        controller.try_acquire(ipaddress.ip_address("192.0.2.1"))
+        try:
+            second = Client(REMOTE_ADDR="192.0.2.1").post(
+                reverse("legacy_update"), data={"hostname": "multi", "port": "2"}
+            )
+        finally:
+            controller.release(ipaddress.ip_address("192.0.2.1"))
+
+        assert second.status_code == HTTPStatus.CREATED
+
+    def test_metrics_endpoint(self, settings: Settings) -> None:
+        """The metrics endpoint reports ingest counters to holders of ADMIN_API_KEY."""
+        settings.ADMIN_API_KEY = "metrics-key"
+        response = Client().get("/v3/api/metrics", headers={"X-API-Key": "metrics-key"})
+        assert response.status_code == HTTPStatus.OK
+        assert {"in_flight", "queued", "shed"} <= set(response.json()["ingest"])
+
+    def test_metrics_require_api_key(self, settings: Settings) -> None:
+        """Without the key, or while it is unset, the metrics are not served."""
+        assert Client().get("/v3/api/metrics").status_code == HTTPStatus.FORBIDDEN
+        settings.ADMIN_API_KEY = "metrics-key"
+        assert Client().get("/v3/api/metrics", headers={"X-API-Key": "wrong"}).status_code == HTTPStatus.FORBIDDEN
@@ -1,10 +1,17 @@
+import json
+from collections.abc import Callable
+from datetime import timedelta
 from http import HTTPStatus
 
 import factory
+import msgpack
 import pytest
 from django.test import Client
+from django.utils import timezone
 from faker import Faker
 
+from nexxus.blacklist import blacklist_matcher
+from nexxus.heartbeat import heartbeat_fields
 from nexxus.models import Server
 from nexxus.tests.factories import ServerFactory
 
@@ -42,6 +49,18 @@ class TestNexxusController:
         assert server1.entry in entries
         assert server2.entry in entries
 
+    def test_get_servers_includes_stale_servers(self) -> None:
+        """Should list servers past LAST_UPDATE_TIMEOUT unless only live ones are asked for."""
+        live = ServerFactory()
+        stale = ServerFactory()
+        Server.objects.filter(entry=stale.entry).update(last_update=timezone.now() - timedelta(days=1))
+
+        every = {server["entry"] for server in self.client.get(self.list_url).json()}
+        only_live = {server["entry"] for server in self.client.get(self.list_url, {"live": "true"}).json()}
+
+        assert every == {live.entry, stale.entry}
+        assert only_live == {live.entry}
+
     def test_get_server_valid_entry(self) -> None:
         """Should return a single server with valid entry."""
         server = ServerFactory()
@@ -73,6 +92,36 @@ class TestNexxusController:
         response = self.client.patch(self.patch_url, data=payload, content_type="application/json")
         assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
+    def test_create_server_invalid_hostname(self) -> None:
+        """Should return 400 when the hostname fails the shared hostname validator."""
+        payload = factory.build(dict, FACTORY_CLASS=ServerFactory)
+        payload["hostname"] = "bad host!"
+        response = self.client.patch(self.patch_url, data=payload, content_type="application/json")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert "message" in response.json()
+        assert not Server.objects.filter(hostname="bad host!").exists()
+
+    def test_create_server_truncates_and_clamps_like_heartbeats(self) -> None:
+        """Should store over-long strings truncated and over-large counters clamped, as meta_update.php does."""
+        payload = factory.build(dict, FACTORY_CLASS=ServerFactory)
+        payload.update({"text_comment": "x" * 1000, "uptime": 10**12})
+
+        response = self.client.patch(self.patch_url, data=payload, content_type="application/json")
+
+        assert response.status_code == HTTPStatus.CREATED
+        server = Server.objects.get(hostname=payload["hostname"])
+        assert len(server.text_comment) == Server._meta.get_field("text_comment").max_length  # noqa: SLF001
+        uptime = next(spec for spec in heartbeat_fields() if spec.name == "uptime")
+        assert server.uptime == min(10**12, uptime.max_value)
+
+    def test_create_server_rejects_negative_counters(self) -> None:
+        """Should return 400 for counters the heartbeat decoder rejects."""
+        payload = factory.build(dict, FACTORY_CLASS=ServerFactory)
+        payload["num_players"] = -1
+        response = self.client.patch(self.patch_url, data=payload, content_type="application/json")
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not Server.objects.filter(hostname=payload["hostname"]).exists()
+
     def test_create_server_updates_existing(self) -> None:
         """Should update existing server with same hostname and port."""
         # Create an instance of the server and save it to the database
@@ -104,3 +153,94 @@ class TestNexxusController:
         assert server.port == payload["port"]
         assert server.flags == payload["flags"]
         assert server.version == payload["version"]
+
+    def test_get_servers_ndjson(self) -> None:
+        """Should stream one JSON object per line when NDJSON is requested."""
+        servers = ServerFactory.create_batch(3)
+        response = self.client.get(self.list_url, headers={"accept": "application/x-ndjson"})
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        assert sorted(row["entry"] for row in rows) == sorted(server.entry for server in servers)
+        assert set(rows[0]) == set(self.client.get(self.list_url).json()[0])
+
+    def test_get_servers_columnar(self) -> None:
+        """Should return a shared header of field names and one array per server."""
+        server = ServerFactory()
+        response = self.client.get(self.list_url, headers={"accept": "application/vnd.nexxus.columnar+json"})
+        assert response.status_code == HTTPStatus.OK
+        document = json.loads(b"".join(response.streaming_content))
+        assert len(document["rows"]) == 1
+        row = dict(zip(document["fields"], document["rows"][0], strict=True))
+        assert row["entry"] == server.entry
+        assert row["hostname"] == server.hostname
+
+    def test_get_servers_msgpack(self) -> None:
+        """Should stream the field names and then one array per server, with datetimes as ISO strings."""
+        server = ServerFactory()
+        response = self.client.get(self.list_url, headers={"accept": "application/msgpack"})
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == "application/msgpack"
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(b"".join(response.streaming_content))
+        fields, *rows = list(unpacker)
+        assert len(rows) == 1
+        row = dict(zip(fields, rows[0], strict=True))
+        assert row == self.client.get(self.list_url).json()[0]
+        assert row["hostname"] == server.hostname
+
+    def test_get_servers_prefers_json_on_tie(self) -> None:
+        """Should keep the default JSON array when it is accepted as strongly as NDJSON."""
+        ServerFactory()
+        response = self.client.get(self.list_url, headers={"accept": "application/json, application/x-ndjson"})
+        assert response.status_code == HTTPStatus.OK
+        assert isinstance(response.json(), list)
+
+
+@pytest.mark.django_db
+class TestNexxusControllerQueryBudgets:
+    """Query budgets of the v3 API endpoints; raise one only with a reason."""
+
+    @pytest.fixture(autouse=True)
+    def setup_method(self) -> None:
+        """Seed a fleet and build the blacklist index, which is loaded once per change, not per request."""
+        self.client = Client()
+        self.servers = ServerFactory.create_fleet(50)
+        blacklist_matcher().current()
+
+    @pytest.mark.query_budget(reads=1, writes=0, ms=500)
+    @pytest.mark.parametrize(
+        "accept",
+        [
+            "application/json",
+            "application/x-ndjson",
+            "application/vnd.nexxus.columnar+json",
+            "application/msgpack",
+        ],
+    )
+    def test_list_servers(self, accept: str, query_budget: Callable) -> None:
+        """Should read the whole list in one query in every representation."""
+        with query_budget():
+            response = self.client.get("/v3/api/servers", headers={"accept": accept})
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+
+        assert response.status_code == HTTPStatus.OK
+        assert self.servers[0].hostname.encode() in body
+
+    @pytest.mark.query_budget(reads=1, writes=0, ms=500)
+    def test_get_server(self, query_budget: Callable) -> None:
+        """Should read a single server in one query."""
+        with query_budget():
+            response = self.client.get(f"/v3/api/servers/{self.servers[0].entry}")
+
+        assert response.status_code == HTTPStatus.OK
+
+    @pytest.mark.query_budget(reads=1, writes=1, ms=500)
+    def test_create_server(self, query_budget: Callable) -> None:
+        """Should look the server up once and write it once."""
+        payload = factory.build(dict, FACTORY_CLASS=ServerFactory)
+
+        with query_budget():
+            response = self.client.patch("/v3/api/servers", data=payload, content_type="application/json")
+
+        assert response.status_code == HTTPStatus.CREATED
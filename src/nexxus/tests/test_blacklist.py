@@ -0,0 +1,150 @@
+import ipaddress
+import json
+
+import pytest
+from django.conf import Settings
+from django.test import Client
+
+from nexxus.blacklist import BlacklistEntryError, BlacklistIndex, IntervalSet, bulk_load, parse_entry
+from nexxus.models import Blacklist
+
+API_KEY = "blacklist-test-key"
+
+
+@pytest.fixture
+def api_key(settings: Settings) -> dict[str, str]:
+    """Configure ADMIN_API_KEY and return the header that carries it."""
+    settings.ADMIN_API_KEY = API_KEY
+    return {"X-API-Key": API_KEY}
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("10.1.2.7/24", {"network": "10.1.2.0/24"}),
+        ("2001:DB8::/32", {"network": "2001:db8::/32"}),
+        ("10.1.2.3/32", {"ip_address": "10.1.2.3"}),
+        (" 192.0.2.1 ", {"ip_address": "192.0.2.1"}),
+        ("::ffff:192.0.2.1", {"ip_address": "192.0.2.1"}),
+        ("*.Spam.Example", {"hostname": "*.spam.example"}),
+        ("Banned.Example.com", {"hostname": "banned.example.com"}),
+    ],
+)
+def test_parse_entry(value: str, expected: dict[str, str]) -> None:
+    """Test that values are classified and normalised."""
+    assert parse_entry(value) == expected
+
+
+@pytest.mark.parametrize("value", ["10.0.0.0/33", "bad host", "*.", ""])
+def test_parse_entry_rejects(value: str) -> None:
+    """Test that malformed values raise BlacklistEntryError."""
+    with pytest.raises(BlacklistEntryError):
+        parse_entry(value)
+
+
+def test_interval_set_merges_and_bisects() -> None:
+    """Test that overlapping and adjacent intervals merge and membership uses the merged bounds."""
+    intervals = IntervalSet([(10, 20), (21, 25), (15, 18), (40, 50)])
+
+    assert len(intervals) == 2
+    assert [value in intervals for value in (9, 10, 25, 26, 39, 40, 50, 51)] == [
+        False,
+        True,
+        True,
+        False,
+        False,
+        True,
+        True,
+        False,
+    ]
+
+
+def test_index_matches_families_separately() -> None:
+    """Test that IPv4 and IPv6 ranges never match addresses of the other family."""
+    index = BlacklistIndex.build([(None, None, "0.0.0.0/8"), (None, "2001:db8::1", None)])
+
+    assert index.blocks_ip(ipaddress.ip_address("0.1.2.3"))
+    assert not index.blocks_ip(ipaddress.ip_address("::1"))
+    assert index.blocks_ip(ipaddress.ip_address("2001:db8::1"))
+    assert not index.blocks_ip(ipaddress.ip_address("2001:db8::2"))
+
+
+@pytest.mark.django_db
+def test_bulk_load_skips_existing_and_duplicates() -> None:
+    """Test that existing entries and repeats within the batch are skipped."""
+    Blacklist.objects.create(network="198.51.100.0/24")
+
+    created, skipped = bulk_load(["198.51.100.0/24", "198.51.100.9/24", "*.spam.example", "192.0.2.1"])
+
+    assert (created, skipped) == (2, 1)
+    assert Blacklist.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_bulk_load_is_all_or_nothing() -> None:
+    """Test that one invalid value stops the whole load."""
+    with pytest.raises(BlacklistEntryError, match="not an address"):
+        bulk_load(["192.0.2.1", "not an address"])
+
+    assert not Blacklist.objects.exists()
+
+
+@pytest.mark.django_db
+def test_api_requires_key(client: Client, settings: Settings) -> None:
+    """Test that the blacklist routes refuse requests while no or a wrong key is sent."""
+    assert client.get("/v3/api/blacklist").status_code == 403
+
+    settings.ADMIN_API_KEY = API_KEY
+    assert client.get("/v3/api/blacklist", headers={"X-API-Key": "wrong"}).status_code == 403
+
+
+@pytest.mark.django_db
+def test_api_bulk_load(client: Client, api_key: dict[str, str]) -> None:
+    """Test the bulk endpoint and that its entries take effect for heartbeats."""
+    entries = [f"10.{index}.0.0/16" for index in range(200)]
+    response = client.post(
+        "/v3/api/blacklist/bulk",
+        data=json.dumps({"entries": entries}),
+        content_type="application/json",
+        headers=api_key,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"created": 200, "skipped": 0}
+
+    heartbeat = client.post("/meta_update.php", {"hostname": "cf.example.org", "port": 13327}, REMOTE_ADDR="10.150.3.4")
+    assert heartbeat.status_code == 403
+
+
+@pytest.mark.django_db
+def test_api_bulk_load_reports_invalid(client: Client, api_key: dict[str, str]) -> None:
+    """Test that invalid entries are reported with 400 and nothing is stored."""
+    response = client.post(
+        "/v3/api/blacklist/bulk",
+        data=json.dumps({"entries": ["192.0.2.1", "999.1.1.1/8"]}),
+        content_type="application/json",
+        headers=api_key,
+    )
+
+    assert response.status_code == 400
+    assert "999.1.1.1/8" in response.json()["message"]
+    assert not Blacklist.objects.exists()
+
+
+@pytest.mark.django_db
+def test_api_add_list_and_delete(client: Client, api_key: dict[str, str]) -> None:
+    """Test adding, listing and removing single entries."""
+    response = client.post(
+        "/v3/api/blacklist",
+        data=json.dumps({"value": "*.Spam.Example"}),
+        content_type="application/json",
+        headers=api_key,
+    )
+    assert response.status_code == 201
+    entry = response.json()
+    assert entry["hostname"] == "*.spam.example"
+
+    assert [row["entry"] for row in client.get("/v3/api/blacklist", headers=api_key).json()] == [entry["entry"]]
+
+    assert client.delete(f"/v3/api/blacklist/{entry['entry']}", headers=api_key).status_code == 204
+    assert not Blacklist.objects.exists()
@@ -0,0 +1,75 @@
+import ipaddress
+from collections.abc import Iterator
+
+import pytest
+from django.conf import Settings
+from django.http import HttpRequest, HttpResponse
+from django.test import RequestFactory
+
+from nexxus.clientip import ClientIPMiddleware, client_ip, resolve_client_ip, trusted_proxies
+from nexxus.throttling import ClientIPAnonRateThrottle
+
+
+@pytest.fixture(autouse=True)
+def proxies(settings: Settings) -> Iterator[None]:
+    """Trust a loopback and a private proxy network."""
+    settings.TRUSTED_PROXIES = ["127.0.0.1/32", "10.0.0.0/8"]
+    trusted_proxies.cache_clear()
+    yield
+    trusted_proxies.cache_clear()
+
+
+@pytest.mark.parametrize(
+    ("remote_addr", "forwarded_for", "expected"),
+    [
+        # Direct connection: the header is the client's own claim and is ignored.
+        ("198.51.100.7", "203.0.113.1", "198.51.100.7"),
+        # Through traefik.
+        ("10.0.0.2", "203.0.113.1", "203.0.113.1"),
+        # A spoofed leftmost hop is skipped: the trusted proxy appended the real one.
+        ("10.0.0.2", "1.2.3.4, 203.0.113.1", "203.0.113.1"),
+        # Chained trusted proxies.
+        ("127.0.0.1", "203.0.113.1, 10.0.0.9", "203.0.113.1"),
+        # Every hop trusted: the leftmost is as far as we can see.
+        ("10.0.0.2", "10.1.1.1", "10.1.1.1"),
+        # Garbage stops the walk at the last proxy that wrote a valid hop.
+        ("10.0.0.2", "203.0.113.1, not-an-ip", "10.0.0.2"),
+        ("10.0.0.2", " ::ffff:203.0.113.1 ", "203.0.113.1"),
+        ("10.0.0.2", None, "10.0.0.2"),
+        ("unix-socket", "203.0.113.1", None),
+    ],
+)
+def test_resolve_client_ip(remote_addr: str, forwarded_for: str | None, expected: str | None) -> None:
+    """Test that only hops written by trusted proxies are believed."""
+    result = resolve_client_ip(remote_addr, forwarded_for)
+    assert result == (ipaddress.ip_address(expected) if expected else None)
+
+
+def test_middleware_caches_on_request(rf: RequestFactory) -> None:
+    """Test that the middleware stores the parsed address for the rest of the request."""
+    seen: list[object] = []
+
+    def view(request: HttpRequest) -> HttpResponse:
+        seen.append(request.client_ip)
+        return HttpResponse()
+
+    request = rf.get("/", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="203.0.113.5")
+    ClientIPMiddleware(view)(request)
+
+    assert seen == [ipaddress.ip_address("203.0.113.5")]
+    assert client_ip(request) is seen[0]
+
+
+def test_client_ip_without_middleware(rf: RequestFactory) -> None:
+    """Test that client_ip() resolves and caches when the middleware did not run."""
+    request = rf.get("/", REMOTE_ADDR="192.0.2.8")
+
+    assert client_ip(request) == ipaddress.ip_address("192.0.2.8")
+    assert request.client_ip == ipaddress.ip_address("192.0.2.8")
+
+
+def test_throttle_ident_uses_client_ip(rf: RequestFactory) -> None:
+    """Test that throttles key anonymous callers by the resolved address, not the raw header."""
+    request = rf.get("/", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="1.2.3.4, 203.0.113.9")
+
+    assert ClientIPAnonRateThrottle().get_ident(request) == "203.0.113.9"
@@ -0,0 +1,116 @@
+import gzip
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from nexxus.cache import get_generation
+from nexxus.compression import MIN_COMPRESS_SIZE, PrecompressedBody, parse_qvalue_header
+from nexxus.tests.factories import ServerFactory
+
+BODY = b"START_SERVER_DATA\nhostname=example.com\nEND_SERVER_DATA\n" * 20
+
+
+class TestParseQvalueHeader:
+    """Unit tests for parse_qvalue_header."""
+
+    def test_plain_list(self) -> None:
+        """Codings without parameters default to q=1."""
+        assert parse_qvalue_header("gzip, br") == {"gzip": 1.0, "br": 1.0}
+
+    def test_quality_values(self) -> None:
+        """Explicit q-values are parsed, malformed ones treated as refused."""
+        assert parse_qvalue_header("gzip;q=0.5, br;q=0, zstd;q=abc") == {"gzip": 0.5, "br": 0.0, "zstd": 0.0}
+
+
+class TestPrecompressedBody:
+    """Unit tests for PrecompressedBody."""
+
+    def test_small_bodies_are_not_compressed(self) -> None:
+        """Bodies under MIN_COMPRESS_SIZE are stored raw only."""
+        body = PrecompressedBody.build(b"x" * (MIN_COMPRESS_SIZE - 1), "text/plain")
+        assert body.encoded == {}
+        assert body.negotiate("gzip") == (None, body.content)
+
+    def test_gzip_variant_round_trips(self) -> None:
+        """The stored gzip variant decompresses to the raw body."""
+        body = PrecompressedBody.build(BODY, "text/plain")
+        coding, data = body.negotiate("gzip")
+        assert coding == "gzip"
+        assert gzip.decompress(data) == BODY
+
+    def test_prefers_highest_quality(self) -> None:
+        """The client's q-values win over server preference order."""
+        body = PrecompressedBody.build(BODY, "text/plain")
+        coding, _ = body.negotiate("br;q=0.1, gzip;q=0.9")
+        assert coding == "gzip"
+
+    def test_refused_codings_fall_back_to_identity(self) -> None:
+        """q=0 for every coding serves the raw body."""
+        body = PrecompressedBody.build(BODY, "text/plain")
+        assert body.negotiate("gzip;q=0, *;q=0") == (None, BODY)
+
+    def test_variants_are_built_on_first_use(self) -> None:
+        """Only the negotiated coding is compressed; plain requests compress nothing."""
+        body = PrecompressedBody(BODY, "text/plain")
+
+        assert body.negotiate("") == (None, BODY)
+        assert body.encoded == {}
+        coding, _ = body.negotiate("gzip")
+        assert coding == "gzip"
+        assert list(body.encoded) == ["gzip"]
+
+
+@pytest.mark.django_db
+class TestPrecompressedViews:
+    """Functional tests for the cached, pre-compressed list views."""
+
+    def test_legacy_client_serves_gzip(self) -> None:
+        """meta_client.php honours Accept-Encoding and varies on it."""
+        server = ServerFactory()
+        client = Client()
+
+        response = client.get(reverse("legacy_client"), headers={"accept-encoding": "gzip"})
+
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert server.hostname in gzip.decompress(response.content).decode()
+
+    def test_cached_body_keeps_built_variants(self) -> None:
+        """A variant compressed for one request is stored with the body and served to the next."""
+        ServerFactory()
+        client = Client()
+
+        client.get(reverse("legacy_client"))
+        first = client.get(reverse("legacy_client"), headers={"accept-encoding": "gzip"})
+        cached = cache.get(f"nexxus:body:legacy_client:{get_generation()}:")
+
+        assert list(cached.encoded) == ["gzip"]
+        assert client.get(reverse("legacy_client"), headers={"accept-encoding": "gzip"}).content == first.content
+
+    def test_write_invalidates_cached_body(self) -> None:
+        """A new server shows up on the next request even though the body was cached."""
+        client = Client()
+        client.get(reverse("legacy_html"))
+
+        server = ServerFactory()
+        response = client.get(reverse("legacy_html"))
+
+        assert server.hostname in response.content.decode()
+
+    def test_heartbeat_refreshing_last_update_keeps_cached_body(self) -> None:
+        """A heartbeat that changes no listed column leaves the cached body in place."""
+        client = Client()
+        heartbeat = {"hostname": "steady.example.org", "port": "13327", "num_players": "2"}
+        client.post(reverse("legacy_update"), data=heartbeat)
+        client.get(reverse("legacy_client"))
+        generation = get_generation()
+
+        client.post(reverse("legacy_update"), data=heartbeat)
+        assert get_generation() == generation
+
+        client.post(reverse("legacy_update"), data={**heartbeat, "num_players": "3"})
+        assert get_generation() == generation + 1
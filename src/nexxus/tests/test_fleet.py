@@ -0,0 +1,94 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.utils import timezone
+
+from nexxus.fleet import build_fleet, generate_fleet
+from nexxus.models import Server
+from nexxus.tests.factories import ServerFactory
+
+FIELDS = ("hostname", "port", "html_comment", "text_comment", "num_players", "version", "flags")
+
+
+def snapshot(servers: list[Server]) -> list[tuple]:
+    """Return the generated attributes of servers, without the time-dependent last_update."""
+    return [tuple(getattr(server, field) for field in FIELDS) for server in servers]
+
+
+def test_build_fleet_is_deterministic() -> None:
+    """Test that the same seed yields the same fleet and another seed a different one."""
+    first = snapshot(list(build_fleet(50, seed=7)))
+
+    assert first == snapshot(list(build_fleet(50, seed=7)))
+    assert first != snapshot(list(build_fleet(50, seed=8)))
+
+
+def test_build_fleet_hostnames_are_unique_and_valid() -> None:
+    """Test that hostnames are distinct and every value fits its column."""
+    servers = list(build_fleet(5000))
+
+    assert len({server.hostname for server in servers}) == 5000
+    for server in servers[:100]:
+        server.full_clean(exclude=["last_update"])
+
+
+def test_build_fleet_live_fraction() -> None:
+    """Test that roughly live_fraction of the servers have a recent heartbeat."""
+    cutoff = timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT)
+
+    servers = list(build_fleet(2000, live_fraction=0.25))
+
+    live = sum(server.last_update >= cutoff for server in servers)
+    assert 400 < live < 600
+
+
+@pytest.mark.django_db
+def test_generate_fleet_inserts_in_chunks() -> None:
+    """Test that rows are inserted chunk by chunk with their generated last_update kept."""
+    assert list(generate_fleet(250, live_fraction=0, chunk_size=100)) == [100, 200, 250]
+
+    assert Server.objects.count() == 250
+    cutoff = timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT)
+    assert not Server.objects.filter(last_update__gte=cutoff).exists()
+
+
+@pytest.mark.django_db
+def test_generate_fleet_appends_or_replaces() -> None:
+    """Test that a second run adds distinct hostnames and replace starts over."""
+    list(generate_fleet(10))
+    list(generate_fleet(10))
+    assert Server.objects.values("hostname").distinct().count() == 20
+
+    list(generate_fleet(5, replace=True))
+    assert Server.objects.count() == 5
+
+
+def test_server_fleet_fixture(server_fleet) -> None:
+    """Test that the fixture inserts the fleet and reports its size."""
+    assert server_fleet(30, seed=3) == 30
+    assert Server.objects.count() == 30
+
+
+@pytest.mark.django_db
+def test_factory_create_fleet_overrides() -> None:
+    """Test that the factory bulk-creates a fleet with overridden fields."""
+    servers = ServerFactory.create_fleet(20, num_players=5)
+
+    assert len(servers) == 20
+    assert set(Server.objects.values_list("num_players", flat=True)) == {5}
+
+
+@pytest.mark.django_db
+def test_seed_fleet_command() -> None:
+    """Test that the command seeds the requested fleet and validates its options."""
+    out = StringIO()
+    call_command("seed_fleet", count=40, seed=1, chunk_size=15, stdout=out)
+
+    assert Server.objects.count() == 40
+    assert "Seeded 40 servers" in out.getvalue()
+
+    with pytest.raises(CommandError):
+        call_command("seed_fleet", count=1, live_fraction=2, stdout=StringIO())
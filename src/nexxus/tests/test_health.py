@@ -0,0 +1,61 @@
+import json
+from collections.abc import Callable
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+
+from nexxus.health import ReadinessProbe, readiness_probe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness() -> None:
+    """Start each test without a cached readiness result."""
+    readiness_probe().reset()
+
+
+def test_health_check_skips_sessions_and_database(django_assert_num_queries: Callable) -> None:
+    """Test that the liveness probe is answered without touching the database or setting cookies."""
+    with django_assert_num_queries(0):
+        response = Client().get("/healthcheck/")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == b"OK"
+    assert not response.cookies
+
+
+def test_readiness_reports_dependencies() -> None:
+    """Test that the readiness probe checks the database and cache."""
+    response = Client().get("/readiness/")
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.content) == {"ready": True, "checks": {"database": "ok", "cache": "ok"}}
+
+
+def test_readiness_result_is_cached(django_assert_num_queries: Callable) -> None:
+    """Test that repeated probes within the interval reuse the first result."""
+    client = Client()
+    client.get("/readiness/")
+
+    with django_assert_num_queries(0):
+        response = client.get("/readiness/")
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_readiness_probe_reports_failures() -> None:
+    """Test that a failing check is reported and re-run once the interval expires."""
+    calls = []
+
+    def failing() -> None:
+        calls.append(1)
+        msg = "down"
+        raise ConnectionError(msg)
+
+    probe = ReadinessProbe({"database": failing}, interval=0)
+
+    assert probe.results() == {"database": "ConnectionError: down"}
+    probe.results()
+    assert len(calls) == 2
@@ -0,0 +1,55 @@
+import pytest
+from django.http import QueryDict
+
+from nexxus.heartbeat import HeartbeatError, decode_heartbeat, heartbeat_fields
+from nexxus.models import Server
+
+
+def test_field_table_matches_model() -> None:
+    """Every editable Server field except the primary key is decoded."""
+    names = [spec.name for spec in heartbeat_fields()]
+    assert "entry" not in names
+    assert "last_update" not in names
+    assert {"hostname", "port", "html_comment", "num_players", "cs_version"} <= set(names)
+
+
+def test_decodes_and_coerces() -> None:
+    """Strings are stripped, counters converted and absent counters default to 0."""
+    data = QueryDict("hostname=+example.com+&port=13327&num_players=7&version=1.75.0")
+    decoded = decode_heartbeat(data)
+    assert decoded["hostname"] == "example.com"
+    assert decoded["port"] == 13327
+    assert decoded["num_players"] == 7
+    assert decoded["uptime"] == 0
+    assert decoded["version"] == "1.75.0"
+
+
+def test_truncates_to_max_length() -> None:
+    """Over-long strings are cut to the model column length."""
+    max_length = Server._meta.get_field("text_comment").max_length  # noqa: SLF001
+    decoded = decode_heartbeat({"hostname": "example.com", "port": "13327", "text_comment": "x" * 1000})
+    assert len(decoded["text_comment"]) == max_length
+
+
+def test_clamps_counters_to_column_range() -> None:
+    """Counters beyond the integer column range are clamped instead of failing the insert."""
+    decoded = decode_heartbeat({"hostname": "example.com", "port": "13327", "in_bytes": "9" * 30})
+    assert decoded["in_bytes"] == max(spec.max_value for spec in heartbeat_fields() if spec.name == "in_bytes")
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        ({"hostname": "example.com"}, "Missing required fields hostname and/or port"),
+        ({"hostname": "  ", "port": "13327"}, "Missing required fields hostname and/or port"),
+        ({"hostname": "h" * 81, "port": "13327"}, "Invalid hostname value"),
+        ({"hostname": "example.com", "port": "abc"}, "Invalid port value"),
+        ({"hostname": "example.com", "port": "70000"}, "Invalid port value"),
+        ({"hostname": "example.com", "port": "13327", "uptime": "-5"}, "Invalid uptime value"),
+        ({"hostname": "example.com", "port": "13327", "num_players": "lots"}, "Invalid num_players value"),
+    ],
+)
+def test_rejects_malformed_heartbeats(data: dict[str, str], message: str) -> None:
+    """Malformed heartbeats raise HeartbeatError with the client-facing message."""
+    with pytest.raises(HeartbeatError, match=message):
+        decode_heartbeat(data)
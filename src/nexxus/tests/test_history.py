@@ -0,0 +1,105 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.conf import Settings
+from django.test import Client
+from django.utils import timezone
+
+from nexxus.history import HistoryBuffer, Sample, bucket_start, history_buffer, prune, rollup, rollup_all
+from nexxus.models import ServerStat, ServerStatRollup
+from nexxus.tests.factories import ServerFactory
+
+pytestmark = pytest.mark.django_db
+
+Resolution = ServerStatRollup.Resolution
+
+
+def make_samples(server_id: int, players: list[int], start: timezone.datetime) -> None:
+    """Insert one raw sample per player count, 10 seconds apart."""
+    ServerStat.objects.bulk_create(
+        ServerStat(server_id=server_id, timestamp=start + timedelta(seconds=10 * i), num_players=count)
+        for i, count in enumerate(players)
+    )
+
+
+def test_heartbeat_is_buffered_not_written() -> None:
+    """Saving a server buffers a sample without inserting it."""
+    server = ServerFactory(num_players=5)
+    assert ServerStat.objects.count() == 0
+    assert history_buffer().flush() == 1
+    stat = ServerStat.objects.get()
+    assert stat.server_id == server.entry
+    assert stat.num_players == 5
+
+
+def test_buffer_drops_oldest_when_full() -> None:
+    """A bounded buffer keeps the newest samples while the database is unavailable."""
+    buffer = HistoryBuffer(batch_size=10, flush_interval=60, max_buffer=2)
+    now = timezone.now()
+    for players in range(3):
+        buffer.append(Sample(1, now, players, 0, 0, 0))
+    assert [sample.num_players for sample in buffer.drain()] == [1, 2]
+
+
+def test_rollup_minute_hour_day() -> None:
+    """Minute buckets aggregate samples and coarser buckets aggregate finer ones."""
+    server = ServerFactory()
+    start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    make_samples(server.entry, [2, 4, 6], start)
+    make_samples(server.entry, [10], start + timedelta(minutes=5))
+
+    assert rollup(Resolution.MINUTE, start) == 2
+    assert rollup(Resolution.HOUR, start) == 1
+    assert rollup(Resolution.DAY, start) == 1
+
+    hour = ServerStatRollup.objects.get(resolution=Resolution.HOUR)
+    assert hour.samples == 4
+    assert hour.players_min == 2
+    assert hour.players_max == 10
+    assert hour.players_avg == pytest.approx(5.5)
+    assert ServerStatRollup.objects.get(resolution=Resolution.DAY).samples == 4
+
+
+def test_rollup_is_idempotent() -> None:
+    """Re-running a rollup updates buckets in place."""
+    server = ServerFactory()
+    start = timezone.now() - timedelta(minutes=1)
+    make_samples(server.entry, [1], start)
+    rollup_all()
+    make_samples(server.entry, [3], start)
+    rollup_all()
+    assert ServerStatRollup.objects.filter(resolution=Resolution.MINUTE).count() == 1
+    assert ServerStatRollup.objects.get(resolution=Resolution.MINUTE).samples == 2
+
+
+def test_prune_drops_expired_raw_samples(settings: Settings) -> None:
+    """Raw samples older than their retention are deleted."""
+    settings.HISTORY_RETENTION_DAYS = {"raw": 1, "1m": None, "1h": None, "1d": None}
+    server = ServerFactory()
+    make_samples(server.entry, [1], timezone.now() - timedelta(days=3))
+    make_samples(server.entry, [1], timezone.now())
+    assert prune() == {"raw": 1}
+    assert ServerStat.objects.count() == 1
+
+
+def test_history_endpoint() -> None:
+    """The history endpoint returns rollup buckets oldest first."""
+    server = ServerFactory()
+    start = bucket_start(Resolution.MINUTE, timezone.now() - timedelta(minutes=5))
+    make_samples(server.entry, [4, 8], start)
+    rollup(Resolution.MINUTE, start)
+
+    response = Client().get(f"/v3/api/servers/{server.entry}/history", {"resolution": "1m"})
+
+    assert response.status_code == HTTPStatus.OK
+    points = response.json()
+    assert points[0]["players_avg"] == pytest.approx(6.0)
+    assert points[0]["players_max"] == 8
+
+
+def test_history_endpoint_rejects_unknown_resolution() -> None:
+    """Only 1m, 1h and 1d are valid resolutions."""
+    server = ServerFactory()
+    response = Client().get(f"/v3/api/servers/{server.entry}/history", {"resolution": "5m"})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -0,0 +1,29 @@
+from nexxus.importtime import ImportTiming, by_package, parse_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   django.utils.version
+import time:       300 |        420 | django.utils
+import time:        50 |         50 |     google.auth.credentials
+import time:       900 |        950 |   google.auth
+Traceback lines and other output are ignored
+"""
+
+
+def test_parse_importtime() -> None:
+    """Test that every timing line is parsed with its nesting depth."""
+    timings = parse_importtime(IMPORTTIME_OUTPUT)
+
+    assert timings == [
+        ImportTiming("django.utils.version", 120, 120, 1),
+        ImportTiming("django.utils", 300, 420, 0),
+        ImportTiming("google.auth.credentials", 50, 50, 2),
+        ImportTiming("google.auth", 900, 950, 1),
+    ]
+
+
+def test_by_package_sums_self_time() -> None:
+    """Test that self time is aggregated per top-level package, most expensive first."""
+    totals = by_package(parse_importtime(IMPORTTIME_OUTPUT))
+
+    assert list(totals.items()) == [("google", 950), ("django", 420)]
@@ -0,0 +1,51 @@
+import pytest
+from django.conf import Settings
+from django.test import Client
+from django.urls import reverse
+
+from nexxus.middleware import is_slim_path
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize(
+    ("path", "slim"),
+    [
+        ("/", True),
+        ("/meta_client.php", True),
+        ("/meta_update.php", True),
+        ("/v3/api/servers", True),
+        ("/v3/", False),
+        ("/admin/", False),
+    ],
+)
+def test_is_slim_path(path: str, *, slim: bool) -> None:
+    """Test that only metaserver protocol and API paths get the slim profile."""
+    assert is_slim_path(path) is slim
+
+
+def test_is_slim_path_disabled(settings: Settings) -> None:
+    """Test that SLIM_MIDDLEWARE=False puts every path through the full stack."""
+    settings.SLIM_MIDDLEWARE = False
+
+    assert not is_slim_path("/meta_client.php")
+
+
+def test_slim_path_skips_session_auth_and_messages() -> None:
+    """Test that legacy protocol requests never get a session, user or message storage."""
+    response = Client().get(reverse("legacy_client"))
+
+    request = response.wsgi_request
+    assert not hasattr(request, "session")
+    assert not hasattr(request, "user")
+    assert not hasattr(request, "_messages")
+
+
+def test_full_path_keeps_session_auth_and_messages() -> None:
+    """Test that browser pages still run the full middleware stack."""
+    response = Client().get(reverse("v3:index"))
+
+    request = response.wsgi_request
+    assert hasattr(request, "session")
+    assert hasattr(request, "user")
+    assert hasattr(request, "_messages")
@@ -1,7 +1,13 @@
+import importlib
+from datetime import timedelta
+
 import pytest
-from django.db.utils import DataError
+from django.apps import apps
+from django.db import transaction
+from django.db.utils import DataError, IntegrityError
+from django.utils import timezone
 
-from nexxus.models import Blacklist, Server
+from nexxus.models import Blacklist, Server, ServerStat
 from nexxus.tests.factories import BlacklistFactory, ServerFactory
 
 
@@ -45,11 +51,15 @@ def test_blacklist_auto_increment() -> None:
 
 @pytest.mark.django_db
 def test_blacklist_unique_constraint() -> None:
-    """Ensure that duplicate Blacklist entries with the same hostname are allowed."""
+    """Ensure that a value can be blacklisted only once, whichever column holds it."""
     hostname = "duplicate.example.com"
     BlacklistFactory(hostname=hostname)
-    BlacklistFactory(hostname=hostname)
-    assert Blacklist.objects.filter(hostname=hostname).count() == 2
+    with pytest.raises(IntegrityError), transaction.atomic():
+        BlacklistFactory(hostname=hostname)
+    Blacklist.objects.create(network="198.51.100.0/24")
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Blacklist.objects.create(network="198.51.100.0/24")
+    assert Blacklist.objects.count() == 2
 
 
 @pytest.mark.django_db
@@ -101,3 +111,22 @@ def test_server_invalid_port() -> None:
     """Test that setting an invalid port raises an error."""
     with pytest.raises(DataError):
         Server.objects.create(port=-1)
+
+
+@pytest.mark.django_db
+def test_lowercase_hostnames_migration() -> None:
+    """Test that the data migration lower-cases hostnames and keeps the newest of each merged server."""
+    migration = importlib.import_module("nexxus.migrations.0010_lowercase_hostnames")
+    now = timezone.now()
+    old = ServerFactory(hostname="CF.Example.org", port=13327)
+    new = ServerFactory(hostname="cf.example.org", port=13327)
+    other_port = ServerFactory(hostname="CF.example.org", port=13328)
+    Server.objects.filter(entry=old.entry).update(last_update=now - timedelta(hours=1))
+    ServerStat.objects.create(server=old, timestamp=now, num_players=3)
+
+    migration.lowercase_hostnames(apps, None)
+
+    assert sorted(Server.objects.values_list("entry", "hostname", "port")) == sorted(
+        [(new.entry, "cf.example.org", 13327), (other_port.entry, "cf.example.org", 13328)]
+    )
+    assert ServerStat.objects.get().server_id == new.entry
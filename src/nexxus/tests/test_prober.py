@@ -0,0 +1,143 @@
+import asyncio
+import socket
+import threading
+from collections.abc import Iterator
+
+import pytest
+from django.conf import Settings
+from django.test import Client
+from django.urls import reverse
+from pytest_mock import MockerFixture
+
+from nexxus.models import Server
+from nexxus.prober import probe, probe_many, probe_servers
+from nexxus.tests.factories import ServerFactory
+
+GREETING = b"version 1023 1029 Crossfire Server"
+
+
+@pytest.fixture
+def listening_port() -> Iterator[int]:
+    """Stand in for a server that accepts connections but never speaks."""
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        yield server.getsockname()[1]
+
+
+@pytest.fixture
+def crossfire_port() -> Iterator[int]:
+    """Stand in for a Crossfire server that sends its version greeting to every connection."""
+    server = socket.create_server(("127.0.0.1", 0))
+
+    def serve() -> None:
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            with connection:
+                connection.sendall(len(GREETING).to_bytes(2, "big") + GREETING)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield server.getsockname()[1]
+    server.close()
+
+
+@pytest.fixture
+def closed_port() -> int:
+    """Return a port nothing listens on."""
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        return server.getsockname()[1]
+
+
+def test_probe_reachable(listening_port: int) -> None:
+    """Test that an open port is reachable and reports an RTT."""
+    result = asyncio.run(probe(1, "127.0.0.1", listening_port, handshake=False, allow_private=True))
+
+    assert result.reachable
+    assert result.rtt_ms is not None
+
+
+def test_probe_refused(closed_port: int) -> None:
+    """Test that a refused connection is unreachable."""
+    result = asyncio.run(probe(1, "127.0.0.1", closed_port, handshake=False, allow_private=True))
+
+    assert not result.reachable
+    assert result.error
+
+
+def test_probe_handshake(crossfire_port: int, listening_port: int) -> None:
+    """Test that the handshake requires the version greeting."""
+    greeted, silent = asyncio.run(
+        probe_many(
+            [(1, "127.0.0.1", crossfire_port), (2, "127.0.0.1", listening_port)],
+            2,
+            0.2,
+            handshake=True,
+            allow_private=True,
+        )
+    )
+
+    assert greeted.reachable
+    assert greeted.version == GREETING.decode()
+    assert not silent.reachable
+    assert "TimeoutError" in silent.error
+
+
+@pytest.mark.django_db
+def test_probe_servers_records_results(settings: Settings, listening_port: int, closed_port: int) -> None:
+    """Test that results are stored on the Server rows without touching last_update."""
+    settings.PROBE_ALLOW_PRIVATE = True
+    up = ServerFactory(hostname="127.0.0.1", port=listening_port)
+    down = ServerFactory(hostname="localhost", port=closed_port)
+    last_update = up.last_update
+
+    results = probe_servers(concurrency=2, timeout=1.0, handshake=False)
+
+    assert len(results) == 2
+    up.refresh_from_db()
+    down.refresh_from_db()
+    assert up.reachable is True
+    assert up.rtt_ms is not None
+    assert up.last_update == last_update
+    assert down.reachable is False
+    assert down.last_probe is not None
+
+
+@pytest.mark.parametrize("hostname", ["127.0.0.1", "localhost", "10.1.2.3", "169.254.0.1", "::1", "224.0.0.1"])
+def test_probe_refuses_non_global_addresses(hostname: str) -> None:
+    """Test that announces pointing at internal addresses are refused without a connection."""
+    result = asyncio.run(probe(1, hostname, 1234, handshake=False))
+
+    assert not result.reachable
+    assert "ProbeTargetError" in result.error
+
+
+@pytest.mark.django_db
+def test_probe_servers_never_connects_to_loopback(mocker: MockerFixture, listening_port: int) -> None:
+    """Test that a loopback announce is recorded as unreachable without opening a connection."""
+    open_connection = mocker.patch("nexxus.prober.asyncio.open_connection")
+    server = ServerFactory(hostname="127.0.0.1", port=listening_port)
+
+    probe_servers(concurrency=1, timeout=1.0, handshake=False)
+
+    open_connection.assert_not_called()
+    server.refresh_from_db()
+    assert server.reachable is False
+
+
+@pytest.mark.django_db
+def test_unreachable_servers_hidden(settings: Settings) -> None:
+    """Test that list endpoints drop unreachable servers when HIDE_UNREACHABLE_SERVERS is on."""
+    settings.HIDE_UNREACHABLE_SERVERS = True
+    ServerFactory(hostname="up.example.org")
+    down = ServerFactory(hostname="down.example.org")
+    ServerFactory(hostname="unprobed.example.org")
+    Server.objects.filter(hostname="up.example.org").update(reachable=True)
+    Server.objects.filter(entry=down.entry).update(reachable=False)
+
+    client = Client()
+    for url in (reverse("legacy_client"), reverse("legacy_html"), reverse("v3:index"), "/v3/api/servers"):
+        content = client.get(url).content.decode()
+        assert "up.example.org" in content
+        assert "unprobed.example.org" in content
+        assert "down.example.org" not in content
@@ -0,0 +1,53 @@
+from collections.abc import Callable
+
+import pytest
+
+from nexxus.models import Server
+from nexxus.tests.querybudget import QueryBudget, QueryUsage
+
+pytestmark = pytest.mark.django_db
+
+
+def test_usage_classifies_statements() -> None:
+    """Test that writes and reads are told apart and transaction bookkeeping is ignored."""
+    usage = QueryUsage()
+    for sql in ('SAVEPOINT "s1"', "SELECT 1", 'insert into "servers" VALUES (1)', "UPDATE servers SET port = 1", ""):
+        usage.record(sql)
+
+    assert usage.reads == ["SELECT 1", ""]
+    assert usage.writes == ['insert into "servers" VALUES (1)', "UPDATE servers SET port = 1"]
+
+
+def test_budget_passes_within_limits() -> None:
+    """Test that a block within budget reports what it ran."""
+    with QueryBudget(reads=1, writes=1).measure() as usage:
+        Server.objects.create(hostname="budget.example.org", port=13327)
+        Server.objects.count()
+
+    assert len(usage.reads) == 1
+    assert len(usage.writes) == 1
+
+
+def test_budget_fails_over_limit() -> None:
+    """Test that one query too many fails the test and shows the SQL."""
+    with (
+        pytest.raises(pytest.fail.Exception, match=r"2 reads over a budget of 1(.|\n)*SELECT"),
+        QueryBudget(reads=1).measure(),
+    ):
+        [Server.objects.count(), Server.objects.exists()]
+
+
+def test_budget_fails_over_time() -> None:
+    """Test that a block slower than its wall-time budget fails."""
+    with pytest.raises(pytest.fail.Exception, match="ms over a budget of 0"), QueryBudget(ms=0).measure():
+        Server.objects.count()
+
+
+@pytest.mark.query_budget(writes=0)
+def test_fixture_uses_marker_defaults(query_budget: Callable) -> None:
+    """Test that the marker sets the fixture's budget and arguments override it."""
+    with pytest.raises(pytest.fail.Exception, match="1 writes over a budget of 0"), query_budget():
+        Server.objects.create(hostname="budget.example.org", port=13327)
+
+    with query_budget(writes=1):
+        Server.objects.create(hostname="budget.example.net", port=13327)
@@ -0,0 +1,123 @@
+import asyncio
+import ipaddress
+import socket
+import time
+
+from nexxus.resolver import HostnameResolver, Resolution, normalize_ip
+
+
+async def slow_resolve(hostname: str) -> frozenset[str]:  # noqa: ARG001
+    """Never answer in time."""
+    await asyncio.sleep(1)
+    return frozenset()
+
+
+async def fixed_resolve(hostname: str) -> frozenset[str]:  # noqa: ARG001
+    """Resolve every name to one address."""
+    return frozenset({"192.0.2.1"})
+
+
+def make_resolver(resolve: object = fixed_resolve, **kwargs: float) -> HostnameResolver:
+    """Build a resolver with short test defaults."""
+    options = {"ttl": 60.0, "negative_ttl": 5.0, "timeout": 0.05, "max_concurrency": 4, "max_entries": 100}
+    return HostnameResolver(resolve, **(options | kwargs))
+
+
+def test_normalize_ip_unwraps_ipv4_mapped() -> None:
+    """Test that IPv4-mapped IPv6 client addresses compare equal to IPv4 records."""
+    assert normalize_ip("::ffff:192.0.2.1") == ipaddress.ip_address("192.0.2.1")
+    assert normalize_ip("crossfire.example.org") is None
+
+
+async def missing_resolve(hostname: str) -> frozenset[str]:
+    """Answer NXDOMAIN for every name."""
+    raise socket.gaierror(socket.EAI_NONAME, f"{hostname} not found")
+
+
+def test_failure_is_cached_for_the_negative_ttl() -> None:
+    """Test that NXDOMAIN is cached and served as a resolution without addresses."""
+    resolver = make_resolver(missing_resolve)
+
+    resolution = asyncio.run(resolver.refresh("missing.example.org"))
+
+    assert not resolution.resolved
+    assert resolver.lookup("missing.example.org") == resolution
+
+
+def test_timeout_is_unresolved_and_retried_soon() -> None:
+    """Test that a lookup slower than the timeout leaves the hostname unresolved for timeout_ttl only."""
+    resolver = make_resolver(slow_resolve, negative_ttl=300.0, timeout_ttl=1.0)
+
+    resolution = asyncio.run(resolver.refresh("slow.example.org"))
+
+    assert resolution.timed_out
+    assert resolver.cached("slow.example.org") == resolution
+    assert resolver.lookup("slow.example.org") is None
+    assert resolution.expires_at <= time.monotonic() + 1.0
+
+
+def test_pending_lookups_are_capped() -> None:
+    """Test that misses beyond max_pending are not scheduled."""
+    resolver = make_resolver(slow_resolve, timeout=5.0, max_pending=2)
+
+    assert resolver.schedule("a.example.org") is not None
+    assert resolver.schedule("a.example.org") is resolver.schedule("a.example.org")
+    assert resolver.schedule("b.example.org") is not None
+    assert resolver.schedule("c.example.org") is None
+
+
+def test_expired_entries_are_not_returned() -> None:
+    """Test that results are only served for their TTL."""
+    resolver = make_resolver(ttl=0.0)
+
+    asyncio.run(resolver.refresh("cf.example.org"))
+
+    assert resolver.cached("cf.example.org") is None
+
+
+def test_oldest_entry_is_evicted_when_full() -> None:
+    """Test that the cache stays within max_entries."""
+    resolver = make_resolver(max_entries=2)
+
+    for hostname in ("a.example.org", "b.example.org", "c.example.org"):
+        asyncio.run(resolver.refresh(hostname))
+
+    assert resolver.cached("a.example.org") is None
+    assert resolver.cached("c.example.org") is not None
+
+
+def test_lookup_resolves_in_background() -> None:
+    """Test that lookup returns immediately on a miss and serves the result once resolved."""
+    resolver = make_resolver()
+
+    assert resolver.lookup("cf.example.org") is None
+    resolver.schedule("cf.example.org").result(timeout=5)
+
+    resolution = resolver.lookup("cf.example.org")
+    assert resolution is not None
+    assert resolution.addresses == {ipaddress.ip_address("192.0.2.1")}
+
+
+def test_result_is_stored_before_the_lookup_is_unregistered() -> None:
+    """Test that a lookup racing the end of a resolution does not start another one."""
+    calls = []
+
+    async def counting_resolve(hostname: str) -> frozenset[str]:
+        calls.append(hostname)
+        return await fixed_resolve(hostname)
+
+    resolver = make_resolver(counting_resolve)
+    store = resolver.store
+    rescheduled = []
+
+    def store_then_look_up(hostname: str, resolution: Resolution) -> None:
+        store(hostname, resolution)
+        rescheduled.append(resolver.schedule(hostname))
+
+    resolver.store = store_then_look_up
+    future = resolver.schedule("race.example.org")
+    future.result(timeout=5)
+
+    assert rescheduled == [future]
+    assert calls == ["race.example.org"]
+    assert resolver.lookup("race.example.org") is not None
@@ -0,0 +1,159 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import Settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from nexxus import tasks
+from nexxus.models import ScheduledJob, Server
+from nexxus.scheduler import Job, Scheduler, scheduler, start_in_process
+from nexxus.sharedstats import shared_stats
+from nexxus.tests.factories import ServerFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class Recorder:
+    """A job function that counts its calls."""
+
+    def __init__(self, error: Exception | None = None) -> None:
+        """Initialize the recorder, optionally raising error on every call."""
+        self.calls = 0
+        self.error = error
+
+    def __call__(self) -> None:
+        """Count the call."""
+        self.calls += 1
+        if self.error:
+            raise self.error
+
+
+def test_due_job_runs_once_and_is_rescheduled() -> None:
+    """Test that a new job runs at once, records its run and is due again one interval later."""
+    job = Recorder()
+    runner = Scheduler([Job("tick", job, 60)], lease=30, owner="a")
+
+    runs = runner.run_pending()
+    assert [run.name for run in runs] == ["tick"]
+    assert runner.run_pending() == []
+    assert job.calls == 1
+
+    row = ScheduledJob.objects.get(name="tick")
+    assert row.runs == 1
+    assert row.owner == ""
+    assert row.lease_expires is None
+    assert row.last_duration_ms is not None
+    assert row.next_run > timezone.now() + timedelta(seconds=50)
+    assert shared_stats().totals()["scheduler.tick.runs"] == 1
+
+
+def test_lag_is_measured_from_the_due_time() -> None:
+    """Test that a late run reports how late it started and skips the runs it missed."""
+    job = Recorder()
+    runner = Scheduler([Job("late", job, 60)], lease=30, owner="a")
+    runner.ensure_rows()
+    due = timezone.now() - timedelta(seconds=150)
+    ScheduledJob.objects.filter(name="late").update(next_run=due)
+
+    (run,) = runner.run_pending()
+
+    assert run.lag_ms >= 150_000
+    row = ScheduledJob.objects.get(name="late")
+    assert row.last_lag_ms >= 150_000
+    assert row.next_run == due + timedelta(seconds=180)
+    assert job.calls == 1
+
+
+def test_only_the_lease_holder_runs_a_job() -> None:
+    """Test that a job claimed by one replica is skipped by the others until its lease expires."""
+    job = Recorder()
+    first = Scheduler([Job("shared", job, 60)], lease=30, owner="a")
+    second = Scheduler([Job("shared", job, 60)], lease=30, owner="b")
+    first.ensure_rows()
+    now = timezone.now()
+    next_run = ScheduledJob.objects.get(name="shared").next_run
+
+    assert first.claim("shared", next_run, now) is True
+    assert second.claim("shared", next_run, now) is False
+    assert second.run_pending() == []
+    assert job.calls == 0
+
+    # The first replica died holding the lease; once it expires another takes over.
+    assert [run.name for run in second.run_pending(now + timedelta(seconds=31))] == ["shared"]
+    assert job.calls == 1
+    assert ScheduledJob.objects.get(name="shared").runs == 1
+
+
+def test_run_that_lost_its_lease_warns(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that a run whose lease was taken over while it ran is reported instead of dropped silently."""
+
+    def taken_over() -> None:
+        ScheduledJob.objects.filter(name="slow").update(owner="b")
+
+    Scheduler([Job("slow", taken_over, 60)], lease=30, owner="a").run_pending()
+
+    assert "claimed by another process" in caplog.text
+    assert ScheduledJob.objects.get(name="slow").owner == "b"
+
+
+def test_failure_is_recorded_and_releases_the_lease() -> None:
+    """Test that a failing job is counted, keeps its schedule and frees its lease."""
+    runner = Scheduler([Job("broken", Recorder(RuntimeError("boom")), 60)], lease=30, owner="a")
+
+    (run,) = runner.run_pending()
+
+    assert run.error == "RuntimeError: boom"
+    row = ScheduledJob.objects.get(name="broken")
+    assert (row.runs, row.failures, row.last_error, row.lease_expires) == (1, 1, "RuntimeError: boom", None)
+    assert shared_stats().totals()["scheduler.broken.failures"] == 1
+
+
+def test_run_forever_stops() -> None:
+    """Test that the loop runs due jobs until its stop event is set."""
+    stop = threading.Event()
+    runner = Scheduler([Job("stop", stop.set, 60)], lease=30, owner="a")
+
+    runner.run_forever(tick=0.01, stop=stop)
+
+    assert ScheduledJob.objects.get(name="stop").runs == 1
+
+
+def test_start_in_process_is_off_by_default(settings: Settings) -> None:
+    """Test that web workers only start the scheduler thread when asked to."""
+    settings.SCHEDULER_IN_PROCESS = False
+    assert start_in_process() is None
+
+
+def test_expire_servers(settings: Settings) -> None:
+    """Test that only servers silent for longer than SERVER_RETENTION_DAYS are deleted, and only when set."""
+    old = ServerFactory()
+    ServerFactory()
+    Server.objects.filter(entry=old.entry).update(last_update=timezone.now() - timedelta(days=10))
+
+    settings.SERVER_RETENTION_DAYS = None
+    assert tasks.expire_servers() == 0
+
+    settings.SERVER_RETENTION_DAYS = 7
+    assert tasks.expire_servers() == 1
+    assert not Server.objects.filter(entry=old.entry).exists()
+    assert Server.objects.count() == 1
+
+
+def test_worker_command(settings: Settings) -> None:
+    """Test that the worker runs due jobs once and reports their status."""
+    settings.SCHEDULER_JOBS = {"rollup_history": ("nexxus.tasks.rollup_history", 60.0)}
+    scheduler.cache_clear()
+    try:
+        out = StringIO()
+        call_command("worker", once=True, stdout=out)
+        assert "rollup_history: ok" in out.getvalue()
+
+        out = StringIO()
+        call_command("worker", status=True, stdout=out)
+        assert "rollup_history" in out.getvalue()
+        assert "runs 1" in out.getvalue()
+    finally:
+        scheduler.cache_clear()
@@ -1,20 +1,42 @@
-import hashlib
-import hmac
+import asyncio
+import socket
+from collections.abc import Iterator
 
+import factory
 import pytest
 from django.conf import Settings
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponse
 from django.test import Client
 from faker import Faker
 from pytest_mock import MockerFixture
 
-from nexxus.models import Blacklist
+from nexxus.clientip import resolve_client_ip
+from nexxus.models import Blacklist, Server, ServerKey
+from nexxus.resolver import HostnameResolver, hostname_resolver
 from nexxus.security import (
+    COST_CACHE,
+    COST_MEMORY,
+    AnnounceVerificationCheck,
     APIKeyCheck,
     HMACSignatureCheck,
     HostnameBlacklistCheck,
     IPBlacklistCheck,
+    SecurityCheck,
+    SecurityPipeline,
+    security_pipeline,
 )
+from nexxus.sharedstats import shared_stats
+from nexxus.signing import generate_secret, sign
+from nexxus.tests.factories import ServerFactory
+
+STUB_DNS = {"cf.example.org": frozenset({"192.0.2.10", "2001:db8::10"})}
+
+
+async def stub_resolve(hostname: str) -> frozenset[str]:
+    """Resolve from STUB_DNS, raising like getaddrinfo for unknown names."""
+    if hostname not in STUB_DNS:
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+    return STUB_DNS[hostname]
 
 
 @pytest.fixture
@@ -34,6 +56,7 @@ def mock_request(mocker: MockerFixture) -> HttpRequest:
     """Mock HttpRequest."""
     request = mocker.create_autospec(HttpRequest, instance=True)
     request.META = {}
+    request.POST = {}
     request.headers = {}
     request.body = b""
     return request
@@ -43,43 +66,143 @@ def mock_request(mocker: MockerFixture) -> HttpRequest:
 class TestIPBlacklistCheck:
     """Test IP Blacklist Check."""
 
-    def test_blacklisted_ip(self, mock_request: HttpRequest, mocker: MockerFixture) -> None:
+    def test_blacklisted_ip(self, mock_request: HttpRequest) -> None:
         """Test blacklisted IP."""
         mock_request.META["REMOTE_ADDR"] = "192.168.1.100"
-        mocker.patch.object(Blacklist.objects, "filter", return_value=mocker.Mock(exists=lambda: True))
+        Blacklist.objects.create(ip_address="192.168.1.100")
         response = IPBlacklistCheck().validate(mock_request)
         assert response is not None
         assert response.status_code == 403
         assert response.content == b"Forbidden: Blacklisted IP"
 
-    def test_allowed_ip(self, mock_request: HttpRequest, mocker: MockerFixture) -> None:
+    def test_allowed_ip(self, mock_request: HttpRequest) -> None:
         """Test allowed IP."""
         mock_request.META["REMOTE_ADDR"] = "192.168.1.101"
-        mocker.patch.object(Blacklist.objects, "filter", return_value=mocker.Mock(exists=lambda: False))
+        Blacklist.objects.create(ip_address="192.168.1.100")
         response = IPBlacklistCheck().validate(mock_request)
         assert response is None
 
+    def test_blacklisted_network(self, mock_request: HttpRequest) -> None:
+        """Test that an address inside a blacklisted CIDR range is rejected."""
+        Blacklist.objects.create(network="203.0.113.0/24")
+        mock_request.META["REMOTE_ADDR"] = "203.0.113.77"
+        assert IPBlacklistCheck().validate(mock_request) is not None
+
+        mock_request.client_ip = resolve_client_ip("203.0.114.1", None)
+        assert IPBlacklistCheck().validate(mock_request) is None
+
+    def test_new_entry_applies_without_restart(self, mock_request: HttpRequest) -> None:
+        """Test that adding an entry invalidates the in-memory index."""
+        mock_request.META["REMOTE_ADDR"] = "2001:db8::1"
+        assert IPBlacklistCheck().validate(mock_request) is None
+
+        Blacklist.objects.create(network="2001:db8::/32")
+        assert IPBlacklistCheck().validate(mock_request) is not None
+
 
 @pytest.mark.django_db
 class TestHostnameBlacklistCheck:
     """Test Hostname Blacklist Check."""
 
-    def test_blacklisted_hostname(self, mock_request: HttpRequest, mocker: MockerFixture) -> None:
+    def test_blacklisted_hostname(self, mock_request: HttpRequest) -> None:
         """Test blacklisted hostname."""
-        mock_request.META["HTTP_HOST"] = "banned.example.com"
-        mocker.patch.object(Blacklist.objects, "filter", return_value=mocker.Mock(exists=lambda: True))
+        mock_request.POST["hostname"] = "banned.example.com"
+        Blacklist.objects.create(hostname="banned.example.com")
         response = HostnameBlacklistCheck().validate(mock_request)
         assert response is not None
         assert response.status_code == 403
         assert response.content == b"Forbidden: Blacklisted Hostname"
 
-    def test_allowed_hostname(self, mock_request: HttpRequest, mocker: MockerFixture) -> None:
+    def test_allowed_hostname(self, mock_request: HttpRequest) -> None:
         """Test allowed hostname."""
-        mock_request.META["HTTP_HOST"] = "allowed.example.com"
-        mocker.patch.object(Blacklist.objects, "filter", return_value=mocker.Mock(exists=lambda: False))
+        mock_request.POST["hostname"] = "allowed.example.com"
+        Blacklist.objects.create(hostname="banned.example.com")
         response = HostnameBlacklistCheck().validate(mock_request)
         assert response is None
 
+    def test_wildcard_domain(self, mock_request: HttpRequest) -> None:
+        """Test that a *.domain entry bans subdomains but not the domain itself."""
+        Blacklist.objects.create(hostname="*.spam.example")
+        mock_request.POST["hostname"] = "a.b.spam.example"
+        assert HostnameBlacklistCheck().validate(mock_request) is not None
+
+        mock_request.POST["hostname"] = "spam.example"
+        assert HostnameBlacklistCheck().validate(mock_request) is None
+
+    def test_checks_announced_hostname_not_host_header(self, mock_request: HttpRequest) -> None:
+        """Test that the heartbeat's hostname is checked, not the metaserver's Host header."""
+        Blacklist.objects.create(hostname="banned.example.com")
+        mock_request.META["HTTP_HOST"] = "banned.example.com"
+        mock_request.POST["hostname"] = " Banned.Example.com "
+        response = HostnameBlacklistCheck().validate(mock_request)
+        assert response is not None
+        assert response.status_code == 403
+
+        mock_request.POST["hostname"] = "allowed.example.com"
+        assert HostnameBlacklistCheck().validate(mock_request) is None
+
+
+class TestAnnounceVerificationCheck:
+    """Test Announce Verification Check."""
+
+    @pytest.fixture(autouse=True)
+    def stub_resolver(self, settings: Settings) -> Iterator[HostnameResolver]:
+        """Replace DNS with fixed answers and enforce verification."""
+        settings.ANNOUNCE_VERIFICATION = "enforce"
+        resolver = hostname_resolver()
+        real_resolve = resolver.resolve
+        resolver.resolve = stub_resolve
+        resolver.clear()
+        yield resolver
+        resolver.resolve = real_resolve
+        resolver.clear()
+
+    def announce(self, mock_request: HttpRequest, hostname: str, client_ip: str) -> HttpResponse | None:
+        """Validate a heartbeat for hostname sent from client_ip."""
+        mock_request.POST["hostname"] = hostname
+        mock_request.META["REMOTE_ADDR"] = client_ip
+        # What ClientIPMiddleware does at the start of each request.
+        mock_request.client_ip = resolve_client_ip(client_ip, None)
+        return AnnounceVerificationCheck().validate(mock_request)
+
+    def test_unresolved_hostname_is_allowed_and_resolved_in_background(
+        self, mock_request: HttpRequest, stub_resolver: HostnameResolver
+    ) -> None:
+        """Test that a cache miss never blocks or rejects, and schedules a lookup."""
+        assert self.announce(mock_request, "cf.example.org", "198.51.100.9") is None
+        stub_resolver.schedule("cf.example.org").result(timeout=5)
+        assert stub_resolver.cached("cf.example.org") is not None
+
+    def test_matching_address_is_allowed(self, mock_request: HttpRequest, stub_resolver: HostnameResolver) -> None:
+        """Test that a hostname resolving to the client address passes."""
+        asyncio.run(stub_resolver.refresh("cf.example.org"))
+        assert self.announce(mock_request, "cf.example.org", "::ffff:192.0.2.10") is None
+
+    def test_mismatched_address_is_rejected(self, mock_request: HttpRequest, stub_resolver: HostnameResolver) -> None:
+        """Test that a hostname resolving elsewhere is rejected when enforcing."""
+        asyncio.run(stub_resolver.refresh("cf.example.org"))
+        response = self.announce(mock_request, "cf.example.org", "198.51.100.9")
+        assert response is not None
+        assert response.status_code == 403
+
+    def test_nxdomain_is_rejected(self, mock_request: HttpRequest, stub_resolver: HostnameResolver) -> None:
+        """Test that a hostname that does not resolve is rejected once the failure is cached."""
+        resolution = asyncio.run(stub_resolver.refresh("missing.example.org"))
+        assert not resolution.resolved
+        response = self.announce(mock_request, "missing.example.org", "192.0.2.10")
+        assert response is not None
+        assert response.status_code == 403
+
+    def test_ip_literal_is_compared_without_dns(self, mock_request: HttpRequest) -> None:
+        """Test that an announced IP address must equal the client address."""
+        assert self.announce(mock_request, "192.0.2.10", "192.0.2.10") is None
+        assert self.announce(mock_request, "192.0.2.10", "192.0.2.11") is not None
+
+    def test_log_mode_never_rejects(self, mock_request: HttpRequest, settings: Settings) -> None:
+        """Test that log mode only reports mismatches."""
+        settings.ANNOUNCE_VERIFICATION = "log"
+        assert self.announce(mock_request, "192.0.2.10", "192.0.2.11") is None
+
 
 class TestAPIKeyCheck:
     """Test API Key Check."""
@@ -107,21 +230,27 @@ class TestAPIKeyCheck:
         assert response.content == b"Unauthorized: Invalid API Key"
 
 
+@pytest.mark.django_db
 class TestHMACSignatureCheck:
     """Test HMAC Signature Check."""
 
-    def test_valid_signature(self, mock_request: HttpRequest) -> None:
+    @pytest.fixture
+    def secret(self) -> str:
+        """Issue a key for cf.example.org."""
+        return ServerKey.objects.create(key_id="cf.example.org", secret=generate_secret()).secret
+
+    def test_valid_signature(self, mock_request: HttpRequest, secret: str) -> None:
         """Test valid HMAC signature."""
         mock_request.body = b"test body"
-        signature = hmac.new(b"supersecurekey", mock_request.body, hashlib.sha256).hexdigest()
-        mock_request.headers["X-Signature"] = signature
+        mock_request.POST["hostname"] = "cf.example.org"
+        mock_request.headers = sign("cf.example.org", secret, mock_request.body)
         response = HMACSignatureCheck().validate(mock_request)
         assert response is None
 
-    def test_invalid_signature(self, mock_request: HttpRequest) -> None:
+    def test_invalid_signature(self, mock_request: HttpRequest, secret: str) -> None:
         """Test invalid HMAC signature."""
         mock_request.body = b"test body"
-        mock_request.headers["X-Signature"] = "invalid_signature"
+        mock_request.headers = {**sign("cf.example.org", secret, mock_request.body), "X-Signature": "invalid"}
         response = HMACSignatureCheck().validate(mock_request)
         assert response is not None
         assert response.status_code == 401
@@ -133,3 +262,110 @@ class TestHMACSignatureCheck:
         assert response is not None
         assert response.status_code == 401
         assert response.content == b"Unauthorized: Missing Signature"
+
+    def test_replayed_signature(self, mock_request: HttpRequest, secret: str) -> None:
+        """Test that the same signed request is only accepted once."""
+        mock_request.body = b"test body"
+        mock_request.headers = sign("cf.example.org", secret, mock_request.body)
+        assert HMACSignatureCheck().validate(mock_request) is None
+
+        response = HMACSignatureCheck().validate(mock_request)
+        assert response is not None
+        assert response.content == b"Unauthorized: Replayed Signature"
+
+    def test_key_must_match_announced_hostname(self, mock_request: HttpRequest, secret: str) -> None:
+        """Test that a key cannot sign announces for another hostname."""
+        mock_request.body = b"test body"
+        mock_request.POST["hostname"] = "other.example.org"
+        mock_request.headers = sign("cf.example.org", secret, mock_request.body)
+        response = HMACSignatureCheck().validate(mock_request)
+        assert response is not None
+        assert response.status_code == 401
+
+
+class RecordingCheck(SecurityCheck):
+    """Check that records its calls and rejects when told to."""
+
+    def __init__(self, label: str, cost: int, calls: list[str], *, reject: bool = False) -> None:
+        """Initialize the check."""
+        self.label = label
+        self.cost = cost
+        self.calls = calls
+        self.reject = reject
+
+    @property
+    def name(self) -> str:
+        """Count under the label."""
+        return self.label
+
+    def validate(self, request: HttpRequest) -> HttpResponse | None:  # noqa: ARG002
+        """Record the call and reject if configured to."""
+        self.calls.append(self.label)
+        return HttpResponse(self.label, status=403) if self.reject else None
+
+
+class TestSecurityPipeline:
+    """Test SecurityPipeline."""
+
+    def test_runs_cheapest_first_and_keeps_configured_order_within_a_tier(self, mock_request: HttpRequest) -> None:
+        """Test the ordering by cost."""
+        calls: list[str] = []
+        pipeline = SecurityPipeline(
+            [
+                RecordingCheck("cache", COST_CACHE, calls),
+                RecordingCheck("memory-a", COST_MEMORY, calls),
+                RecordingCheck("memory-b", COST_MEMORY, calls),
+            ]
+        )
+
+        assert pipeline.run(mock_request) is None
+        assert calls == ["memory-a", "memory-b", "cache"]
+
+    def test_stops_at_first_rejection_and_counts_it(self, mock_request: HttpRequest) -> None:
+        """Test short-circuiting and the per-check counters."""
+        calls: list[str] = []
+        pipeline = SecurityPipeline(
+            [RecordingCheck("later", COST_CACHE, calls), RecordingCheck("first", COST_MEMORY, calls, reject=True)]
+        )
+
+        response = pipeline.run(mock_request)
+
+        assert response is not None
+        assert response.content == b"first"
+        assert calls == ["first"]
+        totals = shared_stats().totals()
+        assert totals["security.first.calls"] == 1
+        assert totals["security.first.rejected"] == 1
+        assert "security.first.us" in totals
+        assert "security.later.calls" not in totals
+
+    def test_configured_pipeline(self, settings: Settings) -> None:
+        """Test that pipelines are built from SECURITY_PIPELINES and ordered by cost."""
+        settings.SECURITY_PIPELINES = {
+            "test": [
+                "nexxus.security.RateLimitCheck",
+                "nexxus.security.HMACSignatureCheck",
+                "nexxus.security.APIKeyCheck",
+            ]
+        }
+        security_pipeline.cache_clear()
+        try:
+            names = [check.name for check in security_pipeline("test").checks]
+        finally:
+            security_pipeline.cache_clear()
+
+        assert names == ["APIKeyCheck", "RateLimitCheck", "HMACSignatureCheck"]
+
+    @pytest.mark.django_db
+    def test_v3_write_route_is_guarded(self, client: Client) -> None:
+        """Test that the v3 server PATCH route runs the "api" pipeline."""
+        Blacklist.objects.create(network="198.51.100.0/24")
+        payload = factory.build(dict, FACTORY_CLASS=ServerFactory)
+
+        response = client.patch(
+            "/v3/api/servers", data=payload, content_type="application/json", REMOTE_ADDR="198.51.100.20"
+        )
+
+        assert response.status_code == 403
+        assert shared_stats().totals()["security.IPBlacklistCheck.rejected"] == 1
+        assert not Server.objects.exists()
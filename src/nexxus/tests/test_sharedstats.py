@@ -0,0 +1,141 @@
+import os
+from pathlib import Path
+
+import pytest
+from django.conf import Settings
+from django.test import Client
+from django.urls import reverse
+
+from nexxus.sharedstats import NAME_SIZE, SharedStats, shared_stats, stored_name
+
+
+@pytest.fixture
+def registry(tmp_path: Path) -> SharedStats:
+    """Return a small registry in a fresh file."""
+    stats = SharedStats(tmp_path / "stats", max_slots=4, max_counters=8)
+    stats.create()
+    return stats
+
+
+def test_add_and_totals(registry: SharedStats) -> None:
+    """Test that counters add up and unknown names are absent."""
+    registry.add("hits")
+    registry.add("hits", 4)
+    registry.add("misses")
+
+    assert registry.totals() == {"hits": 5, "misses": 1}
+    assert registry.workers() == {os.getpid(): {"hits": 5, "misses": 1}}
+
+
+def test_handles_share_one_file(registry: SharedStats) -> None:
+    """Test that a second handle on the same file sees and extends the same counters."""
+    registry.add("hits", 2)
+    other = SharedStats(registry.path, max_slots=4, max_counters=8)
+    other.add("misses")
+
+    assert other.totals() == {"hits": 2, "misses": 1}
+    assert registry.totals() == {"hits": 2, "misses": 1}
+
+
+def test_forked_workers_sum(registry: SharedStats) -> None:
+    """Test that each forked worker counts in its own slot and the reader sums them."""
+    registry.add("requests")
+    children = []
+    for _ in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                for _ in range(100):
+                    registry.add("requests")
+            finally:
+                os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+    assert registry.totals() == {"requests": 301}
+
+
+def test_dead_worker_slot_is_reused(registry: SharedStats) -> None:
+    """Test that a slot left by an exited process is taken over without losing its counts."""
+    for _ in range(registry.max_slots):
+        pid = os.fork()
+        if pid == 0:
+            registry.add("requests")
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+    registry.add("requests")
+
+    assert registry.totals() == {"requests": registry.max_slots + 1}
+
+
+def test_create_resets(registry: SharedStats) -> None:
+    """Test that create() zeroes counters and names."""
+    registry.add("hits")
+    registry.create()
+
+    assert registry.totals() == {}
+    registry.add("misses")
+    assert registry.totals() == {"misses": 1}
+
+
+def test_full_registry_drops_new_names(registry: SharedStats, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that names beyond the table are dropped and logged once while existing counters keep counting."""
+    for index in range(registry.max_counters):
+        registry.add(f"counter{index}")
+    registry.add("one too many")
+    registry.add("one too many")
+    registry.add("another")
+    registry.add("counter0")
+
+    assert "one too many" not in registry.totals()
+    assert registry.totals()["counter0"] == 2
+    assert len([record for record in caplog.records if "registry is full" in record.message]) == 1
+
+
+def test_long_names_get_distinct_counters(registry: SharedStats) -> None:
+    """Test that names sharing a prefix beyond the slot width are kept apart."""
+    prefix = "scheduler." + "x" * NAME_SIZE
+    registry.add(prefix + ".runs")
+    registry.add(prefix + ".failures", 2)
+    other = SharedStats(registry.path, registry.max_slots, registry.max_counters)
+    other.add(prefix + ".runs")
+
+    totals = registry.totals()
+    assert sorted(totals.values()) == [2, 2]
+    assert all(len(name.encode()) <= NAME_SIZE for name in totals)
+    assert totals[stored_name(prefix + ".runs")] == 2
+
+
+@pytest.mark.django_db
+def test_views_count_cache_hits(client: Client) -> None:
+    """Test that the list views count cache misses and hits."""
+    client.get(reverse("legacy_html"))
+    client.get(reverse("legacy_html"))
+
+    totals = shared_stats().totals()
+    assert totals["cache.legacy_html.miss"] == 1
+    assert totals["cache.legacy_html.hit"] == 1
+
+
+@pytest.mark.django_db
+def test_metrics_include_counters(client: Client, settings: Settings) -> None:
+    """Test that the metrics endpoint reports the summed counters."""
+    settings.ADMIN_API_KEY = "metrics-key"
+    shared_stats().add("heartbeat.created", 3)
+
+    response = client.get("/v3/api/metrics", headers={"X-API-Key": "metrics-key"})
+
+    assert response.json()["counters"]["heartbeat.created"] == 3
+
+
+@pytest.mark.django_db
+def test_admin_stats_page(admin_client: Client) -> None:
+    """Test that staff can read the counters page."""
+    shared_stats().add("heartbeat.updated", 2)
+
+    response = admin_client.get(reverse("admin_stats"))
+
+    assert response.status_code == 200
+    assert b"heartbeat.updated" in response.content
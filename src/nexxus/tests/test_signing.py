@@ -0,0 +1,184 @@
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+
+import pytest
+from django.conf import Settings
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+
+from nexxus.models import ServerKey
+from nexxus.security import security_pipeline
+from nexxus.signing import (
+    KeyCache,
+    ReplayCache,
+    SignatureError,
+    SignatureVerifier,
+    generate_secret,
+    sign,
+    signature_verifier,
+)
+
+NOW = 1_700_000_000
+
+
+def verifier(secrets: dict[str, str], loads: list[str] | None = None, max_skew: int = 300) -> SignatureVerifier:
+    """Build a verifier over an in-memory key table, recording every load."""
+
+    def load(key_id: str) -> str | None:
+        if loads is not None:
+            loads.append(key_id)
+        return secrets.get(key_id)
+
+    return SignatureVerifier(
+        KeyCache(load, ttl=60, max_entries=100),
+        ReplayCache(window=max_skew, bucket_seconds=30, max_nonces=100),
+        max_skew,
+        shared_replay=False,
+    )
+
+
+def test_verify_returns_key_id() -> None:
+    """Test that a correctly signed request verifies."""
+    headers = sign("cf.example.org", "s3cret", b"body", timestamp=NOW)
+    assert verifier({"cf.example.org": "s3cret"}).verify(headers, b"body", now=NOW) == "cf.example.org"
+
+
+@pytest.mark.parametrize(
+    ("change", "message"),
+    [
+        ({"X-Signature-Timestamp": str(NOW - 301)}, "Stale Signature"),
+        ({"X-Signature-Timestamp": "soon"}, "Stale Signature"),
+        ({"X-Signature-Nonce": "short"}, "Invalid Nonce"),
+        ({"X-Key-Id": "unknown.example.org"}, "Invalid Signature"),
+        ({"X-Signature": "0" * 64}, "Invalid Signature"),
+        ({"X-Signature": ""}, "Missing Signature"),
+    ],
+)
+def test_verify_rejects(change: dict[str, str], message: str) -> None:
+    """Test that tampered, stale and incomplete signatures are refused."""
+    headers = {**sign("cf.example.org", "s3cret", b"body", timestamp=NOW), **change}
+    with pytest.raises(SignatureError, match=message):
+        verifier({"cf.example.org": "s3cret"}).verify(headers, b"body", now=NOW)
+
+
+def test_signature_covers_body_and_timestamp() -> None:
+    """Test that the body and timestamp cannot be swapped under a valid signature."""
+    checker = verifier({"cf.example.org": "s3cret"})
+    headers = sign("cf.example.org", "s3cret", b"body", timestamp=NOW)
+
+    with pytest.raises(SignatureError, match="Invalid Signature"):
+        checker.verify(headers, b"other body", now=NOW)
+    with pytest.raises(SignatureError, match="Invalid Signature"):
+        checker.verify({**headers, "X-Signature-Timestamp": str(NOW + 1)}, b"body", now=NOW)
+
+
+def test_replay_is_refused_within_window() -> None:
+    """Test that a nonce is only accepted once."""
+    checker = verifier({"cf.example.org": "s3cret"})
+    headers = sign("cf.example.org", "s3cret", b"body", timestamp=NOW)
+    checker.verify(headers, b"body", now=NOW)
+
+    with pytest.raises(SignatureError, match="Replayed Signature"):
+        checker.verify(headers, b"body", now=NOW + 10)
+
+
+def test_replay_cache_expires_whole_buckets() -> None:
+    """Test that nonces are forgotten once their bucket is older than the window."""
+    replay = ReplayCache(window=60, bucket_seconds=30, max_nonces=10)
+    assert replay.add("a" * 16, NOW, now=NOW)
+    assert replay.add("b" * 16, NOW + 5, now=NOW + 5)
+    assert len(replay) == 2
+
+    assert replay.add("c" * 16, NOW + 100, now=NOW + 100)
+    assert len(replay) == 1
+
+
+def test_replay_cache_is_bounded() -> None:
+    """Test that a full replay cache refuses new nonces instead of growing."""
+    replay = ReplayCache(window=60, bucket_seconds=30, max_nonces=2)
+    replay.add("a" * 16, NOW, now=NOW)
+    replay.add("b" * 16, NOW, now=NOW)
+
+    with pytest.raises(SignatureError, match="full"):
+        replay.add("c" * 16, NOW, now=NOW)
+
+
+def test_keys_are_cached_including_misses() -> None:
+    """Test that key lookups hit the loader once per key id within the TTL."""
+    loads: list[str] = []
+    checker = verifier({"cf.example.org": "s3cret"}, loads)
+    for _ in range(3):
+        checker.verify(sign("cf.example.org", "s3cret", b"body", timestamp=NOW), b"body", now=NOW)
+        with pytest.raises(SignatureError):
+            checker.verify(sign("unknown.example.org", "x", b"body", timestamp=NOW), b"body", now=NOW)
+
+    assert loads == ["cf.example.org", "unknown.example.org"]
+
+
+def test_key_cache_evicts_oldest() -> None:
+    """Test that the key cache stays within max_entries."""
+    keys = KeyCache(lambda _: None, ttl=60, max_entries=2)
+    for key_id in ("a", "b", "c"):
+        keys.get(key_id)
+
+    assert list(keys._entries) == ["b", "c"]  # noqa: SLF001
+
+
+@pytest.mark.django_db
+def test_signed_heartbeat_without_queries_once_key_is_cached(
+    client: Client, settings: Settings, django_assert_num_queries: Callable[[int], AbstractContextManager]
+) -> None:
+    """Test the heartbeat pipeline with signatures required, and that a cached key needs no query."""
+    settings.SECURITY_PIPELINES = {"heartbeat": ["nexxus.security.HMACSignatureCheck"]}
+    security_pipeline.cache_clear()
+    key = ServerKey.objects.create(key_id="cf.example.org", secret=generate_secret())
+    data = "hostname=cf.example.org&port=13327"
+    url = reverse("legacy_update")
+
+    def post() -> int:
+        headers = sign(key.key_id, key.secret, data.encode())
+        return client.post(
+            url, data=data, content_type="application/x-www-form-urlencoded", headers=headers
+        ).status_code
+
+    try:
+        assert post() == 201
+        assert signature_verifier().keys.get("cf.example.org") == key.secret
+        with django_assert_num_queries(0):
+            signature_verifier().verify(sign(key.key_id, key.secret, b""), b"")
+
+        assert client.post(url, data=data, content_type="application/x-www-form-urlencoded").status_code == 401
+    finally:
+        security_pipeline.cache_clear()
+
+
+@pytest.mark.django_db
+def test_signed_multipart_heartbeat(client: Client, settings: Settings) -> None:
+    """Test that a multipart form heartbeat, as curl -F and the test client send, can be signed."""
+    settings.SECURITY_PIPELINES = {
+        "heartbeat": ["nexxus.security.HostnameBlacklistCheck", "nexxus.security.HMACSignatureCheck"]
+    }
+    security_pipeline.cache_clear()
+    key = ServerKey.objects.create(key_id="cf.example.org", secret=generate_secret())
+    body = encode_multipart(BOUNDARY, {"hostname": "cf.example.org", "port": "13327"})
+
+    try:
+        response = client.generic(
+            "POST",
+            reverse("legacy_update"),
+            body,
+            content_type=MULTIPART_CONTENT,
+            headers=sign(key.key_id, key.secret, body),
+        )
+        assert response.status_code == 201
+        tampered = client.generic(
+            "POST",
+            reverse("legacy_update"),
+            body.replace(b"13327", b"13328"),
+            content_type=MULTIPART_CONTENT,
+            headers=sign(key.key_id, key.secret, body),
+        )
+        assert tampered.status_code == 401
+    finally:
+        security_pipeline.cache_clear()
@@ -0,0 +1,97 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.test import Client
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from nexxus.models import Server
+from nexxus.stats import FleetStats, fleet_stats
+from nexxus.tests.factories import ServerFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def live_server(**kwargs: object) -> Server:
+    """Create a server whose heartbeat is current."""
+    return ServerFactory(last_update=timezone.now(), **kwargs)
+
+
+def test_seed_counts_only_live_servers() -> None:
+    """Servers past LAST_UPDATE_TIMEOUT are not counted."""
+    live_server(num_players=3, version="1.75", codebase="cf", archbase="std")
+    stale = ServerFactory()
+    Server.objects.filter(entry=stale.entry).update(
+        last_update=timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT + 60)
+    )
+
+    snapshot = fleet_stats().snapshot()
+
+    assert snapshot["live_servers"] == 1
+    assert snapshot["total_players"] == 3
+    assert snapshot["by_version"] == {"1.75": 1}
+
+
+def test_heartbeats_apply_deltas_without_queries(django_assert_num_queries) -> None:
+    """After seeding, saves update the totals by delta and reads run no queries."""
+    server = live_server(num_players=3, version="1.74")
+    fleet_stats().snapshot()
+
+    server.num_players = 10
+    server.version = "1.75"
+    server.save()
+    live_server(num_players=1, version="1.75")
+
+    with django_assert_num_queries(0):
+        snapshot = fleet_stats().snapshot()
+    assert snapshot["live_servers"] == 2
+    assert snapshot["total_players"] == 11
+    assert snapshot["by_version"] == {"1.75": 2}
+
+
+def test_delete_and_expiry(mocker: MockerFixture) -> None:
+    """Deleted servers are removed at once, silent ones when their heartbeat expires."""
+    first = live_server(num_players=2)
+    live_server(num_players=5)
+    fleet_stats().snapshot()
+
+    first.delete()
+    assert fleet_stats().snapshot()["total_players"] == 5
+
+    later = time.time() + settings.LAST_UPDATE_TIMEOUT + 1
+    mocker.patch("nexxus.stats.time.time", return_value=later)
+    fleet_stats().seeded_at = later  # keep the expiry path, not a re-seed, under test
+    assert fleet_stats().snapshot()["live_servers"] == 0
+
+
+def test_aggregates_are_per_worker_until_resync(mocker: MockerFixture) -> None:
+    """A write applied by one worker is only seen by another after that one re-seeds."""
+    server = live_server(num_players=1)
+    writer = FleetStats(timeout=settings.LAST_UPDATE_TIMEOUT, resync_interval=60)
+    reader = FleetStats(timeout=settings.LAST_UPDATE_TIMEOUT, resync_interval=60)
+    writer.snapshot()
+    reader.snapshot()
+
+    mocker.patch("nexxus.signals.fleet_stats", return_value=writer)
+    server.num_players = 6
+    server.save()
+
+    assert writer.snapshot()["total_players"] == 6
+    assert reader.snapshot()["total_players"] == 1
+
+    later = time.time() + 61
+    mocker.patch("nexxus.stats.time.time", return_value=later)
+    assert reader.snapshot()["total_players"] == 6
+
+
+def test_stats_endpoint() -> None:
+    """GET /v3/api/stats returns the aggregates."""
+    live_server(num_players=4, codebase="crossfire")
+    response = Client().get("/v3/api/stats")
+    assert response.status_code == HTTPStatus.OK
+    data = response.json()
+    assert data["total_players"] == 4
+    assert data["by_codebase"] == {"crossfire": 1}
@@ -0,0 +1,283 @@
+from collections.abc import Callable, Iterator
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import factory
+import pytest
+from django.conf import Settings, settings
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from pytest_mock import MockerFixture
+
+from nexxus.blacklist import blacklist_matcher
+from nexxus.cache import get_generation
+from nexxus.history import history_buffer
+from nexxus.models import Server
+from nexxus.storage import REGISTRY_FIELDS, DatabaseStorage, MemoryStorage, ServerRegistry, server_storage
+from nexxus.tests.factories import ServerFactory
+
+
+def stale() -> datetime:
+    """Return a last_update too old to be listed."""
+    return timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT + 60)
+
+
+class TestServerRegistry:
+    """Unit tests for the sharded registry."""
+
+    def test_upsert_reports_new_servers(self) -> None:
+        """Test that the first heartbeat creates a server and later ones update it."""
+        registry = ServerRegistry(4)
+        now = timezone.now()
+
+        assert registry.upsert("a.example.org", 13327, {"num_players": 1}, now)[1] is True
+        assert registry.upsert("a.example.org", 13327, {"num_players": 2}, now)[1] is False
+        assert registry.upsert("a.example.org", 13328, {}, now)[1] is True
+
+        assert len(registry) == 2
+        assert [row["num_players"] for row in registry.live(now - timedelta(seconds=1), hide_unreachable=False)] == [
+            2,
+            None,
+        ]
+
+    def test_ports_of_a_host_share_a_shard(self) -> None:
+        """Test that partitioning is by hostname and stable."""
+        registry = ServerRegistry(8)
+        shards = {registry.shard(f"host-{index}.example.org") for index in range(200)}
+
+        assert len(shards) == 8
+        assert registry.shard("a.example.org") is registry.shard("a.example.org")
+
+    def test_live_filters_and_orders(self) -> None:
+        """Test that stale and, when hidden, unreachable servers are left out and the rest sorted."""
+        registry = ServerRegistry(4)
+        now = timezone.now()
+        for hostname in ("c.example.org", "a.example.org", "b.example.org"):
+            registry.upsert(hostname, 13327, {}, now)
+        registry.upsert("old.example.org", 13327, {}, now - timedelta(hours=2))
+        registry.shard("b.example.org").servers["b.example.org", 13327].reachable = False
+
+        cutoff = now - timedelta(hours=1)
+        assert [row["hostname"] for row in registry.live(cutoff, hide_unreachable=False)] == [
+            "a.example.org",
+            "b.example.org",
+            "c.example.org",
+        ]
+        assert [row["hostname"] for row in registry.live(cutoff, hide_unreachable=True)] == [
+            "a.example.org",
+            "c.example.org",
+        ]
+
+    def test_take_dirty_marks_clean(self) -> None:
+        """Test that changed servers are handed out once."""
+        registry = ServerRegistry(2)
+        registry.upsert("a.example.org", 13327, {}, timezone.now())
+
+        assert [item.row["hostname"] for item in registry.take_dirty()] == ["a.example.org"]
+        assert registry.take_dirty() == []
+
+    def test_replace_keeps_unpersisted_heartbeats(self) -> None:
+        """Test that a reload takes database rows but never overwrites a pending heartbeat."""
+        registry = ServerRegistry(4)
+        now = timezone.now()
+        registry.upsert("pending.example.org", 13327, {"num_players": 9}, now)
+        registry.upsert("gone.example.org", 13327, {}, now)
+        registry.take_dirty()
+        registry.upsert("pending.example.org", 13327, {"num_players": 10}, now)
+
+        rows = [
+            {
+                **dict.fromkeys(REGISTRY_FIELDS),
+                "entry": 1,
+                "reachable": None,
+                "hostname": "pending.example.org",
+                "port": 13327,
+                "num_players": 3,
+                "rtt_ms": 12.5,
+            },
+            {
+                **dict.fromkeys(REGISTRY_FIELDS),
+                "entry": 2,
+                "reachable": False,
+                "hostname": "other.example.org",
+                "port": 13327,
+                "num_players": 4,
+            },
+        ]
+        changed = registry.replace(rows)
+
+        assert changed == 2  # other.example.org added, gone.example.org dropped
+        pending = registry.shard("pending.example.org").servers["pending.example.org", 13327]
+        assert pending.row["num_players"] == 10
+        assert pending.row["rtt_ms"] == 12.5
+        assert pending.entry == 1
+        assert registry.shard("other.example.org").servers["other.example.org", 13327].reachable is False
+        assert ("gone.example.org", 13327) not in registry.shard("gone.example.org").servers
+
+
+@pytest.mark.django_db
+class TestMemoryStorage:
+    """Tests for persisting and reloading the in-memory backend."""
+
+    @pytest.fixture
+    def storage(self) -> MemoryStorage:
+        """Return a storage that only persists when asked to."""
+        return MemoryStorage(shards=4, persist_interval=60, resync_interval=3600, background=False)
+
+    def test_heartbeats_stay_in_memory_until_persisted(self, storage: MemoryStorage) -> None:
+        """Test that heartbeats are listed at once and written in one batch."""
+        existing = ServerFactory(hostname="existing.example.org", port=13327, num_players=0)
+
+        assert storage.save_heartbeat("existing.example.org", 13327, {"num_players": 7})[1] is False
+        assert storage.save_heartbeat("new.example.org", 13327, {"num_players": 3})[1] is True
+        assert [row["hostname"] for row in storage.live_servers()] == ["existing.example.org", "new.example.org"]
+        assert not Server.objects.filter(hostname="new.example.org").exists()
+
+        assert storage.persist() == 2
+
+        existing.refresh_from_db()
+        assert existing.num_players == 7
+        new = Server.objects.get(hostname="new.example.org")
+        assert new.num_players == 3
+        assert storage.registry.shard("new.example.org").servers["new.example.org", 13327].entry == new.entry
+        assert storage.persist() == 0
+
+    def test_persist_matches_rows_announced_elsewhere(self, storage: MemoryStorage) -> None:
+        """Test that a server inserted by another worker is updated rather than duplicated."""
+        storage.ensure_synced()
+        ServerFactory(hostname="elsewhere.example.org", port=13327)
+
+        assert storage.save_heartbeat("elsewhere.example.org", 13327, {"num_players": 5})[1] is True
+        storage.persist()
+
+        assert Server.objects.filter(hostname="elsewhere.example.org").count() == 1
+        assert Server.objects.get(hostname="elsewhere.example.org").num_players == 5
+
+    def test_generation_is_bumped_per_persist(self, storage: MemoryStorage) -> None:
+        """Test that heartbeats leave the list caches alone until a batch that changes them is written."""
+        storage.ensure_synced()
+        generation = get_generation()
+
+        for port in range(13327, 13337):
+            storage.save_heartbeat("batch.example.org", port, {})
+        assert get_generation() == generation
+
+        storage.persist()
+        assert get_generation() == generation + 1
+
+        for port in range(13327, 13337):
+            storage.save_heartbeat("batch.example.org", port, {})
+        storage.persist()
+        assert get_generation() == generation + 1
+
+    def test_persist_records_history(self, storage: MemoryStorage) -> None:
+        """Test that persisted heartbeats feed the history buffer like saved rows do."""
+        storage.save_heartbeat("history.example.org", 13327, {"num_players": 4})
+        storage.persist()
+
+        assert [sample.num_players for sample in history_buffer().drain()] == [4]
+
+    def test_failed_persist_is_retried(self, storage: MemoryStorage, mocker: MockerFixture) -> None:
+        """Test that servers stay queued when the write fails."""
+        storage.save_heartbeat("retry.example.org", 13327, {})
+        mocker.patch.object(storage, "_write", side_effect=RuntimeError("database down"))
+
+        with pytest.raises(RuntimeError):
+            storage.persist()
+
+        mocker.stopall()
+        assert storage.persist() == 1
+
+    def test_resync_picks_up_other_writers(self, storage: MemoryStorage) -> None:
+        """Test that live rows written elsewhere appear after a resync and stale ones do not."""
+        storage.ensure_synced()
+        ServerFactory(hostname="api.example.org", port=13327)
+        stale_server = ServerFactory(hostname="stale.example.org", port=13327)
+        Server.objects.filter(entry=stale_server.entry).update(last_update=stale())
+
+        assert storage.live_servers() == []
+        assert storage.resync() == 1
+        assert [row["hostname"] for row in storage.live_servers()] == ["api.example.org"]
+
+
+@pytest.mark.django_db
+class TestMemoryStorageViews:
+    """The heartbeat and list views running on the in-memory backend."""
+
+    @pytest.fixture(autouse=True)
+    def memory_storage(self, settings: Settings) -> Iterator[None]:
+        """Switch the views to a foreground MemoryStorage."""
+        settings.SERVER_STORAGE = "nexxus.storage.MemoryStorage"
+        settings.SERVER_STORAGE_BACKGROUND_PERSIST = False
+        server_storage.cache_clear()
+        blacklist_matcher().current()
+        yield
+        server_storage.cache_clear()
+
+    def test_factory_selects_backend(self) -> None:
+        """Test that SERVER_STORAGE picks the backend class."""
+        assert isinstance(server_storage(), MemoryStorage)
+
+    def test_heartbeat_and_lists_run_in_memory(self, query_budget: Callable) -> None:
+        """Test that once loaded, heartbeats and every list are served without a query."""
+        server_storage().ensure_synced()
+        client = Client()
+
+        with query_budget(reads=0, writes=0):
+            created = client.post(reverse("legacy_update"), data={"hostname": "mem.example.org", "port": "13327"})
+            updated = client.post(reverse("legacy_update"), data={"hostname": "mem.example.org", "port": "13327"})
+            legacy_client = client.get(reverse("legacy_client"))
+            legacy_html = client.get(reverse("legacy_html"))
+            index = client.get(reverse("v3:index"))
+
+        assert created.status_code == HTTPStatus.CREATED
+        assert updated.status_code == HTTPStatus.OK
+        for response in (legacy_client, legacy_html, index):
+            assert b"mem.example.org" in response.content
+        assert b"last_update_timestamp=" in legacy_client.content
+        assert not Server.objects.exists()
+
+        server_storage().persist()
+        assert Server.objects.filter(hostname="mem.example.org", port=13327).exists()
+
+    def test_cached_lists_skip_the_registry(self, mocker: MockerFixture) -> None:
+        """Test that cache hits never copy the registry and misses only copy the printed columns."""
+        server_storage().save_heartbeat("mem.example.org", 13327, {"text_comment": "plain"})
+        live_servers = mocker.spy(server_storage(), "live_servers")
+        client = Client()
+
+        for _ in range(3):
+            assert b"mem.example.org" in client.get(reverse("v3:index")).content
+            assert b"mem.example.org" in client.get(reverse("legacy_html")).content
+
+        assert live_servers.call_count == 2
+        for call in live_servers.call_args_list:
+            assert "text_comment" not in call.args[0]
+
+    def test_api_runs_in_memory(self, query_budget: Callable) -> None:
+        """Test that the v3 API announces into and lists from the registry."""
+        server_storage().ensure_synced()
+        client = Client()
+        payload = factory.build(dict, FACTORY_CLASS=ServerFactory, hostname="api.example.org", port=13327)
+
+        with query_budget(reads=0, writes=0):
+            created = client.patch("/v3/api/servers", data=payload, content_type="application/json")
+            listed = client.get("/v3/api/servers", {"live": "true"})
+            ndjson = client.get("/v3/api/servers", {"live": "true"}, headers={"accept": "application/x-ndjson"})
+            b"".join(ndjson.streaming_content)
+
+        assert created.status_code == HTTPStatus.CREATED
+        assert created.json()["entry"] is None
+        assert [row["hostname"] for row in listed.json()] == ["api.example.org"]
+        assert not Server.objects.exists()
+
+        server_storage().persist()
+        entry = Server.objects.get(hostname="api.example.org").entry
+        assert client.get("/v3/api/servers", {"live": "true"}).json()[0]["entry"] == entry
+
+
+def test_database_storage_is_default() -> None:
+    """Test that the database backend is used unless configured otherwise."""
+    server_storage.cache_clear()
+    assert isinstance(server_storage(), DatabaseStorage)
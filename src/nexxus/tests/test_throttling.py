@@ -0,0 +1,45 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from django.urls import path
+from ninja_extra import NinjaExtraAPI, api_controller, route, throttle
+
+from nexxus.middleware import is_slim_path
+from nexxus.throttling import ClientIPAnonRateThrottle, ClientIPUserRateThrottle
+
+
+@api_controller("/ping")
+class PingController:
+    """A throttled route for exercising the throttles end to end."""
+
+    @route.get("")
+    @throttle(ClientIPAnonRateThrottle, ClientIPUserRateThrottle, rate="2/min")
+    def ping(self) -> dict[str, str]:
+        """Answer a ping."""
+        return {"message": "pong"}
+
+
+api = NinjaExtraAPI(urls_namespace="throttling_test")
+api.register_controllers(PingController)
+
+urlpatterns = [path("v3/api/", api.urls)]
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache() -> None:
+    cache.clear()
+
+
+@pytest.mark.urls("nexxus.tests.test_throttling")
+def test_throttled_route_on_slim_path() -> None:
+    """Test that a throttled API route works without AuthenticationMiddleware and limits by address."""
+    assert is_slim_path("/v3/api/ping")
+
+    client = Client(REMOTE_ADDR="203.0.113.5")
+    statuses = [client.get("/v3/api/ping").status_code for _ in range(3)]
+    other = Client(REMOTE_ADDR="203.0.113.6").get("/v3/api/ping")
+
+    assert statuses == [HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS]
+    assert other.status_code == HTTPStatus.OK
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+
+from nexxus.models import Blacklist, Server
+from nexxus.tests.factories import ServerFactory
+from nexxus.transfer import export_rows, import_rows
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_round_trip_preserves_rows(fmt: str) -> None:
+    """Test that an export restored with replace reproduces every row, including last_update."""
+    servers = ServerFactory.create_batch(5)
+    stale = timezone.now() - timedelta(days=3)
+    Server.objects.filter(entry=servers[0].entry).update(last_update=stale, html_comment=None)
+    expected = list(Server.objects.order_by("entry").values())
+
+    stream = StringIO()
+    assert list(export_rows(Server, stream, fmt, chunk_size=2)) == [2, 4, 5]
+    stream.seek(0)
+    assert list(import_rows(Server, stream, fmt, chunk_size=2, replace=True)) == [2, 4, 5]
+
+    assert list(Server.objects.order_by("entry").values()) == expected
+
+
+def test_import_sets_missing_last_update() -> None:
+    """Test that legacy rows without timestamps are stored with the import time."""
+    stream = StringIO('{"hostname": "legacy.example.org", "port": 13327, "num_players": 3}\n')
+
+    list(import_rows(Server, stream, "ndjson"))
+
+    server = Server.objects.get(hostname="legacy.example.org")
+    assert server.num_players == 3
+    assert server.last_update is not None
+
+
+@pytest.mark.parametrize("returns_pks", [True, False])
+def test_import_keeps_timestamps_without_touching_the_model(
+    monkeypatch: pytest.MonkeyPatch, *, returns_pks: bool
+) -> None:
+    """Test that imported timestamps are stored as given while last_update keeps auto_now for other saves."""
+    monkeypatch.setattr(type(connection.features), "can_return_rows_from_bulk_insert", returns_pks)
+    ServerFactory(hostname="existing.example.org")
+    stale = timezone.now() - timedelta(days=3)
+    stream = StringIO(f'{{"hostname": "old.example.org", "port": 1, "last_update": "{stale.isoformat()}"}}\n')
+
+    imports = import_rows(Server, stream, "ndjson")
+    next(imports)
+    assert Server._meta.get_field("last_update").auto_now  # noqa: SLF001
+    list(imports)
+
+    assert Server.objects.get(hostname="old.example.org").last_update == stale
+
+
+def test_import_is_all_or_nothing() -> None:
+    """Test that a bad record rolls back every chunk inserted before it."""
+    stream = StringIO("hostname,port\na.example.org,1\nb.example.org,not-a-port\n")
+
+    with pytest.raises(ValueError, match="Invalid port"):
+        list(import_rows(Server, stream, "csv", chunk_size=1))
+
+    assert not Server.objects.exists()
+
+
+def test_commands_move_blacklist_through_files(tmp_path: Path) -> None:
+    """Test the export_table and import_table commands end to end."""
+    Blacklist.objects.create(hostname="banned.example.com")
+    Blacklist.objects.create(ip_address="192.0.2.66")
+    path = tmp_path / "blacklist.csv"
+
+    call_command("export_table", "blacklist", output=str(path), stderr=StringIO())
+    Blacklist.objects.all().delete()
+    out = StringIO()
+    call_command("import_table", "blacklist", input=str(path), stdout=out, stderr=StringIO())
+
+    assert "Imported 2 rows" in out.getvalue()
+    assert set(Blacklist.objects.values_list("hostname", "ip_address")) == {
+        ("banned.example.com", None),
+        (None, "192.0.2.66"),
+    }
+
+
+def test_import_command_reports_unknown_fields(tmp_path: Path) -> None:
+    """Test that a file for another table is rejected with a clear error."""
+    path = tmp_path / "servers.ndjson"
+    path.write_text('{"hostname": "x.example.org", "colour": "red"}\n')
+
+    with pytest.raises(CommandError, match="Unknown servers fields: colour"):
+        call_command("import_table", "servers", input=str(path), stderr=StringIO())
@@ -0,0 +1,24 @@
+import pytest
+
+from nexxus.validators import ServerValidationError, clean_hostname, clean_port
+
+
+def test_clean_hostname_normalises() -> None:
+    """Whitespace is stripped and the hostname lower-cased."""
+    assert clean_hostname("  CrossFire.Example.ORG ") == "crossfire.example.org"
+
+
+@pytest.mark.parametrize(
+    ("hostname", "message"), [("", "Invalid hostname."), ("bad host!", "Invalid hostname format.")]
+)
+def test_clean_hostname_rejects(hostname: str, message: str) -> None:
+    """Empty and malformed hostnames are rejected."""
+    with pytest.raises(ServerValidationError, match=message):
+        clean_hostname(hostname)
+
+
+@pytest.mark.parametrize("port", [None, 0, 65536])
+def test_clean_port_rejects(port: int | None) -> None:
+    """Missing and out-of-range ports are rejected."""
+    with pytest.raises(ServerValidationError):
+        clean_port(port)
@@ -1,13 +1,15 @@
+from collections.abc import Callable
 from datetime import timedelta
 from http import HTTPStatus
 from unittest.mock import patch
 
 import pytest
-from django.conf import settings
+from django.conf import Settings, settings
 from django.test import Client
 from django.urls import reverse
 from django.utils import timezone
 
+from nexxus.blacklist import blacklist_matcher
 from nexxus.models import Server
 from nexxus.tests.factories import ServerFactory
 
@@ -51,6 +53,35 @@ class TestLegacyHtmlView:
         for server in servers:
             assert server.hostname in str(response.content)
 
+    def test_legacy_html_view_hides_stale_servers(self) -> None:
+        """Test that servers not updated within LAST_UPDATE_TIMEOUT are left out."""
+        stale_time = timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT + 100)
+        with patch("django.utils.timezone.now", return_value=stale_time):
+            stale_server = ServerFactory()
+        active_server = ServerFactory()
+
+        content = Client().get(reverse("legacy_html")).content.decode()
+
+        assert active_server.hostname in content
+        assert stale_server.hostname not in content
+
+    def test_legacy_html_view_paginates(self, settings: Settings) -> None:
+        """Test that each page is rendered and cached separately."""
+        settings.SERVER_LIST_PAGE_SIZE = 2
+        ServerFactory(hostname="a.example")
+        ServerFactory(hostname="b.example")
+        ServerFactory(hostname="c.example")
+        client = Client()
+
+        first = client.get(reverse("legacy_html")).content.decode()
+        second = client.get(reverse("legacy_html"), {"page": 2}).content.decode()
+
+        assert "a.example" in first
+        assert "c.example" not in first
+        assert "c.example" in second
+        assert "a.example" not in second
+        assert client.get(reverse("legacy_html"), {"page": 3}).status_code == HTTPStatus.NOT_FOUND
+
 
 class TestLegacyUpdateView:
     """Unit tests for the LegacyUpdateView."""
@@ -69,6 +100,14 @@ class TestLegacyUpdateView:
         assert response.status_code == HTTPStatus.BAD_REQUEST
         assert b"Invalid port value" in response.content
 
+    def test_post_non_numeric_counter_returns_400(self) -> None:
+        """Test that a non-numeric counter is rejected instead of raising a server error."""
+        client = Client()
+        response = client.post(reverse("legacy_update"), data={"hostname": "test", "port": "1234", "uptime": "soon"})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert b"Invalid uptime value" in response.content
+        assert not Server.objects.filter(hostname="test").exists()
+
     def test_post_creates_server(self) -> None:
         """Test that a valid POST request creates a new server."""
         client = Client()
@@ -123,6 +162,36 @@ class TestServerListView:
         for server in servers:
             assert server.hostname in str(response.content)
 
+    def test_get_request_hides_stale_servers(self) -> None:
+        """Test that servers not updated within LAST_UPDATE_TIMEOUT are left out."""
+        stale_time = timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT + 100)
+        with patch("django.utils.timezone.now", return_value=stale_time):
+            stale_server = ServerFactory()
+
+        response = Client().get(reverse("v3:index"))
+
+        assert stale_server.hostname not in response.content.decode()
+
+    def test_get_request_serves_cached_fragment(self, django_assert_num_queries: Callable) -> None:
+        """Test that a repeated request renders the table from cache without querying servers."""
+        server = ServerFactory()
+        client = Client()
+        client.get(reverse("v3:index"))
+
+        with django_assert_num_queries(0):
+            response = client.get(reverse("v3:index"))
+
+        assert server.hostname in response.content.decode()
+
+    def test_get_request_fragment_invalidated_by_write(self) -> None:
+        """Test that saving a server replaces the cached fragment."""
+        client = Client()
+        client.get(reverse("v3:index"))
+
+        server = ServerFactory()
+
+        assert server.hostname in client.get(reverse("v3:index")).content.decode()
+
     def test_post_valid_form_creates_server(self) -> None:
         """Test valid POST request creates a new server using ServerForm."""
         client = Client()
@@ -141,6 +210,13 @@ class TestServerListView:
         assert Server.objects.filter(hostname="posthost", port=8000).exists()
         assert b"Nexxus created" in response.content
 
+    def test_post_normalises_hostname(self) -> None:
+        """Test that the shared validator lower-cases the submitted hostname."""
+        client = Client()
+        response = client.post(reverse("v3:index"), data={"hostname": " PostHost.Example ", "port": 8000})
+        assert response.status_code == HTTPStatus.CREATED
+        assert Server.objects.filter(hostname="posthost.example", port=8000).exists()
+
     def test_post_invalid_form_returns_400(self) -> None:
         """Test invalid POST data returns 400 with form error details."""
         client = Client()
@@ -153,3 +229,59 @@ class TestServerListView:
 
         assert response.status_code == HTTPStatus.BAD_REQUEST
         assert b"Invalid data" in response.content
+
+
+class TestQueryBudgets:
+    """Query budgets of the legacy and v3 page endpoints; raise one only with a reason."""
+
+    @pytest.fixture(autouse=True)
+    def warm_blacklist(self) -> None:
+        """Build the blacklist index up front: it is loaded once per change, not per request."""
+        blacklist_matcher().current()
+
+    @pytest.mark.query_budget(reads=1, writes=1, ms=500)
+    def test_heartbeat_creating_server(self, query_budget: Callable) -> None:
+        """Test that a first heartbeat looks the server up once and inserts it."""
+        with query_budget():
+            response = Client().post(reverse("legacy_update"), data={"hostname": "budget.example.org", "port": "13327"})
+
+        assert response.status_code == HTTPStatus.CREATED
+
+    @pytest.mark.query_budget(reads=1, writes=1, ms=500)
+    def test_heartbeat_updating_server(self, query_budget: Callable) -> None:
+        """Test that a repeated heartbeat looks the server up once and updates it."""
+        ServerFactory(hostname="budget.example.org", port=13327)
+
+        with query_budget():
+            response = Client().post(reverse("legacy_update"), data={"hostname": "budget.example.org", "port": "13327"})
+
+        assert response.status_code == HTTPStatus.OK
+
+    @pytest.mark.query_budget(reads=1, writes=0, ms=500)
+    def test_client_list(self, query_budget: Callable) -> None:
+        """Test that meta_client.php reads the server list in one query, however many servers there are."""
+        ServerFactory.create_fleet(50)
+
+        with query_budget():
+            Client().get(reverse("legacy_client"))
+        with query_budget(reads=0):
+            Client().get(reverse("legacy_client"))
+
+    @pytest.mark.query_budget(reads=2, writes=0, ms=500)
+    @pytest.mark.parametrize("name", ["legacy_html", "v3:index"])
+    def test_html_lists(self, name: str, query_budget: Callable) -> None:
+        """Test that the HTML lists count and read one page of servers, then serve from cache."""
+        ServerFactory.create_fleet(50)
+
+        with query_budget():
+            Client().get(reverse(name))
+        with query_budget(reads=0):
+            Client().get(reverse(name))
+
+    @pytest.mark.query_budget(reads=1, writes=1, ms=500)
+    def test_form_post(self, query_budget: Callable) -> None:
+        """Test that the v3 form looks the server up once and writes it once."""
+        with query_budget():
+            response = Client().post(reverse("v3:index"), data={"hostname": "budget.example.org", "port": "13327"})
+
+        assert response.status_code == HTTPStatus.CREATED
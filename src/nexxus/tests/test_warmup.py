@@ -0,0 +1,55 @@
+from django.core.checks import run_checks
+from django.test import override_settings
+
+from nexxus.warmup import cached_loader, precompile_templates, template_names
+
+CACHED_TEMPLATES = {
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {
+        "loaders": [
+            (
+                "django.template.loaders.cached.Loader",
+                ["django.template.loaders.app_directories.Loader"],
+            )
+        ]
+    },
+}
+UNCACHED_TEMPLATES = {
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {"loaders": ["django.template.loaders.app_directories.Loader"]},
+}
+
+
+def deploy_errors() -> set[str]:
+    """Return the ids of nexxus deploy check errors."""
+    return {message.id for message in run_checks(include_deployment_checks=True) if message.id.startswith("nexxus.")}
+
+
+def test_template_names_cover_nexxus_templates() -> None:
+    """Test that every nexxus template is found."""
+    names = template_names()
+
+    assert "server_list.html" in names
+    assert "legacy_html.html" in names
+
+
+@override_settings(TEMPLATES=[CACHED_TEMPLATES], TEMPLATE_CACHE=True)
+def test_precompile_fills_cached_loader() -> None:
+    """Test that precompiling puts every template in the cached loader."""
+    loader = cached_loader()
+    assert loader is not None
+    names = precompile_templates()
+
+    assert set(names) <= set(loader.get_template_cache)
+
+
+@override_settings(TEMPLATES=[CACHED_TEMPLATES], TEMPLATE_CACHE=True)
+def test_deploy_check_passes_with_cached_loader() -> None:
+    """Test that the deploy check accepts the production template profile."""
+    assert deploy_errors() == set()
+
+
+@override_settings(TEMPLATES=[UNCACHED_TEMPLATES], TEMPLATE_CACHE=False)
+def test_deploy_check_fails_without_cached_loader() -> None:
+    """Test that the deploy check fails when templates are read from disk."""
+    assert "nexxus.E001" in deploy_errors()
@@ -0,0 +1,37 @@
+"""ninja_extra throttles keyed by the client address from ``nexxus.clientip``.
+
+The stock throttles parse ``X-Forwarded-For`` again on every request and, with
+``NUM_PROXIES`` unset, key on the whole header, which a client controls. They
+also read ``request.user``, which is never set on the slim API paths where
+``AuthenticationMiddleware`` is skipped; the API authenticates with API keys,
+not users, so these throttles key on the client address alone.
+"""
+
+from django.http import HttpRequest
+from ninja_extra.throttling import AnonRateThrottle, UserRateThrottle
+
+from nexxus.clientip import client_ip
+
+
+class ClientIPIdentMixin:
+    """Identify every caller by the resolved client address."""
+
+    scope: str
+    cache_format: str
+
+    def get_cache_key(self, request: HttpRequest) -> str:
+        """Return the cache key of the client address, without touching request.user."""
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+    def get_ident(self, request: HttpRequest) -> str | None:
+        """Return the client address cached on the request."""
+        ip = client_ip(request)
+        return str(ip) if ip is not None else None
+
+
+class ClientIPAnonRateThrottle(ClientIPIdentMixin, AnonRateThrottle):
+    """AnonRateThrottle keyed by the resolved client address."""
+
+
+class ClientIPUserRateThrottle(ClientIPIdentMixin, UserRateThrottle):
+    """UserRateThrottle keyed by the resolved client address."""
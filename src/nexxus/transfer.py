@@ -0,0 +1,203 @@
+"""Streaming bulk import and export of the servers and blacklist tables.
+
+Rows move as CSV (header row of field names) or NDJSON (one object per line).
+Exports read with ``iterator(chunk_size=...)`` and imports insert with one
+``bulk_create`` per chunk, so memory stays constant whatever the table size.
+"""
+
+import csv
+import json
+from collections.abc import Iterator, Sequence
+from datetime import datetime
+from itertools import batched
+from typing import IO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from nexxus.blacklist import invalidate_blacklist
+from nexxus.cache import bump_generation
+from nexxus.models import Blacklist, Server
+from nexxus.stats import fleet_stats
+
+TRANSFER_MODELS: dict[str, type[models.Model]] = {"servers": Server, "blacklist": Blacklist}
+FORMATS: tuple[str, ...] = ("csv", "ndjson")
+
+# Rows read from the database or inserted per round-trip.
+TRANSFER_CHUNK_SIZE: int = 2000
+
+
+class SnapshotJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that keeps full microsecond precision, so a restore reproduces timestamps exactly."""
+
+    def default(self, o: object) -> object:
+        """Encode datetimes with isoformat(); defer everything else to DjangoJSONEncoder."""
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+_encoder = SnapshotJSONEncoder(separators=(",", ":"))
+
+
+class TransferError(ValueError):
+    """Raised when an input file does not match the table it is imported into."""
+
+
+def model_fields(model: type[models.Model]) -> tuple[str, ...]:
+    """Return the column names exported for model, primary key first."""
+    return tuple(field.attname for field in model._meta.concrete_fields)  # noqa: SLF001
+
+
+def format_for_path(path: str) -> str:
+    """Guess the format from a file extension, defaulting to NDJSON."""
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def export_rows(
+    model: type[models.Model], stream: IO[str], fmt: str, chunk_size: int = TRANSFER_CHUNK_SIZE
+) -> Iterator[int]:
+    """Write every row of model to stream, yielding the running row count after each chunk."""
+    fields = model_fields(model)
+    rows = model._default_manager.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)  # noqa: SLF001
+
+    if fmt == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(fields)
+        write = writer.writerow
+    else:
+
+        def write(row: tuple) -> None:
+            stream.write(_encoder.encode(dict(zip(fields, row, strict=True))) + "\n")
+
+    count = 0
+    for chunk in batched(rows, chunk_size, strict=False):
+        for row in chunk:
+            write(row)
+        count += len(chunk)
+        yield count
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator[dict[str, object]]:
+    """Yield one dict per CSV row or NDJSON line."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as error:
+            msg = f"line {line_number}: {error}"
+            raise TransferError(msg) from error
+
+
+def build_instance(
+    model: type[models.Model], fields: dict[str, models.Field], record: dict, stamped: tuple[str, ...] = ()
+) -> models.Model:
+    """Convert one record into an unsaved model instance, coercing CSV strings to field types.
+
+    Fields named in stamped (the auto_now timestamps) are set to the current
+    time when the record leaves them out.
+    """
+    unknown = set(record) - set(fields)
+    if unknown:
+        msg = f"Unknown {model._meta.db_table} fields: {', '.join(sorted(unknown))}"  # noqa: SLF001
+        raise TransferError(msg)
+
+    values = {}
+    for name, raw in record.items():
+        field = fields[name]
+        value = None if raw == "" and field.null else raw
+        try:
+            values[name] = field.to_python(value)
+        except Exception as error:
+            msg = f"Invalid {name} value {value!r}: {error}"
+            raise TransferError(msg) from error
+
+    for name in stamped:
+        if values.get(name) is None:
+            values[name] = timezone.now()
+    return model(**values)
+
+
+def bulk_create_as_given(
+    model: type[models.Model], objs: Sequence[models.Model], batch_size: int
+) -> Sequence[models.Model]:
+    """Insert objs with bulk_create, keeping the auto_now timestamps they carry instead of the time of the insert.
+
+    bulk_create stamps auto_now fields with the current time, so the given
+    values are written back with bulk_update afterwards; the model's fields are
+    never modified, and saves on other threads keep stamping as usual. That
+    needs primary keys: objects without one are numbered after the current
+    maximum when the backend does not return them from a bulk insert (MySQL).
+    Call it inside a transaction.
+    """
+    stamped = [field for field in model._meta.concrete_fields if getattr(field, "auto_now", False)]  # noqa: SLF001
+    given = [[getattr(obj, field.attname) for field in stamped] for obj in objs]
+    manager = model._default_manager  # noqa: SLF001
+    if stamped and not connection.features.can_return_rows_from_bulk_insert:
+        unnumbered = [obj for obj in objs if obj.pk is None]
+        if unnumbered:
+            start = (manager.aggregate(last=Max("pk"))["last"] or 0) + 1
+            for pk, obj in enumerate(unnumbered, start=start):
+                obj.pk = pk
+
+    manager.bulk_create(objs, batch_size=batch_size)
+    if stamped:
+        for obj, values in zip(objs, given, strict=True):
+            for field, value in zip(stamped, values, strict=True):
+                setattr(obj, field.attname, value)
+        manager.bulk_update(objs, [field.name for field in stamped], batch_size=batch_size)
+    return objs
+
+
+def delete_all(model: type[models.Model]) -> None:
+    """Delete every row of model with one plain ``DELETE``.
+
+    QuerySet.delete() would load every row to send signals and cascade; callers
+    refresh whatever those signals maintain. History rows reference servers
+    without a database constraint and stay keyed by entry, so a restore keeps
+    its history.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)  # noqa: SLF001
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")  # noqa: S608
+
+
+def import_rows(
+    model: type[models.Model],
+    stream: IO[str],
+    fmt: str,
+    chunk_size: int = TRANSFER_CHUNK_SIZE,
+    *,
+    replace: bool = False,
+) -> Iterator[int]:
+    """Insert every record from stream into model, yielding the running row count after each chunk.
+
+    The import runs in one transaction, so a failed import leaves the table as
+    it was. With replace, existing rows are deleted first, which turns the
+    import into a snapshot restore.
+    """
+    fields = {field.attname: field for field in model._meta.concrete_fields}  # noqa: SLF001
+    stamped = tuple(name for name, field in fields.items() if getattr(field, "auto_now", False))
+    records = (build_instance(model, fields, record, stamped) for record in read_records(stream, fmt))
+
+    with transaction.atomic():
+        if replace:
+            delete_all(model)
+        count = 0
+        for chunk in batched(records, chunk_size, strict=False):
+            bulk_create_as_given(model, chunk, chunk_size)
+            count += len(chunk)
+            yield count
+
+    if model is Server:
+        # bulk_create sends no signals: refresh the list caches and fleet aggregates here.
+        bump_generation()
+        fleet_stats().reset()
+    elif model is Blacklist:
+        invalidate_blacklist()
@@ -0,0 +1,39 @@
+"""Server field validators shared by the legacy heartbeat decoder, the v3 form view, ServerForm and the API schema."""
+
+import re
+
+MIN_PORT: int = 1
+MAX_PORT: int = 65535
+
+HOSTNAME_RE: re.Pattern[str] = re.compile(r"[a-z0-9.-]+")
+
+
+class ServerValidationError(ValueError):
+    """Raised when a submitted server field is invalid; the message is safe to return to the client."""
+
+
+def clean_hostname(hostname: str | None) -> str:
+    """Strip, lower-case and validate a hostname."""
+    if not hostname:
+        msg = "Invalid hostname."
+        raise ServerValidationError(msg)
+
+    hostname = hostname.strip().lower()
+
+    if not HOSTNAME_RE.fullmatch(hostname):
+        msg = "Invalid hostname format."
+        raise ServerValidationError(msg)
+
+    return hostname
+
+
+def clean_port(port: int | None) -> int:
+    """Validate that a port is present and within the TCP port range."""
+    if port is None:
+        msg = "Port is required."
+        raise ServerValidationError(msg)
+    if not (MIN_PORT <= port <= MAX_PORT):
+        msg = f"Port must be between {MIN_PORT} and {MAX_PORT}."
+        raise ServerValidationError(msg)
+
+    return port
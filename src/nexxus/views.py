@@ -1,25 +1,24 @@
-from datetime import timedelta
+from collections.abc import Iterable
 from typing import Any, ClassVar, TypedDict
 
 from django.conf import settings
-from django.db.models import F
-from django.db.models.query import QuerySet
+from django.core.cache import cache
 from django.http import HttpRequest, HttpResponse
-from django.utils import timezone
+from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView, TemplateView
 
-from nexxus.forms import ServerForm
+from nexxus.admission import ingest_admission
+from nexxus.cache import get_generation
+from nexxus.compression import PrecompressedBody
+from nexxus.heartbeat import HeartbeatError, decode_heartbeat
 from nexxus.models import Server
-from nexxus.security import (
-    # APIKeyCheck,
-    # HMACSignatureCheck,
-    HostnameBlacklistCheck,
-    IPBlacklistCheck,
-    # RateLimitCheck,
-)
+from nexxus.security import security_pipeline
+from nexxus.sharedstats import shared_stats
+from nexxus.storage import LIST_FIELDS, server_storage
 
 
 class PostRequestData(TypedDict, total=False):
@@ -40,42 +39,106 @@ class PostRequestData(TypedDict, total=False):
     cs_version: str
 
 
-class LegacyClientView(TemplateView):
+class PrecompressedCacheMixin:
+    """Serve a view's rendered body from cache, stored pre-compressed for every supported coding.
+
+    The body is keyed by the data generation, so any write that changes what
+    the lists show invalidates it. Heartbeats that only refresh ``last_update``
+    do not, and ``LIST_CACHE_TIMEOUT`` bounds how long that column and
+    time-based filters such as ``LAST_UPDATE_TIMEOUT`` can lag behind.
+    """
+
+    cache_prefix: str = ""
+    # Query parameters that select a different body, such as the page number.
+    cache_vary_on: ClassVar[tuple[str, ...]] = ()
+
+    def get_cache_key(self) -> str:
+        """Return the cache key for the body rendered from the current data generation."""
+        variant = ":".join(self.request.GET.get(name, "") for name in self.cache_vary_on)
+        return f"nexxus:body:{self.cache_prefix}:{get_generation()}:{variant}"
+
+    def get(self, request: HttpRequest, *args: object, **kwargs: object) -> HttpResponse:
+        """Return the cached body, rendering it once on a miss and compressing each coding once on first use."""
+        key = self.get_cache_key()
+        body: PrecompressedBody | None = cache.get(key)
+        shared_stats().add(f"cache.{self.cache_prefix}.{'miss' if body is None else 'hit'}")
+        variants = -1
+        if body is None:
+            response = super().get(request, *args, **kwargs)
+            response.render()
+            body = PrecompressedBody(response.content, response["Content-Type"])
+        else:
+            variants = len(body.encoded)
+        response = body.to_response(request)
+        # Store the body when it is new or this request compressed another variant.
+        if len(body.encoded) != variants:
+            cache.set(key, body, timeout=settings.LIST_CACHE_TIMEOUT)
+        return response
+
+
+class FragmentCacheMixin:
+    """Cache the data-dependent part of a list page as a rendered fragment.
+
+    Pages that extend ``base.html`` carry per-request content such as flash
+    messages, so only ``fragment_template_name`` is cached, keyed by page number
+    and data generation. On a hit neither the count nor the page query runs.
+    """
+
+    cache_prefix: str = ""
+    fragment_template_name: str = ""
+    fragment_context_name: str = "fragment"
+
+    def get_fragment_cache_key(self) -> str:
+        """Return the cache key for the fragment of the requested page."""
+        page = self.request.GET.get(self.page_kwarg) or self.kwargs.get(self.page_kwarg) or "1"
+        return f"nexxus:fragment:{self.cache_prefix}:{get_generation()}:{page}"
+
+    def get(self, request: HttpRequest, *args: object, **kwargs: object) -> HttpResponse:  # noqa: ARG002
+        """Render the page around the cached fragment; the list is only read and paginated on a miss."""
+        key = self.get_fragment_cache_key()
+        fragment: str | None = cache.get(key)
+        shared_stats().add(f"cache.{self.cache_prefix}.{'miss' if fragment is None else 'hit'}")
+        # Stays empty on a hit; ListView.get_template_names() still reads it.
+        self.object_list = ()
+        if fragment is None:
+            self.object_list = self.get_queryset()
+            fragment = render_to_string(self.fragment_template_name, self.get_context_data())
+            cache.set(key, fragment, timeout=settings.LIST_CACHE_TIMEOUT)
+        return self.render_to_response({"view": self, self.fragment_context_name: mark_safe(fragment)})  # noqa: S308
+
+
+class LiveServerListMixin:
+    """Paginated list of live servers, read from the SERVER_STORAGE backend."""
+
+    context_object_name: str = "server_list"
+    # Columns the HTML list templates print; text_comment is only for meta_client.php.
+    list_fields: ClassVar[tuple[str, ...]] = tuple(name for name in LIST_FIELDS if name != "text_comment")
+
+    def get_queryset(self) -> Iterable[dict[str, Any]]:
+        """Return listed servers updated within LAST_UPDATE_TIMEOUT, ordered by hostname and port."""
+        return server_storage().live_servers(self.list_fields)
+
+    def get_paginate_by(self, queryset: Iterable[dict[str, Any]]) -> int:  # noqa: ARG002
+        """Return the number of servers per page."""
+        return settings.SERVER_LIST_PAGE_SIZE
+
+
+class LegacyClientView(PrecompressedCacheMixin, TemplateView):
     """Django view that serves the legacy client using a template."""
 
     model: type[Server] = Server
     template_name: str = "legacy_client.html"
-
-    def get_queryset(self) -> QuerySet[Server]:
-        """Return Server objects as documented in the legacy meta_client.php."""
-        # Get the current time and subtract the timeout period (you can adjust the timeout)
-        last_update_timeout = timezone.now() - timedelta(seconds=settings.LAST_UPDATE_TIMEOUT)
-
-        # Query the Server model with the necessary filters and field selection
-        queryset = (
-            Server.objects.filter(last_update__gt=last_update_timeout)
-            .values(
-                "hostname",
-                "port",
-                "html_comment",
-                "text_comment",
-                "archbase",
-                "mapbase",
-                "codebase",
-                "flags",
-                "num_players",
-                "in_bytes",
-                "out_bytes",
-                "uptime",
-                "version",
-                "sc_version",
-                "cs_version",
-                last_update_timestamp=F("last_update"),
-            )
-            .order_by("hostname")
-        )
-
-        return queryset
+    cache_prefix: str = "legacy_client"
+
+    def get_queryset(self) -> list[dict[str, Any]]:
+        """Return the live servers as documented in the legacy meta_client.php."""
+        servers = []
+        for row in server_storage().live_servers():
+            server = dict(row)
+            # meta_client.php names the column last_update_timestamp, printed last.
+            server["last_update_timestamp"] = server.pop("last_update")
+            servers.append(server)
+        return servers
 
     def get_context_data(self, **kwargs: dict[str, Any]) -> dict:
         """Return the context data for rendering the template."""
@@ -87,68 +150,41 @@ class LegacyClientView(TemplateView):
         return context
 
 
-class LegacyHtmlView(ListView):
-    """A view that displays a list of Server objects, ordered by hostname."""
+class LegacyHtmlView(PrecompressedCacheMixin, LiveServerListMixin, ListView):
+    """A view that displays a page of live Server objects, ordered by hostname."""
 
-    model: type[Server] = Server
     template_name: str = "legacy_html.html"
-    context_object_name: str = "server_list"
-
-    def get_queryset(self) -> QuerySet[Server]:
-        """Return all Server objects ordered by hostname."""
-        queryset: QuerySet[Server] = Server.objects.order_by("hostname")
-        return queryset
+    cache_prefix: str = "legacy_html"
+    cache_vary_on: ClassVar[tuple[str, ...]] = ("page",)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
+@method_decorator(ingest_admission, name="post")
 class LegacyUpdateView(View):
     """Django view that applies multiple security checks before processing a request."""
 
-    security_checks: ClassVar[list] = [
-        IPBlacklistCheck(),
-        HostnameBlacklistCheck(),
-        # APIKeyCheck(),
-        # HMACSignatureCheck(),
-        # RateLimitCheck(),
-    ]
+    # Name of the SECURITY_PIPELINES entry run on every heartbeat.
+    security_pipeline: str = "heartbeat"
 
     def post(self, request: HttpRequest, *args, **kwargs: PostRequestData) -> HttpResponse:
         """Handle the POST request to update or create a server."""
-        for check in self.security_checks:
-            response = check.validate(request)
-            if response:
-                return response
-
-        hostname = request.POST.get("hostname", "").strip()
-        port = request.POST.get("port", "").strip()
-
-        if not hostname or not port:
-            return HttpResponse("Missing required fields hostname and/or port", status=400, content_type="text/plain")
-
-        # Convert port safely
-        port = int(port) if port.isdigit() else None
-        if port is None:
-            return HttpResponse("Invalid port value", status=400, content_type="text/plain")
-
-        server, created = Server.objects.update_or_create(
-            hostname=hostname,
-            port=port,
-            defaults={
-                "html_comment": request.POST.get("html_comment", "").strip(),
-                "text_comment": request.POST.get("text_comment", "").strip(),
-                "archbase": request.POST.get("archbase", "").strip(),
-                "mapbase": request.POST.get("mapbase", "").strip(),
-                "codebase": request.POST.get("codebase", "").strip(),
-                "flags": request.POST.get("flags", "").strip(),
-                "num_players": int(request.POST.get("num_players", 0) or 0),
-                "in_bytes": int(request.POST.get("in_bytes", 0) or 0),
-                "out_bytes": int(request.POST.get("out_bytes", 0) or 0),
-                "uptime": int(request.POST.get("uptime", 0) or 0),
-                "version": request.POST.get("version", "").strip(),
-                "sc_version": request.POST.get("sc_version", "").strip(),
-                "cs_version": request.POST.get("cs_version", "").strip(),
-            },
-        )
+        pipeline = security_pipeline(self.security_pipeline)
+        pipeline.prepare(request)
+        try:
+            heartbeat = decode_heartbeat(request.POST)
+        except HeartbeatError as error:
+            shared_stats().add("heartbeat.invalid")
+            return HttpResponse(str(error), status=400, content_type="text/plain")
+
+        response = pipeline.run(request)
+        if response is not None:
+            shared_stats().add("heartbeat.rejected")
+            return response
+
+        hostname = heartbeat.pop("hostname")
+        port = heartbeat.pop("port")
+        _server, created = server_storage().save_heartbeat(hostname, port, heartbeat)
+        shared_stats().add("heartbeat.created" if created else "heartbeat.updated")
 
         return HttpResponse(
             f"Nexxus created {hostname}" if created else f"Nexxus updated {hostname}",
@@ -158,17 +194,14 @@ class LegacyUpdateView(View):
 
 
 @method_decorator(csrf_exempt, name="dispatch")
-class ServerListlView(ListView):
-    """A view that displays a list of Server objects, ordered by hostname."""
+@method_decorator(ingest_admission, name="post")
+class ServerListlView(FragmentCacheMixin, LiveServerListMixin, ListView):
+    """A view that displays a page of live Server objects, ordered by hostname."""
 
-    model = Server
     template_name: str = "server_list.html"
-    context_object_name = "server_list"
-
-    def get_queryset(self) -> QuerySet[Server]:
-        """Return all Server objects ordered by hostname."""
-        queryset: QuerySet[Server] = Server.objects.order_by("hostname")
-        return queryset
+    fragment_template_name: str = "server_list_table.html"
+    fragment_context_name: str = "server_table"
+    cache_prefix: str = "server_list"
 
     def get(self, request: HttpRequest) -> HttpResponse:
         """Handle GET requests."""
@@ -176,28 +209,22 @@ class ServerListlView(ListView):
 
     def post(self, request: HttpRequest) -> HttpResponse:
         """Handle POST requests."""
-        form = ServerForm(request.POST)
-
-        if form.is_valid():
-            cleaned_data = form.cleaned_data
-            hostname = cleaned_data.get("hostname")
-            port = cleaned_data.get("port")
-
-            server, created = Server.objects.update_or_create(
-                hostname=hostname,
-                port=port,
-                defaults=cleaned_data,
-            )
-
+        try:
+            cleaned_data = decode_heartbeat(request.POST)
+        except HeartbeatError as error:
             return HttpResponse(
-                f"Nexxus created {hostname}" if created else f"Nexxus updated {hostname}",
-                status=201 if created else 200,
+                f"Invalid data: {error}",
+                status=400,
                 content_type="text/plain",
             )
 
-        errors = form.errors.as_text()
+        hostname = cleaned_data.pop("hostname")
+        port = cleaned_data.pop("port")
+
+        _server, created = server_storage().save_heartbeat(hostname, port, cleaned_data)
+
         return HttpResponse(
-            f"Invalid data: {errors}",
-            status=400,
+            f"Nexxus created {hostname}" if created else f"Nexxus updated {hostname}",
+            status=201 if created else 200,
             content_type="text/plain",
         )
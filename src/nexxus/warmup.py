@@ -0,0 +1,37 @@
+"""Process warmup run once at startup, before the first request."""
+
+from pathlib import Path
+
+from django.apps import apps
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+def template_names() -> list[str]:
+    """Return the name of every template shipped in the engine's directories and nexxus/templates."""
+    engine = engines["django"].engine
+    roots = [Path(directory) for directory in engine.dirs]
+    roots.append(Path(apps.get_app_config("nexxus").path) / "templates")
+    names: set[str] = set()
+    for root in roots:
+        if root.is_dir():
+            names.update(path.relative_to(root).as_posix() for path in root.rglob("*.html"))
+    return sorted(names)
+
+
+def cached_loader() -> CachedLoader | None:
+    """Return the Django engine's cached template loader, or None when templates are read from disk."""
+    loaders = engines["django"].engine.template_loaders
+    return next((loader for loader in loaders if isinstance(loader, CachedLoader)), None)
+
+
+def precompile_templates() -> list[str]:
+    """Compile every template into the cached loader and return the names compiled.
+
+    Raises the template error of the first template that fails to compile.
+    """
+    engine = engines["django"].engine
+    names = template_names()
+    for name in names:
+        engine.get_template(name)
+    return names
@@ -23,6 +23,8 @@ python manage.py makemigrations
 echo "==> Migrate"
 python manage.py migrate
 
+echo "==> Reset shared stats"
+python manage.py init_stats
 
 echo "==> Run server with DEBUG=${DEBUG}"
 LOG_LEVEL="--log-level info"
@@ -32,9 +34,13 @@ if [ "${DEBUG}" = "True" ]; then
     LOG_LEVEL="--log-level debug"
 fi
 
+# Threaded workers: ingest admission control (INGEST_MAX_IN_FLIGHT) only keeps
+# threads free for reads when each worker has more threads than that limit.
 gunicorn core.wsgi \
     --bind 0.0.0.0:8000 \
     --workers 4 \
+    --worker-class gthread \
+    --threads "${GUNICORN_THREADS:-8}" \
     --timeout 120 \
     --access-logfile - \
     --error-logfile - \
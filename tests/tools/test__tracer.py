@@ -12,3 +12,19 @@ class TestTimer:
     @Timer("Decorator")
     def test_decorator(self) -> None:
         """Test for Decorator."""
+
+    def test_registry(self) -> None:
+        """Test that calls and microseconds are added to the registry."""
+        counters: dict[str, int] = {}
+
+        class Registry:
+            def add(self, name: str, value: int = 1) -> None:
+                counters[name] = counters.get(name, 0) + value
+
+        timer = Timer("Registry", registry=Registry())
+        for _ in range(2):
+            with timer:
+                pass
+
+        assert counters["timer.Registry.calls"] == 2
+        assert counters["timer.Registry.us"] >= 0
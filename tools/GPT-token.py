@@ -1,82 +1,161 @@
+"""Split a large diff into chunks that each fit in a model's context window.
+
+The diff is read line by line and grouped into ``diff --git`` blocks. Batches of
+blocks are tokenized in a process pool with ``encode_ordinary_batch``, keeping
+only their token counts. Chunks are written as soon as they fill, so memory use
+stays constant whatever the size of the diff. A block larger than the limit on
+its own is split on line boundaries, and a single oversized line on token
+boundaries.
+"""
+
+import argparse
+import os
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
 import tiktoken
 
-# Load your tokenizer - use "cl100k_base" for GPT-4 models or check the specific model tokenizer
-tokenizer = tiktoken.get_encoding("cl100k_base")
+# Tokenizer: "cl100k_base" for GPT-4 models, or check the specific model tokenizer.
+ENCODING = "cl100k_base"
 
 # Define the max token limit for chunking
 MAX_TOKENS = 4000
 
-
-def split_text_to_token_chunks(filename: str):
-    """Read a file, tokenize its contents, and split it into chunks."""
-    # Step 1: Read the entire text from the file
-    with open(filename) as file:
-        text = file.read()
-
-    # Step 2: Tokenize the entire text
-    tokens = tokenizer.encode(text)
-
-    # Step 3: Split the text into diff blocks
-    diff_blocks = []  # List to store blocks of diff data
-    current_block = []  # Stores lines of the current diff block
-    current_tokens = []  # Stores tokens for the current diff block
-
-    # Split the text based on "diff --git" entries to preserve diff integrity
-    for line in text.splitlines(True):
-        # Tokenize the line
-        line_tokens = tokenizer.encode(line)
-
-        # Check if the line starts with a diff entry indicating a new block
-        if line.startswith("diff --git"):
-            # If there's an existing block, add it to the diff_blocks list
-            if current_tokens:
-                diff_blocks.append((current_block, current_tokens))
-
-            # Reset for the new diff block
-            current_block = [line]
-            current_tokens = line_tokens
-        else:
-            # Add this line to the current diff block
-            current_block.append(line)
-            current_tokens += line_tokens
-
-    # Don't forget to add the last block
-    if current_tokens:
-        diff_blocks.append((current_block, current_tokens))
-
-    # Step 4: Chunk the diff blocks based on the MAX_TOKENS limit
-    chunk_text = []  # Holds the text for the current chunk
-    chunk_tokens = []  # Holds the tokenized text for the current chunk
-
-    # Process each diff block
-    for block, block_tokens in diff_blocks:
-        # Check if adding this block exceeds the MAX_TOKENS limit
-        if len(chunk_tokens) + len(block_tokens) > MAX_TOKENS:
-            # If it does, save the current chunk and start a new one
-            output_filename = f"chunk_{len(chunk_text) + 1}.txt"
-            with open(output_filename, "w") as chunk_file:
-                chunk_file.writelines(chunk_text)
-            print(f"Saved {output_filename}")
-
-            # Start a new chunk
-            chunk_text = block
-            chunk_tokens = block_tokens
+# Blocks sent to a worker per task.
+BATCH_BLOCKS = 256
+
+Piece = tuple[str, int]
+
+_encoding: tiktoken.Encoding | None = None
+
+
+def _init_worker(encoding_name: str) -> None:
+    """Load the tokenizer once per worker process."""
+    global _encoding  # noqa: PLW0603
+    _encoding = tiktoken.get_encoding(encoding_name)
+
+
+def _split_oversized(block: str, max_tokens: int) -> list[Piece]:
+    """Split a block over max_tokens into pieces that fit, on line boundaries where possible."""
+    lines = block.splitlines(keepends=True)
+    pieces: list[Piece] = []
+    for line, tokens in zip(lines, _encoding.encode_ordinary_batch(lines, num_threads=1), strict=True):
+        if len(tokens) <= max_tokens:
+            pieces.append((line, len(tokens)))
+            continue
+        for start in range(0, len(tokens), max_tokens):
+            window = tokens[start : start + max_tokens]
+            pieces.append((_encoding.decode(window), len(window)))
+    return pieces
+
+
+def count_blocks(blocks: list[str], max_tokens: int) -> list[int | list[Piece]]:
+    """Return the token count of each block, or its pieces when it exceeds max_tokens on its own.
+
+    Only counts travel back to the parent process, plus the text of the rare
+    oversized blocks that had to be split.
+    """
+    counts = [len(tokens) for tokens in _encoding.encode_ordinary_batch(blocks, num_threads=1)]
+    return [
+        count if count <= max_tokens else _split_oversized(block, max_tokens)
+        for block, count in zip(blocks, counts, strict=True)
+    ]
+
+
+def iter_diff_blocks(path: Path) -> Iterator[str]:
+    """Yield the file one ``diff --git`` block at a time."""
+    block: list[str] = []
+    with path.open(encoding="utf-8", errors="replace") as file:
+        for line in file:
+            if line.startswith("diff --git") and block:
+                yield "".join(block)
+                block = []
+            block.append(line)
+    if block:
+        yield "".join(block)
+
+
+def iter_batches(blocks: Iterator[str], size: int) -> Iterator[list[str]]:
+    """Group blocks into lists of up to size."""
+    batch: list[str] = []
+    for block in blocks:
+        batch.append(block)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_pieces(path: Path, max_tokens: int, encoding_name: str, workers: int) -> Iterator[Piece]:
+    """Yield ``(text, token_count)`` pieces of the diff in order, each at most max_tokens."""
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(encoding_name,)) as pool:
+        # Keep a bounded number of batches in flight so reading never runs far ahead of writing.
+        pending: deque[tuple[list[str], Future]] = deque()
+        for batch in iter_batches(iter_diff_blocks(path), BATCH_BLOCKS):
+            pending.append((batch, pool.submit(count_blocks, batch, max_tokens)))
+            if len(pending) >= workers * 2:
+                yield from _resolve(*pending.popleft())
+        while pending:
+            yield from _resolve(*pending.popleft())
+
+
+def _resolve(batch: list[str], future: Future) -> Iterator[Piece]:
+    for block, result in zip(batch, future.result(), strict=True):
+        if isinstance(result, int):
+            yield block, result
         else:
-            # If the block fits, add it to the current chunk
-            chunk_text.extend(block)
-            chunk_tokens.extend(block_tokens)
+            yield from result
+
+
+def split_text_to_token_chunks(
+    filename: str,
+    max_tokens: int = MAX_TOKENS,
+    output_dir: str = ".",
+    encoding_name: str = ENCODING,
+    workers: int | None = None,
+) -> int:
+    """Stream a diff into chunk_N.txt files of at most max_tokens tokens and return how many were written."""
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    chunk_text: list[str] = []  # Holds the text for the current chunk
+    chunk_tokens = 0  # Token count of the current chunk
+    chunks = 0
+
+    def save() -> None:
+        nonlocal chunks
+        chunks += 1
+        output_filename = output / f"chunk_{chunks}.txt"
+        with output_filename.open("w", encoding="utf-8") as chunk_file:
+            chunk_file.writelines(chunk_text)
+        print(f"Saved {output_filename} ({chunk_tokens} tokens)")  # noqa: T201
+
+    for text, tokens in iter_pieces(Path(filename), max_tokens, encoding_name, workers):
+        # Counts are per piece, so a chunk may differ from encoding its joined text by a token at seams.
+        if chunk_text and chunk_tokens + tokens > max_tokens:
+            save()
+            chunk_text, chunk_tokens = [], 0
+        chunk_text.append(text)
+        chunk_tokens += tokens
 
     # Save the final chunk
-    if chunk_tokens:
-        output_filename = f"chunk_{len(chunk_text) + 1}.txt"
-        with Path.open(output_filename, "w") as chunk_file:
-            chunk_file.writelines(chunk_text)
-        print(f"Saved {output_filename}")
+    if chunk_text:
+        save()
+    return chunks
 
 
 # Run the function if the script is executed directly
 if __name__ == "__main__":
-    # Path to the file to be split
-    split_text_to_token_chunks("../zzz.diff")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("filename", nargs="?", default="../zzz.diff", help="Path to the diff to be split")
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS, help="Token limit per chunk")
+    parser.add_argument("--output-dir", default=".", help="Directory the chunk files are written to")
+    parser.add_argument("--encoding", default=ENCODING, help="tiktoken encoding name")
+    parser.add_argument("--workers", type=int, help="Tokenizer processes (default: CPU count)")
+    args = parser.parse_args()
+
+    split_text_to_token_chunks(args.filename, args.max_tokens, args.output_dir, args.encoding, args.workers)
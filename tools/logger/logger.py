@@ -1,10 +1,13 @@
 import logging
 import sys
-
-from google.auth.credentials import Credentials
+from typing import TYPE_CHECKING
 
 from tools.logger.type import LogType
 
+if TYPE_CHECKING:
+    # google-auth is only needed for LogType.GOOGLE_CLOUD and is imported there.
+    from google.auth.credentials import Credentials
+
 
 class Logger(logging.Logger):
     """Logger.
@@ -22,7 +25,7 @@ class Logger(logging.Logger):
         self,
         name: str,
         project: str | None = None,
-        credentials: Credentials | None = None,
+        credentials: "Credentials | None" = None,
         log_type: LogType = LogType.LOCAL,
     ) -> None:
         """Initialize local logger formatter.
@@ -1,5 +1,13 @@
 import time
 from contextlib import ContextDecorator
+from typing import Protocol
+
+
+class CounterRegistry(Protocol):
+    """Anything that can add to a named counter, such as ``nexxus.sharedstats.SharedStats``."""
+
+    def add(self, name: str, value: int = 1) -> None:
+        """Add value to the counter name."""
 
 
 class Timer(ContextDecorator):
@@ -25,17 +33,25 @@ class Timer(ContextDecorator):
         >>>
         >>> sleep(1)
 
+        >>> from nexxus.sharedstats import shared_stats
+        >>>
+        >>> with Timer("render", registry=shared_stats()):
+        >>>     render()
+
     """
 
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, registry: CounterRegistry | None = None) -> None:
         """Initialize Timer.
 
         Args:
             name (str): Log name
+            registry (CounterRegistry | None): Also count calls and total microseconds
+                as ``timer.<name>.calls`` and ``timer.<name>.us``
 
         """
         super().__init__()
         self.name = name
+        self.registry = registry
 
     def __enter__(self) -> None:
         """Run when enter ContextManager or Decorator."""
@@ -45,6 +61,10 @@ class Timer(ContextDecorator):
         """Run when exit ContextManager or Decoraotr."""
         self.end = time.time()
 
+        if self.registry is not None:
+            self.registry.add(f"timer.{self.name}.calls")
+            self.registry.add(f"timer.{self.name}.us", round(self._duration * 1_000_000))
+
         from tools import Logger
 
         logger = Logger(self.name)